@@ -0,0 +1,58 @@
+"""Add task change feed: change_seq, change_sequence and task_tombstones
+
+Revision ID: 8f3e6b1c4d92
+Revises: 7a2d4c9e3b15
+Create Date: 2026-10-19 12:41:05.227810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3e6b1c4d92'
+down_revision: Union[str, None] = '7a2d4c9e3b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('change_sequence',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.Column('pruned_through', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('task_tombstones',
+    sa.Column('task_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index(op.f('ix_task_tombstones_deleted_at'), 'task_tombstones', ['deleted_at'], unique=False)
+    op.create_index('ix_task_tombstones_user_id_change_seq', 'task_tombstones', ['user_id', 'change_seq'], unique=False)
+
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.add_column(sa.Column('change_seq', sa.Integer(), nullable=False, server_default='0'))
+    # Give existing rows distinct positions so the first sync can page through them
+    op.execute("UPDATE tasks SET change_seq = id")
+    op.execute(
+        "INSERT INTO change_sequence (id, value, pruned_through) "
+        "SELECT 1, COALESCE(MAX(id), 0), 0 FROM tasks"
+    )
+    op.create_index('ix_tasks_user_id_change_seq', 'tasks', ['user_id', 'change_seq'], unique=False)
+    op.create_index(op.f('ix_tasks_updated_at'), 'tasks', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tasks_updated_at'), table_name='tasks')
+    op.drop_index('ix_tasks_user_id_change_seq', table_name='tasks')
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('change_seq')
+    op.drop_index('ix_task_tombstones_user_id_change_seq', table_name='task_tombstones')
+    op.drop_index(op.f('ix_task_tombstones_deleted_at'), table_name='task_tombstones')
+    op.drop_table('task_tombstones')
+    op.drop_table('change_sequence')
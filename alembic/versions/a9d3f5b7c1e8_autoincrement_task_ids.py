@@ -0,0 +1,65 @@
+"""Never reuse task ids
+
+Revision ID: a9d3f5b7c1e8
+Revises: e2a8c6d4f1b7
+Create Date: 2026-10-20 09:14:32.551870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d3f5b7c1e8'
+down_revision: Union[str, None] = 'e2a8c6d4f1b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows that outlive their task and are keyed by its id
+TASK_ID_COLUMNS = (
+    ('archived_tasks', 'id'),
+    ('task_tombstones', 'task_id'),
+    ('task_status_events', 'task_id'),
+    ('task_tags', 'task_id'),
+)
+
+
+def _create_next_up_index() -> None:
+    op.create_index(
+        'ix_tasks_next_up',
+        'tasks',
+        ['user_id', 'priority', sa.text('due_at IS NULL'), 'due_at'],
+        unique=False,
+        sqlite_where=sa.text("status != 'DONE'"),
+    )
+
+
+def upgrade() -> None:
+    # Batch mode cannot reflect the expression index, so it is rebuilt by hand
+    op.drop_index('ix_tasks_next_up', table_name='tasks')
+    with op.batch_alter_table(
+        'tasks', recreate='always', table_kwargs={'sqlite_autoincrement': True}
+    ):
+        pass
+    _create_next_up_index()
+    # Start new ids above every id a task ever had, including ids already
+    # freed by archival or deletion
+    highest = ' '.join(
+        f'UNION ALL SELECT max({column}) FROM {table}' for table, column in TASK_ID_COLUMNS
+    )
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) "
+        f"SELECT 'tasks', coalesce(max(id), 0) FROM (SELECT max(id) AS id FROM tasks {highest})"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_next_up', table_name='tasks')
+    with op.batch_alter_table(
+        'tasks', recreate='always', table_kwargs={'sqlite_autoincrement': False}
+    ):
+        pass
+    _create_next_up_index()
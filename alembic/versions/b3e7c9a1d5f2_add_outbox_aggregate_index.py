@@ -0,0 +1,30 @@
+"""Add outbox aggregate index
+
+Revision ID: b3e7c9a1d5f2
+Revises: a9d3f5b7c1e8
+Create Date: 2026-10-20 10:02:18.774105
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e7c9a1d5f2'
+down_revision: Union[str, None] = 'a9d3f5b7c1e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_outbox_messages_aggregate',
+        'outbox_messages',
+        ['aggregate_type', 'aggregate_id', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_messages_aggregate', table_name='outbox_messages')
@@ -0,0 +1,36 @@
+"""Add case-insensitive user email index
+
+Revision ID: b6d2e8f4a1c9
+Revises: f3c7a9d2e4b8
+Create Date: 2026-10-19 18:02:41.227315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2e8f4a1c9'
+down_revision: Union[str, None] = 'f3c7a9d2e4b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1 LIMIT 10"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            "Users share these emails except for case; merge them before upgrading: "
+            + ", ".join(duplicates)
+        )
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
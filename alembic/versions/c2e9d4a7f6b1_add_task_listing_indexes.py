@@ -0,0 +1,32 @@
+"""Add task listing indexes
+
+Revision ID: c2e9d4a7f6b1
+Revises: a4c7e2f9b318
+Create Date: 2026-10-19 17:24:09.381552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e9d4a7f6b1'
+down_revision: Union[str, None] = 'a4c7e2f9b318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_tasks_user_id'), 'tasks', ['user_id'], unique=False)
+    op.create_index('ix_tasks_user_id_created_at', 'tasks', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_tasks_user_id_title', 'tasks', ['user_id', 'title'], unique=False)
+    op.create_index('ix_tasks_user_id_updated_at', 'tasks', ['user_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_user_id_updated_at', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_title', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_created_at', table_name='tasks')
+    op.drop_index(op.f('ix_tasks_user_id'), table_name='tasks')
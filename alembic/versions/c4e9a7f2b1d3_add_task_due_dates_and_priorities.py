@@ -0,0 +1,41 @@
+"""Add task due dates and priorities
+
+Revision ID: c4e9a7f2b1d3
+Revises: b6d2e8f4a1c9
+Create Date: 2026-10-19 20:41:07.518294
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a7f2b1d3'
+down_revision: Union[str, None] = 'b6d2e8f4a1c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('tasks', 'archived_tasks'):
+        op.add_column(table, sa.Column('due_at', sa.DateTime(), nullable=True))
+        op.add_column(
+            table, sa.Column('priority', sa.Integer(), server_default='3', nullable=False)
+        )
+    op.create_index(
+        'ix_tasks_next_up',
+        'tasks',
+        ['user_id', 'priority', sa.text('due_at IS NULL'), 'due_at'],
+        unique=False,
+        sqlite_where=sa.text("status != 'DONE'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_next_up', table_name='tasks')
+    for table in ('archived_tasks', 'tasks'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('priority')
+            batch_op.drop_column('due_at')
@@ -0,0 +1,34 @@
+"""Add user_activity for the activity leaderboard
+
+Revision ID: c8f2d6a4e1b9
+Revises: b3e7c9a1d5f2
+Create Date: 2026-10-20 11:37:05.318264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f2d6a4e1b9'
+down_revision: Union[str, None] = 'b3e7c9a1d5f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled from task_daily_stats by the next rollup run
+    op.create_table('user_activity',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('activity', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_activity_activity'), 'user_activity', ['activity'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_activity_activity'), table_name='user_activity')
+    op.drop_table('user_activity')
+    op.execute("DELETE FROM rollup_cursors WHERE name = 'user_activity'")
@@ -0,0 +1,43 @@
+"""Add task tags
+
+Revision ID: d7f1b3a9c5e2
+Revises: c4e9a7f2b1d3
+Create Date: 2026-10-19 22:14:53.902617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f1b3a9c5e2'
+down_revision: Union[str, None] = 'c4e9a7f2b1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('tags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('task_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tags_user_id_name', 'tags', ['user_id', 'name'], unique=True)
+    op.create_table('task_tags',
+    sa.Column('tag_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('task_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('tag_id', 'task_id'),
+    sqlite_with_rowid=False
+    )
+    op.create_index('ix_task_tags_task_id', 'task_tags', ['task_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_tags_task_id', table_name='task_tags')
+    op.drop_table('task_tags')
+    op.drop_index('ix_tags_user_id_name', table_name='tags')
+    op.drop_table('tags')
@@ -0,0 +1,68 @@
+"""Add task status history and analytics rollups
+
+Revision ID: d8b3f1e6a2c4
+Revises: c2e9d4a7f6b1
+Create Date: 2026-10-19 18:37:52.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b3f1e6a2c4'
+down_revision: Union[str, None] = 'c2e9d4a7f6b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('rollup_cursors',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('task_daily_stats',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('created', sa.Integer(), nullable=False),
+    sa.Column('started', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    op.create_table('task_duration_histogram',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('metric', sa.String(length=10), nullable=False),
+    sa.Column('bucket', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'metric', 'bucket')
+    )
+    op.create_table('task_status_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('from_status', sa.Enum('TODO', 'IN_PROGRESS', 'DONE', name='taskstatus'), nullable=True),
+    sa.Column('to_status', sa.Enum('TODO', 'IN_PROGRESS', 'DONE', name='taskstatus'), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_index('ix_task_status_events_task_id_id', 'task_status_events', ['task_id', 'id'], unique=False)
+    op.create_index(op.f('ix_task_status_events_user_id'), 'task_status_events', ['user_id'], unique=False)
+    # Existing tasks get their creation, so lead times of their completion can be computed
+    op.execute(
+        "INSERT INTO task_status_events (task_id, user_id, from_status, to_status, occurred_at) "
+        "SELECT id, user_id, NULL, 'TODO', created_at FROM tasks ORDER BY id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_task_status_events_user_id'), table_name='task_status_events')
+    op.drop_index('ix_task_status_events_task_id_id', table_name='task_status_events')
+    op.drop_table('task_status_events')
+    op.drop_table('task_duration_histogram')
+    op.drop_table('task_daily_stats')
+    op.drop_table('rollup_cursors')
@@ -0,0 +1,41 @@
+"""Add task versions for optimistic concurrency
+
+Revision ID: e2a8c6d4f1b7
+Revises: d7f1b3a9c5e2
+Create Date: 2026-10-19 23:12:46.209317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a8c6d4f1b7'
+down_revision: Union[str, None] = 'd7f1b3a9c5e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('tasks', 'archived_tasks'):
+        op.add_column(
+            table, sa.Column('version', sa.Integer(), server_default='1', nullable=False)
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('archived_tasks') as batch_op:
+        batch_op.drop_column('version')
+    # Batch mode cannot reflect the expression index, so it is rebuilt by hand
+    op.drop_index('ix_tasks_next_up', table_name='tasks')
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('version')
+    op.create_index(
+        'ix_tasks_next_up',
+        'tasks',
+        ['user_id', 'priority', sa.text('due_at IS NULL'), 'due_at'],
+        unique=False,
+        sqlite_where=sa.text("status != 'DONE'"),
+    )
@@ -0,0 +1,46 @@
+"""Add user_task_counts for leaderboards
+
+Revision ID: e5a1c8f3b7d2
+Revises: d8b3f1e6a2c4
+Create Date: 2026-10-19 19:52:16.640938
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c8f3b7d2'
+down_revision: Union[str, None] = 'd8b3f1e6a2c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_task_counts',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('open_tasks', sa.Integer(), nullable=False),
+    sa.Column('in_progress_tasks', sa.Integer(), nullable=False),
+    sa.Column('done_tasks', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_task_counts_done_tasks'), 'user_task_counts', ['done_tasks'], unique=False)
+    op.create_index(op.f('ix_user_task_counts_in_progress_tasks'), 'user_task_counts', ['in_progress_tasks'], unique=False)
+    op.create_index(op.f('ix_user_task_counts_open_tasks'), 'user_task_counts', ['open_tasks'], unique=False)
+    op.create_index('ix_task_daily_stats_day', 'task_daily_stats', ['day'], unique=False)
+    op.execute(
+        "INSERT INTO user_task_counts (user_id, open_tasks, in_progress_tasks, done_tasks) "
+        "SELECT user_id, SUM(status != 'DONE'), SUM(status = 'IN_PROGRESS'), SUM(status = 'DONE') "
+        "FROM (SELECT user_id, status FROM tasks UNION ALL SELECT user_id, status FROM archived_tasks) "
+        "GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_daily_stats_day', table_name='task_daily_stats')
+    op.drop_index(op.f('ix_user_task_counts_open_tasks'), table_name='user_task_counts')
+    op.drop_index(op.f('ix_user_task_counts_in_progress_tasks'), table_name='user_task_counts')
+    op.drop_index(op.f('ix_user_task_counts_done_tasks'), table_name='user_task_counts')
+    op.drop_table('user_task_counts')
@@ -0,0 +1,36 @@
+"""Add cache_invalidations log for multi-worker cache coherence
+
+Revision ID: f3c7a9d2e4b8
+Revises: e5a1c8f3b7d2
+Create Date: 2026-10-19 21:14:08.315872
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c7a9d2e4b8'
+down_revision: Union[str, None] = 'e5a1c8f3b7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('cache_invalidations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cache', sa.String(length=20), nullable=False),
+    sa.Column('key', sa.Integer(), nullable=False),
+    sa.Column('origin', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_index(op.f('ix_cache_invalidations_created_at'), 'cache_invalidations', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_cache_invalidations_created_at'), table_name='cache_invalidations')
+    op.drop_table('cache_invalidations')
@@ -0,0 +1,202 @@
+"""
+Execution of ``POST /batch`` requests.
+
+All operations run on the request's session with CRUD commits deferred, so
+the whole batch costs one commit. Non-atomic batches wrap each operation in a
+savepoint that is rolled back if it fails; atomic batches stop at the first
+failure and roll everything back.
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+import pydantic
+from fastapi import status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.database import (
+    attached_sessions,
+    begin_explicit,
+    commit_deferred,
+    release_connections,
+)
+from app.core.sharding import shard_router
+from app.crud import get_task_crud, get_user_crud
+from app.schemas import (
+    BatchOperation,
+    BatchRequest,
+    BatchResult,
+    Task,
+    TaskCreate,
+    TaskStatusUpdate,
+    TaskUpdate,
+    User,
+    UserCreate,
+    UserUpdate,
+)
+from app.utils.exceptions import (
+    ConflictError,
+    DuplicateError,
+    NotFoundError,
+    TaskManagementException,
+    ValidationError,
+)
+
+_Outcome = Tuple[int, Any]
+
+
+def _parse(schema: Type[BaseModel], operation: BatchOperation) -> Any:
+    return schema.model_validate(operation.data)
+
+
+def _require(operation: BatchOperation, field: str) -> int:
+    value: Optional[int] = getattr(operation, field)
+    if value is None:
+        raise ValidationError(f"{operation.op} requires {field}")
+    return value
+
+
+def _dump(schema: Type[BaseModel], obj: Any) -> Any:
+    return jsonable_encoder(schema.model_validate(obj))
+
+
+def _user_create(db: Session, operation: BatchOperation) -> _Outcome:
+    user = get_user_crud(db).create(_parse(UserCreate, operation))
+    return status.HTTP_201_CREATED, _dump(User, user)
+
+
+def _user_update(db: Session, operation: BatchOperation) -> _Outcome:
+    user_id = _require(operation, "user_id")
+    user = get_user_crud(db).update(user_id, _parse(UserUpdate, operation))
+    return status.HTTP_200_OK, _dump(User, user)
+
+
+def _user_delete(db: Session, operation: BatchOperation) -> _Outcome:
+    user_id = _require(operation, "user_id")
+    get_task_crud(db).delete_by_user(user_id)
+    get_user_crud(db).delete(user_id)
+    return status.HTTP_204_NO_CONTENT, None
+
+
+def _task_create(db: Session, operation: BatchOperation) -> _Outcome:
+    user_id = _require(operation, "user_id")
+    task = get_task_crud(db).create(_parse(TaskCreate, operation), user_id)
+    return status.HTTP_201_CREATED, _dump(Task, task)
+
+
+def _task_update(db: Session, operation: BatchOperation) -> _Outcome:
+    task_id = _require(operation, "task_id")
+    task = get_task_crud(db).update(task_id, _parse(TaskUpdate, operation))
+    return status.HTTP_200_OK, _dump(Task, task)
+
+
+def _task_update_status(db: Session, operation: BatchOperation) -> _Outcome:
+    task_id = _require(operation, "task_id")
+    task = get_task_crud(db).update_status(task_id, _parse(TaskStatusUpdate, operation))
+    return status.HTTP_200_OK, _dump(Task, task)
+
+
+def _task_delete(db: Session, operation: BatchOperation) -> _Outcome:
+    get_task_crud(db).delete(_require(operation, "task_id"))
+    return status.HTTP_204_NO_CONTENT, None
+
+
+OPERATIONS: Dict[str, Callable[[Session, BatchOperation], _Outcome]] = {
+    "user.create": _user_create,
+    "user.update": _user_update,
+    "user.delete": _user_delete,
+    "task.create": _task_create,
+    "task.update": _task_update,
+    "task.update_status": _task_update_status,
+    "task.delete": _task_delete,
+}
+
+
+def _error(exc: Exception) -> BatchResult:
+    if isinstance(exc, NotFoundError):
+        code = status.HTTP_404_NOT_FOUND
+    elif isinstance(exc, (ConflictError, DuplicateError, IntegrityError)):
+        code = status.HTTP_409_CONFLICT
+    elif isinstance(exc, ValidationError):
+        code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    elif isinstance(exc, pydantic.ValidationError):
+        return BatchResult(
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            body={"detail": jsonable_encoder(exc.errors(include_url=False))},
+        )
+    else:
+        code = status.HTTP_400_BAD_REQUEST
+    detail = "Conflicting data" if isinstance(exc, IntegrityError) else str(exc)
+    return BatchResult(status=code, body={"detail": detail})
+
+
+def _sessions(db: Session) -> List[Session]:
+    return [db, *attached_sessions(db).values()]
+
+
+@contextmanager
+def _savepoint(db: Session) -> Iterator[None]:
+    nested = [session.begin_nested() for session in _sessions(db)]
+    try:
+        yield
+    except Exception:
+        for transaction in reversed(nested):
+            transaction.rollback()
+        raise
+    for transaction in reversed(nested):
+        transaction.commit()
+
+
+def run_batch(db: Session, request: BatchRequest) -> List[BatchResult]:
+    """
+    Run a batch of operations on ``db`` with a single commit.
+
+    Args:
+        db: Database session of the request
+        request: Operations to run, in order
+
+    Returns:
+        One result per operation. In an atomic batch that failed, the failed
+        operation carries its error and every other one status 424.
+    """
+    token = commit_deferred.set(True)
+    try:
+        if shard_router is not None:
+            # Open every shard session now so savepoints cover all of them
+            for shard in shard_router.engines:
+                shard_router.session(db, shard)
+        for session in _sessions(db):
+            begin_explicit(session)
+
+        results: List[BatchResult] = []
+        for index, operation in enumerate(request.operations):
+            handler = OPERATIONS[operation.op]
+            try:
+                if request.atomic:
+                    code, body = handler(db, operation)
+                else:
+                    with _savepoint(db):
+                        code, body = handler(db, operation)
+            except (TaskManagementException, IntegrityError, pydantic.ValidationError) as e:
+                results.append(_error(e))
+                if request.atomic:
+                    release_connections(db)
+                    skipped = BatchResult(
+                        status=status.HTTP_424_FAILED_DEPENDENCY,
+                        body={"detail": f"Not applied: operation {index} failed"},
+                    )
+                    return [
+                        *(skipped for _ in results[:-1]),
+                        results[-1],
+                        *(skipped for _ in request.operations[index + 1 :]),
+                    ]
+                continue
+            results.append(BatchResult(status=code, body=body))
+    finally:
+        commit_deferred.reset(token)
+
+    for session in _sessions(db):
+        session.commit()
+    return results
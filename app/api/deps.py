@@ -1,13 +1,199 @@
-from fastapi import Depends
+from datetime import date, datetime, timedelta
+from typing import List, Literal, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.profiling import PROFILE_TOKEN_HEADER, request_profiler
 from app.crud import get_task_crud, get_user_crud
+from app.crud.task import TaskCRUD
+from app.crud.task_filter import SORT_FIELDS, TaskFilter
+from app.crud.user import UserCRUD
+from app.models.task import TaskStatus
+from app.schemas.task import TASK_FIELDS
 
 
-def get_user_crud_dep(db: Session = Depends(get_db)):
+def get_user_crud_dep(db: Session = Depends(get_db)) -> UserCRUD:
     return get_user_crud(db)
 
 
-def get_task_crud_dep(db: Session = Depends(get_db)):
+def get_task_crud_dep(db: Session = Depends(get_db)) -> TaskCRUD:
     return get_task_crud(db)
+
+
+def task_fields(
+    fields: Optional[str] = Query(
+        None, description="Comma-separated task fields to return, e.g. id,title,status"
+    )
+) -> Optional[Tuple[str, ...]]:
+    """Parse a sparse fieldset into Task field names in response order."""
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(TASK_FIELDS)
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown task fields: {', '.join(sorted(unknown))}"
+            if unknown
+            else "fields must name at least one task field",
+        )
+    return tuple(name for name in TASK_FIELDS if name in requested)
+
+
+# Related objects a task response can embed with ``include=``
+TASK_INCLUDES = ("owner",)
+
+
+def task_includes(
+    include: Optional[str] = Query(
+        None, description=f"Comma-separated relations to embed: {', '.join(TASK_INCLUDES)}"
+    )
+) -> Tuple[str, ...]:
+    """Parse the relations to embed in task responses."""
+    if include is None:
+        return ()
+    requested = {name.strip() for name in include.split(",") if name.strip()}
+    unknown = requested.difference(TASK_INCLUDES)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown includes: {', '.join(sorted(unknown))}",
+        )
+    return tuple(name for name in TASK_INCLUDES if name in requested)
+
+
+def id_list(
+    ids: Optional[str] = Query(None, description="Comma-separated ids, e.g. 1,2,3")
+) -> Optional[List[int]]:
+    """Parse a multi-get id list, keeping the request order and dropping duplicates."""
+    if ids is None:
+        return None
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers",
+        )
+    parsed = list(dict.fromkeys(parsed))
+    if len(parsed) > settings.MULTI_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MULTI_GET_MAX_IDS} ids can be requested at once",
+        )
+    return parsed
+
+
+def task_filter(
+    status_filter: Optional[str] = Query(
+        None, description="Comma-separated statuses to include, e.g. TODO,IN_PROGRESS"
+    ),
+    created_after: Optional[datetime] = Query(None, description="Created at or after"),
+    created_before: Optional[datetime] = Query(None, description="Created before"),
+    updated_after: Optional[datetime] = Query(None, description="Updated at or after"),
+    updated_before: Optional[datetime] = Query(None, description="Updated before"),
+    title_prefix: Optional[str] = Query(
+        None, min_length=1, max_length=200, description="Case-sensitive title prefix"
+    ),
+    sort: str = Query(
+        "id", description=f"One of {', '.join(SORT_FIELDS)}; prefix with - for descending"
+    ),
+    tags: Optional[str] = Query(
+        None, description="Comma-separated tags the tasks must carry, e.g. urgent,client"
+    ),
+    tag_match: Literal["all", "any"] = Query(
+        "all", description="Whether tasks must carry all of the tags or any of them"
+    ),
+) -> TaskFilter:
+    """Parse task listing filters and sort order."""
+    statuses: Tuple[TaskStatus, ...] = ()
+    if status_filter is not None:
+        try:
+            statuses = tuple(
+                dict.fromkeys(
+                    TaskStatus(value.strip()) for value in status_filter.split(",") if value.strip()
+                )
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"status_filter must list statuses out of "
+                f"{', '.join(member.value for member in TaskStatus)}",
+            )
+    field = sort.removeprefix("-")
+    if field not in SORT_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tasks can only be sorted by {', '.join(SORT_FIELDS)}",
+        )
+    tag_names: Tuple[str, ...] = ()
+    if tags is not None:
+        tag_names = tuple(dict.fromkeys(name.strip() for name in tags.split(",") if name.strip()))
+        if len(tag_names) > settings.TAG_MAX_PER_REQUEST:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {settings.TAG_MAX_PER_REQUEST} tags can be filtered on at once",
+            )
+    return TaskFilter(
+        statuses=statuses,
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before,
+        title_prefix=title_prefix,
+        sort=field,
+        descending=sort.startswith("-"),
+        tags=tag_names,
+        any_tag=tag_match == "any",
+    )
+
+
+def analytics_range(
+    start: Optional[date] = Query(
+        None, description="First day (UTC); defaults to 29 days before end"
+    ),
+    end: Optional[date] = Query(None, description="Last day (UTC), inclusive; defaults to today"),
+) -> Tuple[date, date]:
+    """Parse the day range of an analytics query."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end",
+        )
+    if (end - start).days >= settings.ANALYTICS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.ANALYTICS_MAX_DAYS} days can be requested at once",
+        )
+    return start, end
+
+
+def require_profiling_token(request: Request) -> None:
+    """Require a valid profiling token; without ``PROFILING_SECRET`` nothing is accepted."""
+    if not request_profiler.secret:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling is disabled; PROFILING_SECRET is not set",
+        )
+    if not request_profiler.authorized(request):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"A valid {PROFILE_TOKEN_HEADER} header is required",
+        )
+
+
+def page_size(
+    limit: int = Query(100, ge=0, description="Maximum number of records to return")
+) -> int:
+    """Check a listing's page size against MAX_PAGE_SIZE."""
+    if limit > settings.MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit can be at most {settings.MAX_PAGE_SIZE}",
+        )
+    return limit
@@ -0,0 +1,132 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+The first request carrying a key reserves it, runs the CRUD call and stores the
+serialized response, all in one transaction: a request that fails or dies
+half-way leaves neither its writes nor the key behind, so a retry runs again.
+Retries with the same key replay the stored response without touching the CRUD
+layer again. Concurrent duplicates in this process wait for the first one to
+finish; in other processes they wait on the key row's write lock.
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Type
+
+from fastapi import Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import attached_sessions, commit_deferred, release_connections
+from app.crud import get_idempotency_crud
+from app.models.idempotency import IdempotencyKey
+from app.utils.exceptions import ConflictError, ValidationError
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+_inflight: Dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+
+def idempotency_key_header(
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+) -> Optional[str]:
+    return idempotency_key
+
+
+def request_fingerprint(method: str, path: str, payload: Any) -> str:
+    """Hash the parts of a request that must match for a key to be replayed."""
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{method} {path}\n{body}".encode()).hexdigest()
+
+
+def _acquire(key: str) -> None:
+    """Become the only in-process request working on ``key``."""
+    while True:
+        with _inflight_lock:
+            event = _inflight.get(key)
+            if event is None:
+                _inflight[key] = threading.Event()
+                return
+        if not event.wait(settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS):
+            raise ConflictError(f"A request with Idempotency-Key '{key}' is already in progress")
+
+
+def _release(key: str) -> None:
+    with _inflight_lock:
+        event = _inflight.pop(key)
+    event.set()
+
+
+def run_idempotent(
+    db: Session,
+    key: Optional[str],
+    fingerprint: str,
+    call: Callable[[], Any],
+    response_model: Type[BaseModel],
+    status_code: int,
+) -> Any:
+    """
+    Run ``call`` at most once per idempotency key.
+
+    Args:
+        db: Database session
+        key: Client-supplied Idempotency-Key, or None to run ``call`` directly
+        fingerprint: Request fingerprint from ``request_fingerprint``
+        call: Function performing the CRUD operation
+        response_model: Schema used to serialize the stored response
+        status_code: Status code of a successful response
+
+    Returns:
+        The result of ``call``, or a replayed JSONResponse
+
+    Raises:
+        ValidationError: If the key was used with a different request
+        ConflictError: If the key is still being processed elsewhere
+    """
+    if key is None:
+        return call()
+
+    idempotency_crud = get_idempotency_crud(db)
+    _acquire(key)
+    try:
+        record = idempotency_crud.get(key)
+        if record is None:
+            # The CRUD call only flushes, so its writes commit with the key
+            token = commit_deferred.set(True)
+            try:
+                record = idempotency_crud.reserve(key, fingerprint)
+                if record is not None:
+                    result = call()
+                    body = jsonable_encoder(response_model.model_validate(result))
+                    idempotency_crud.complete(record, status_code, json.dumps(body))
+            except Exception:
+                release_connections(db)
+                raise
+            finally:
+                commit_deferred.reset(token)
+            if record is not None:
+                for session in [db, *attached_sessions(db).values()]:
+                    session.commit()
+                return result
+            # Another process stored the key while this one waited for the lock
+            record = idempotency_crud.get(key)
+        return _replay(record, key, fingerprint)
+    finally:
+        _release(key)
+
+
+def _replay(record: Optional[IdempotencyKey], key: str, fingerprint: str) -> JSONResponse:
+    """The stored response of ``record``, if it was stored for the same request."""
+    if record is None or record.status_code is None or record.response_body is None:
+        raise ConflictError(f"A request with Idempotency-Key '{key}' is already in progress")
+    if record.fingerprint != fingerprint:
+        raise ValidationError(f"Idempotency-Key '{key}' was already used with a different request")
+    return JSONResponse(
+        status_code=record.status_code,
+        content=json.loads(record.response_body),
+        headers={REPLAYED_HEADER: "true"},
+    )
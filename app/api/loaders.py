@@ -0,0 +1,64 @@
+"""
+Per-request loaders that resolve related objects by id in batches.
+
+Embedding the owner of every task in a page would lazy-load one user per task.
+A ``DataLoader`` instead collects the distinct ids of a page, loads the ones it
+has not seen yet in one batched lookup and remembers every result for the rest
+of the request, so each user is read at most once.
+"""
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Sequence, TypeVar
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.api.multi_get import load_cached
+from app.core.cache import user_cache
+from app.core.database import get_db
+from app.crud import get_user_crud
+from app.schemas import Task, TaskWithOwner, User
+
+T = TypeVar("T")
+
+
+class DataLoader(Generic[T]):
+    """Batched lookups by id with an identity cache for one request."""
+
+    def __init__(self, load: Callable[[List[int]], Dict[int, T]]) -> None:
+        self._load = load
+        # None marks ids already looked up that do not exist
+        self._loaded: Dict[int, Optional[T]] = {}
+        self.batches = 0
+
+    def load_many(self, ids: Iterable[int]) -> Dict[int, T]:
+        """Objects of the ``ids`` that exist, loading unseen ids in one batch."""
+        wanted = list(dict.fromkeys(ids))
+        unseen = [id for id in wanted if id not in self._loaded]
+        if unseen:
+            self.batches += 1
+            found = self._load(unseen)
+            for id in unseen:
+                self._loaded[id] = found.get(id)
+        return {id: obj for id in wanted if (obj := self._loaded[id]) is not None}
+
+    def load(self, id: int) -> Optional[T]:
+        return self.load_many([id]).get(id)
+
+
+def owner_loader(db: Session = Depends(get_db)) -> DataLoader[User]:
+    """Loader of task owners, reading through the user read cache."""
+    user_crud = get_user_crud(db)
+    return DataLoader(lambda ids: load_cached(user_cache, ids, user_crud.get_many, User))
+
+
+def with_owners(tasks: Sequence[Task], owners: DataLoader[User]) -> List[TaskWithOwner]:
+    """
+    Embed each task's owner, loading all owners of ``tasks`` in one batch.
+
+    Tasks whose owner no longer exists are left out.
+    """
+    found = owners.load_many(task.user_id for task in tasks)
+    return [
+        TaskWithOwner(**task.model_dump(), owner=found[task.user_id])
+        for task in tasks
+        if task.user_id in found
+    ]
@@ -0,0 +1,58 @@
+"""
+Multi-get support: resolve many ids in one request, serving what it can from
+the read cache.
+"""
+from typing import Any, Callable, Dict, List, Sequence, Type, TypeVar
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.core.cache import ReadCache
+
+MISSING_IDS_HEADER = "X-Missing-Ids"
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def load_cached(
+    cache: ReadCache,
+    ids: Sequence[int],
+    load: Callable[[List[int]], List[Any]],
+    schema: Type[M],
+) -> Dict[int, M]:
+    """Objects of the ``ids`` that exist, from ``cache`` or loaded with ``load``."""
+    found = cache.get_many(ids)
+    misses = [id for id in ids if id not in found]
+    if misses:
+        stamp = cache.stamp()
+        loaded = {row.id: schema.model_validate(row) for row in load(misses)}
+        cache.set_many(loaded, stamp)
+        found.update(loaded)
+    return found
+
+
+def get_many_cached(
+    cache: ReadCache,
+    ids: Sequence[int],
+    load: Callable[[List[int]], List[Any]],
+    schema: Type[M],
+    response: Response,
+) -> List[M]:
+    """
+    Resolve ``ids`` in order from ``cache``, loading the misses with ``load``.
+
+    Args:
+        cache: Read cache holding serialized ``schema`` objects by id
+        ids: Requested ids, without duplicates
+        load: CRUD ``get_many`` returning the rows that exist
+        schema: Response schema the rows are converted to
+        response: Response on which ids that do not exist are reported
+
+    Returns:
+        The found objects in request order
+    """
+    found = load_cached(cache, ids, load, schema)
+    missing = [str(id) for id in ids if id not in found]
+    if missing:
+        response.headers[MISSING_IDS_HEADER] = ",".join(missing)
+    return [found[id] for id in ids if id in found]
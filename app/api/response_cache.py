@@ -0,0 +1,50 @@
+"""
+Serving read endpoints from the per-user response cache.
+"""
+from typing import Callable
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from app.core.cache import ResponseCache
+from app.core.database import pin_primary
+
+CACHE_HEADER = "X-Cache"
+
+
+def cached_response(
+    cache: ResponseCache,
+    owner: int,
+    request: Request,
+    db: Session,
+    render: Callable[[], bytes],
+) -> Response:
+    """
+    Serve a JSON body of ``owner`` from ``cache``, rendering and storing it on a miss.
+
+    The body is keyed by the request path and its query parameters in a
+    canonical order, under ``owner``'s current write generation.
+
+    Args:
+        cache: Response cache invalidated by every write to ``owner``'s data
+        owner: Id of the user the body belongs to
+        request: Request whose path and query parameters identify the body
+        db: Database session ``render`` reads from
+        render: Builds the JSON body; exceptions it raises are not cached
+
+    Returns:
+        The JSON response, with ``X-Cache`` set to ``hit`` or ``miss``
+    """
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    # Taken before rendering: a write committing meanwhile leaves the body
+    # under a generation that is never read again
+    generation = cache.generation(owner)
+    body = cache.get(owner, generation, key)
+    if body is not None:
+        return Response(body, media_type="application/json", headers={CACHE_HEADER: "hit"})
+    if cache.enabled:
+        # A lagging replica could fill the current generation with older rows
+        pin_primary(db)
+    body = render()
+    cache.set(owner, generation, key, body)
+    return Response(body, media_type="application/json", headers={CACHE_HEADER: "miss"})
@@ -0,0 +1,87 @@
+"""
+Server-Sent Events framing for live task event streams.
+
+A stream holds no database connection and no worker thread while idle: it is a
+single coroutine waiting on its subscription queue, woken by new events or by
+the heartbeat timeout that keeps proxies from closing the connection. Changes
+committed by other worker processes are read from the change feed when the
+subscription is told to catch up.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.events import CATCH_UP, Subscription, TaskEvent, broker
+
+RESYNC_EVENT = "resync"
+CHANGES_EVENT = "changes"
+
+
+def format_event(data: Any, event: Optional[str] = None, id: Optional[str] = None) -> str:
+    """Encode one SSE frame."""
+    lines = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def task_event_stream(
+    subscription: Subscription,
+    heartbeat_seconds: float,
+    replay: Optional[Dict[str, Any]] = None,
+    replayed_through: int = -1,
+    position: Optional[str] = None,
+    catch_up: Optional[Callable[[str], Awaitable[Tuple[Dict[str, Any], int]]]] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield SSE frames for a subscription until the client disconnects.
+
+    Args:
+        subscription: Subscription created before ``replay`` was read
+        heartbeat_seconds: Idle time after which a comment frame is sent
+        replay: TaskChanges payload to send first when resuming from Last-Event-ID
+        replayed_through: Change sequence covered by ``replay``; queued events
+            at or below it are skipped
+        position: Sync token from which to catch up; without it, or without
+            ``catch_up``, changes of other processes are not streamed
+        catch_up: Reads the changes since a sync token like ``replay``, along
+            with the change sequence they cover
+
+    Yields:
+        Encoded SSE frames
+    """
+    try:
+        yield ": connected\n\n"
+        if replay is not None:
+            yield format_event(replay, event=CHANGES_EVENT, id=replay["next_token"])
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.get(), heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if item is CATCH_UP:
+                if position is None or catch_up is None:
+                    continue
+                # Events of this process are not tracked in position, so the
+                # changes may repeat some of them; the client applies both alike
+                token = position
+                while True:
+                    changes, covered = await catch_up(token)
+                    token = changes["next_token"]
+                    replayed_through = max(replayed_through, covered)
+                    if changes["changed"] or changes["deleted"] or changes["reset"]:
+                        yield format_event(changes, event=CHANGES_EVENT, id=token)
+                    if not changes["has_more"]:
+                        break
+                position = token
+            elif not isinstance(item, TaskEvent):
+                # RESYNC; no id: the client keeps its last id and resyncs from there
+                yield format_event({"reason": "overflow"}, event=RESYNC_EVENT)
+            elif item.seq > replayed_through:
+                yield format_event(item.data, event=item.type, id=item.id)
+    finally:
+        broker.unsubscribe(subscription)
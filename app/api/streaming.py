@@ -0,0 +1,47 @@
+"""
+Streaming large JSON list responses in constant memory.
+"""
+import itertools
+from typing import Any, Callable, Iterable, Iterator, List
+
+from fastapi.responses import StreamingResponse
+
+
+def json_array_chunks(
+    rows: Iterable[Any], serialize: Callable[[List[Any]], bytes], batch_size: int
+) -> Iterator[bytes]:
+    """
+    Serialize ``rows`` as one JSON array, ``batch_size`` rows at a time.
+
+    Only one batch of rows and its serialized chunk are held at once, so
+    memory stays flat however many rows ``rows`` yields.
+
+    Args:
+        rows: ORM objects or rows, ideally read from the database in batches
+        serialize: Dumps a list of rows as a JSON array, e.g.
+            ``TrustedSerializer.dump_json``
+        batch_size: Rows serialized per chunk
+
+    Yields:
+        Chunks whose concatenation is the same JSON the whole list dumps to
+    """
+    rows = iter(rows)
+    separator = b"["
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        body = serialize(batch)
+        # Drop the brackets of the batch's own array
+        yield separator + body[1:-1]
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def streamed_json_array(
+    rows: Iterable[Any], serialize: Callable[[List[Any]], bytes], batch_size: int
+) -> StreamingResponse:
+    """A chunked ``application/json`` response of ``rows`` (see ``json_array_chunks``)."""
+    return StreamingResponse(
+        json_array_chunks(rows, serialize, batch_size), media_type="application/json"
+    )
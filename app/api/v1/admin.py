@@ -0,0 +1,108 @@
+"""
+app/api/v1/admin.py
+Admin API endpoints.
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, require_profiling_token
+from app.core.profiling import PROFILE_FORMATS, request_profiler
+from app.crud import get_task_analytics_crud, get_user_crud
+from app.crud.analytics import ACTIVITY_WINDOW_DAYS
+from app.schemas import Leaderboard, LeaderboardEntry, RequestProfile
+from app.schemas.analytics import LeaderboardMetric
+from app.schemas.profiling import ProfileFormat
+
+router = APIRouter()
+
+
+@router.get("/leaderboard", response_model=Leaderboard)
+def get_leaderboard(
+    by: LeaderboardMetric = "open",
+    limit: int = Query(10, ge=1, le=100),
+    days: int = Query(
+        ACTIVITY_WINDOW_DAYS, ge=1, le=366, description="Window of by=active, in days"
+    ),
+    db: Session = Depends(get_db),
+) -> Leaderboard:
+    """
+    Get the users with the most open, in-progress or completed tasks, or the
+    most task activity in the last ``days`` days.
+
+    Counts are maintained per user on every task write and read from an
+    index, so the cost grows with ``limit``, not with the number of users.
+    Activity comes from the status history rollups and trails the last
+    rollup run; the default window is read from an index too.
+
+    Args:
+        by: open, in_progress, completed or active
+        limit: Number of users to return
+        days: Window of the activity leaderboard, ending today
+        db: Database session
+
+    Returns:
+        Users in descending order of the count
+    """
+    analytics = get_task_analytics_crud(db)
+    if by == "active":
+        top = analytics.most_active_users(days, limit)
+    else:
+        top = analytics.top_users(by, limit)
+    users = get_user_crud(db).get_many([entry.user_id for entry in top])
+    names = {user.id: user.name for user in users}
+    return Leaderboard(
+        by=by,
+        entries=[
+            LeaderboardEntry(user_id=entry.user_id, name=names[entry.user_id], count=entry.count)
+            for entry in top
+            # A user deleted between the two reads is left out
+            if entry.user_id in names
+        ],
+    )
+
+
+@router.get(
+    "/profiles",
+    response_model=List[RequestProfile],
+    dependencies=[Depends(require_profiling_token)],
+)
+def list_profiles() -> List[RequestProfile]:
+    """
+    List the stored request profiles, newest first.
+
+    Requests are profiled when they carry a valid ``X-Profile-Token`` header
+    or ``profile_token`` query parameter, or fall in the sampled fraction of
+    traffic; their responses name the profile in ``X-Profile-Id``.
+
+    Returns:
+        Summaries of the stored profiles
+    """
+    return [RequestProfile(**profile) for profile in request_profiler.store.list()]
+
+
+@router.get(
+    "/profiles/{profile_id}/{fmt}",
+    response_class=FileResponse,
+    dependencies=[Depends(require_profiling_token)],
+)
+def download_profile(profile_id: str, fmt: ProfileFormat) -> FileResponse:
+    """
+    Download a stored request profile.
+
+    Args:
+        profile_id: Profile ID, as listed or returned in ``X-Profile-Id``
+        fmt: collapsed (stacks for flamegraph.pl or speedscope), pstats or json
+
+    Returns:
+        The profile file
+
+    Raises:
+        HTTPException: If the profile does not exist or was pruned
+    """
+    path = request_profiler.store.path(profile_id, fmt)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type=PROFILE_FORMATS[fmt], filename=f"{profile_id}.{fmt}")
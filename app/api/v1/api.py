@@ -3,10 +3,18 @@ API v1 router aggregation.
 """
 from fastapi import APIRouter
 
-from app.api.v1 import tasks, users
+from app.api.v1 import admin, analytics, batch, tags, tasks, users
 
 api_router = APIRouter()
 
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 
 api_router.include_router(tasks.router, tags=["tasks"])
+
+api_router.include_router(tags.router, tags=["tags"])
+
+api_router.include_router(batch.router, tags=["batch"])
+
+api_router.include_router(analytics.router, tags=["analytics"])
+
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,30 @@
+"""
+app/api/v1/batch.py
+Batch API endpoint.
+"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api.batch import run_batch
+from app.api.deps import get_db
+from app.schemas import BatchRequest, BatchResponse
+
+router = APIRouter()
+
+
+@router.post("/batch", response_model=BatchResponse)
+def batch(request: BatchRequest, db: Session = Depends(get_db)) -> BatchResponse:
+    """
+    Run many user and task operations in one request and one transaction.
+
+    Operations run in order. Unless ``atomic`` is set, a failed operation is
+    rolled back on its own and the rest still apply.
+
+    Args:
+        request: Ordered operations and the atomic flag
+        db: Database session
+
+    Returns:
+        Status code and body of each operation, in request order
+    """
+    return BatchResponse(results=run_batch(db, request))
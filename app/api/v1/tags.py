@@ -0,0 +1,103 @@
+"""
+app/api/v1/tags.py
+Task tag endpoints.
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.api.response_cache import cached_response
+from app.core.cache import task_list_cache
+from app.crud import get_task_crud
+from app.schemas import Tag, TagAssignment, TagAssignmentResult
+from app.utils.exceptions import NotFoundError
+
+router = APIRouter()
+
+_tag_list = TypeAdapter(List[Tag])
+
+
+@router.get("/users/{user_id}/tags", response_model=List[Tag])
+def get_user_tags(user_id: int, request: Request, db: Session = Depends(get_db)) -> Response:
+    """
+    Get a user's tags with the number of tasks carrying each, for a tag cloud.
+
+    The counts are maintained by every tag assignment and task delete, so
+    no tasks are counted here.
+
+    Args:
+        user_id: User ID
+        request: Request, whose query parameters key the cached tags
+        db: Database session
+
+    Returns:
+        Tags, those on the most tasks first
+    """
+
+    def render() -> bytes:
+        return _tag_list.dump_json(
+            [Tag.model_validate(tag) for tag in get_task_crud(db).get_tags(user_id)]
+        )
+
+    return cached_response(task_list_cache, user_id, request, db, render)
+
+
+@router.post("/users/{user_id}/tags/assign", response_model=TagAssignmentResult)
+def assign_tags(
+    user_id: int, assignment: TagAssignment, db: Session = Depends(get_db)
+) -> TagAssignmentResult:
+    """
+    Add tags to many of a user's tasks in one transaction.
+
+    Tags the user does not have yet are created.
+
+    Args:
+        user_id: User ID
+        assignment: Tasks, up to TAG_BATCH_MAX_TASKS, and the tags to add to each
+        db: Database session
+
+    Returns:
+        Number of task-tag pairs added and the tags with their new counts
+
+    Raises:
+        HTTPException: If any of the tasks is not one of the user's
+    """
+    try:
+        result = get_task_crud(db).tag_tasks(user_id, assignment.task_ids, assignment.tags)
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return TagAssignmentResult(
+        changed=result.changed, tags=[Tag.model_validate(tag) for tag in result.tags]
+    )
+
+
+@router.post("/users/{user_id}/tags/unassign", response_model=TagAssignmentResult)
+def unassign_tags(
+    user_id: int, assignment: TagAssignment, db: Session = Depends(get_db)
+) -> TagAssignmentResult:
+    """
+    Remove tags from many of a user's tasks in one transaction.
+
+    Tags the user does not have are ignored; tags left on no task are kept.
+
+    Args:
+        user_id: User ID
+        assignment: Tasks, up to TAG_BATCH_MAX_TASKS, and the tags to remove from each
+        db: Database session
+
+    Returns:
+        Number of task-tag pairs removed and the tags with their new counts
+
+    Raises:
+        HTTPException: If any of the tasks is not one of the user's
+    """
+    try:
+        result = get_task_crud(db).untag_tasks(user_id, assignment.task_ids, assignment.tags)
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return TagAssignmentResult(
+        changed=result.changed, tags=[Tag.model_validate(tag) for tag in result.tags]
+    )
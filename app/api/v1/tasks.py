@@ -2,93 +2,371 @@
 app/api/v1/tasks/py
 Task API endpoints.
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional
-from app.api.deps import get_db
+
+from app.api.deps import get_db, id_list, page_size, task_fields, task_filter, task_includes
+from app.api.idempotency import idempotency_key_header, request_fingerprint, run_idempotent
+from app.api.loaders import DataLoader, owner_loader, with_owners
+from app.api.multi_get import get_many_cached
+from app.api.response_cache import cached_response
+from app.api.sse import task_event_stream
+from app.api.streaming import streamed_json_array
+from app.core.cache import task_cache, task_list_cache
+from app.core.config import settings
+from app.core.database import SessionLocal, attached_sessions, pin_primary
+from app.core.events import broker
 from app.crud import get_task_crud
+from app.crud.task_filter import TaskFilter
 from app.models.task import TaskStatus
-from app.schemas import Task, TaskCreate, TaskUpdate, TaskStatusUpdate
-from app.utils.exceptions import NotFoundError
+from app.schemas import (
+    Task,
+    TaskChanges,
+    TaskCreate,
+    TaskStatusUpdate,
+    TaskUpdate,
+    TaskWithOwner,
+    User,
+)
+from app.schemas.task import TASK_FIELDS, naive_utc, task_serializer
+from app.utils.exceptions import ConflictError, NotFoundError, ValidationError
+from app.utils.sync_token import decode_sync_token
 
 router = APIRouter()
 
+T = TypeVar("T")
+
 
 @router.post("/users/{user_id}/tasks/", response_model=Task, status_code=status.HTTP_201_CREATED)
 def create_task(
     user_id: int,
     task_data: TaskCreate,
-    db: Session = Depends(get_db)
-) -> Task:
+    idempotency_key: Optional[str] = Depends(idempotency_key_header),
+    db: Session = Depends(get_db),
+) -> Any:
     """
     Create a new task for a user.
-    
+
     Args:
         user_id: User ID
         task_data: Task creation data
+        idempotency_key: Optional Idempotency-Key header for safe retries
         db: Database session
-        
+
     Returns:
-        Created task
-        
+        Created task, or the stored response of an earlier request with the same key
+
     Raises:
-        HTTPException: If user not found
+        HTTPException: If user not found or the idempotency key cannot be used
     """
     try:
         task_crud = get_task_crud(db)
-        return task_crud.create(task_data, user_id)
-    except NotFoundError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
+        return run_idempotent(
+            db,
+            idempotency_key,
+            request_fingerprint("POST", f"/users/{user_id}/tasks/", task_data),
+            lambda: task_crud.create(task_data, user_id),
+            response_model=Task,
+            status_code=status.HTTP_201_CREATED,
         )
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
 
 
 @router.get("/users/{user_id}/tasks/", response_model=List[Task])
 def get_user_tasks(
     user_id: int,
+    request: Request,
     skip: int = 0,
-    limit: int = 100,
-    status_filter: Optional[TaskStatus] = None,
-    db: Session = Depends(get_db)
-) -> List[Task]:
+    limit: int = Depends(page_size),
+    filters: TaskFilter = Depends(task_filter),
+    include_archived: bool = False,
+    fields: Optional[Tuple[str, ...]] = Depends(task_fields),
+    db: Session = Depends(get_db),
+) -> Response:
     """
-    Get all tasks for a user with optional status filtering.
-    
+    Get a page of a user's tasks, optionally filtered and sorted.
+
+    Pages are served from the response cache until the user's tasks change.
+    Pages larger than STREAM_PAGE_SIZE are not cached; they are read and
+    serialized in batches while the response is sent.
+
     Args:
         user_id: User ID
+        request: Request, whose query parameters key the cached page
         skip: Number of records to skip
-        limit: Maximum number of records to return
-        status_filter: Optional status filter
+        limit: Maximum number of records to return, up to MAX_PAGE_SIZE
+        filters: Statuses, time ranges, title prefix, tags and sort order
+        include_archived: Also return archived DONE tasks
+        fields: Optional sparse fieldset; only these columns are selected and returned
         db: Database session
-        
+
     Returns:
         List of tasks
+
+    Raises:
+        HTTPException: If the sort would need to order too many rows without an index
+    """
+    # Rows come straight from the database, so they are serialized unvalidated
+    serializer = task_serializer(fields or TASK_FIELDS)
+
+    def tasks(yield_per: Optional[int] = None) -> Iterable[Any]:
+        task_crud = get_task_crud(db)
+        try:
+            return task_crud.list_by_user(
+                user_id,
+                filters,
+                skip=skip,
+                limit=limit,
+                include_archived=include_archived,
+                columns=fields,
+                yield_per=yield_per,
+            )
+        except ValidationError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    def render() -> bytes:
+        return serializer.dump_json(tasks())
+
+    if limit > settings.STREAM_PAGE_SIZE:
+        batch_size = settings.STREAM_PAGE_SIZE
+        return streamed_json_array(tasks(yield_per=batch_size), serializer.dump_json, batch_size)
+    return cached_response(task_list_cache, user_id, request, db, render)
+
+
+@router.get("/users/{user_id}/tasks/next", response_model=List[Task])
+def get_next_tasks(
+    user_id: int, request: Request, n: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)
+) -> Response:
+    """
+    Get a user's next tasks to work on.
+
+    Open tasks come most urgent priority first, then by due date with undated
+    tasks last. They are read in that order from the ix_tasks_next_up index,
+    so the cost depends on ``n`` and not on the size of the user's backlog.
+
+    Args:
+        user_id: User ID
+        request: Request, whose query parameters key the cached queue
+        n: Number of tasks to return
+        db: Database session
+
+    Returns:
+        Up to ``n`` open tasks
+    """
+
+    def render() -> bytes:
+        return task_serializer(TASK_FIELDS).dump_json(get_task_crud(db).next_up(user_id, n))
+
+    return cached_response(task_list_cache, user_id, request, db, render)
+
+
+@router.get("/users/{user_id}/tasks/overdue")
+def get_overdue_task_count(
+    user_id: int, as_of: Optional[datetime] = None, db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Count a user's open tasks past their due date.
+
+    Not cached, since the count changes as time passes.
+
+    Args:
+        user_id: User ID
+        as_of: Count tasks due before this time instead of now
+        db: Database session
+
+    Returns:
+        The number of overdue tasks and the time they were counted as of
+    """
+    as_of = naive_utc(as_of) or datetime.utcnow()
+    return {
+        "user_id": user_id,
+        "as_of": as_of.isoformat(),
+        "overdue_tasks": get_task_crud(db).count_overdue(user_id, as_of),
+    }
+
+
+@router.get("/users/{user_id}/tasks/sync", response_model=TaskChanges)
+def sync_user_tasks(
+    user_id: int,
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """
+    Get a user's tasks created, updated or deleted since a sync token.
+
+    Args:
+        user_id: User ID
+        since: Opaque ``next_token`` from the previous sync; omit for a full sync
+        limit: Maximum number of changes to return
+        db: Database session
+
+    Returns:
+        Changed tasks, deleted task ids and the token to continue from
+
+    Raises:
+        HTTPException: If the sync token is malformed
+    """
+    try:
+        task_crud = get_task_crud(db)
+        return task_crud.get_changes(user_id, since, limit=limit)._asdict()
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _read_for_stream(read: Callable[[Session], T]) -> T:
+    """Run ``read`` on a session of its own, on the primary."""
+    # The stream outlives the request, so it reads on sessions of its own that
+    # are closed before the next frame is sent. Streams follow commits they were
+    # told about, which a replica may not have applied yet
+    db = SessionLocal()
+    pin_primary(db)
+    try:
+        return read(db)
+    finally:
+        for attached in attached_sessions(db).values():
+            attached.close()
+        db.close()
+
+
+def _replay_changes(user_id: int, token: str) -> Tuple[Dict[str, Any], int]:
+    """Read the changes since ``token`` as a TaskChanges payload and the sequence it covers."""
+    batch = _read_for_stream(
+        lambda db: get_task_crud(db).get_changes(user_id, token, limit=settings.SSE_REPLAY_LIMIT)
+    )
+    replay = TaskChanges.model_validate(batch._asdict()).model_dump(mode="json")
+    return replay, decode_sync_token(batch.next_token)[1]
+
+
+def _change_feed_head(user_id: int) -> str:
+    """Sync token at the newest change, from which a new stream catches up."""
+    return _read_for_stream(lambda db: get_task_crud(db).get_change_token(user_id))
+
+
+@router.get("/users/{user_id}/tasks/events", response_class=StreamingResponse)
+async def stream_user_task_events(
+    user_id: int,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    Stream a user's task changes as Server-Sent Events.
+
+    Events are ``task.created``, ``task.updated`` and ``task.deleted``; their
+    ids are sync tokens. On reconnect with ``Last-Event-ID`` the missed changes
+    are sent first as one ``changes`` event shaped like the sync endpoint's
+    response. Changes made by other worker processes arrive as ``changes``
+    events as well, about one ``CACHE_SYNC_INTERVAL_SECONDS`` later. A
+    ``resync`` event means events were dropped because the client fell behind,
+    and it should catch up through the sync endpoint.
+
+    Args:
+        user_id: User ID
+        last_event_id: Id of the last event the client received
+
+    Returns:
+        A ``text/event-stream`` response
+
+    Raises:
+        HTTPException: If Last-Event-ID is not a valid sync token
     """
+    # Subscribe before reading the backlog so nothing falls between the two
+    subscription = broker.subscribe(user_id, settings.SSE_QUEUE_SIZE)
+    replay: Optional[Dict[str, Any]] = None
+    replayed_through = -1
+    if last_event_id is not None:
+        try:
+            replay, replayed_through = await run_in_threadpool(
+                _replay_changes, user_id, last_event_id
+            )
+        except ValidationError as e:
+            broker.unsubscribe(subscription)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # Other workers' changes are only announced while workers sync through the log
+    position: Optional[str] = None
+    if replay is not None:
+        position = replay["next_token"]
+    elif settings.CACHE_SYNC_INTERVAL_SECONDS > 0:
+        position = await run_in_threadpool(_change_feed_head, user_id)
+
+    async def catch_up(token: str) -> Tuple[Dict[str, Any], int]:
+        return await run_in_threadpool(_replay_changes, user_id, token)
+
+    return StreamingResponse(
+        task_event_stream(
+            subscription,
+            settings.SSE_HEARTBEAT_SECONDS,
+            replay,
+            replayed_through,
+            position=position,
+            catch_up=catch_up,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/tasks/", response_model=List[Union[TaskWithOwner, Task]])
+def get_tasks(
+    response: Response,
+    ids: Optional[List[int]] = Depends(id_list),
+    include: Tuple[str, ...] = Depends(task_includes),
+    owners: DataLoader[User] = Depends(owner_loader),
+    db: Session = Depends(get_db),
+) -> Sequence[Task]:
+    """
+    Get many tasks by id in one request.
+
+    Args:
+        response: Response; ids that do not exist are listed in ``X-Missing-Ids``
+        ids: Comma-separated task ids
+        include: ``owner`` embeds each task's owner, loaded in one batch
+        owners: Per-request loader of task owners
+        db: Database session
+
+    Returns:
+        The tasks that exist, in the requested order
+
+    Raises:
+        HTTPException: If no ids are given
+    """
+    if ids is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids is required")
     task_crud = get_task_crud(db)
-    
-    if status_filter:
-        return task_crud.get_by_status(user_id, status_filter)
-    else:
-        return task_crud.get_by_user_id(user_id, skip=skip, limit=limit)
+    tasks = get_many_cached(task_cache, ids, task_crud.get_many, Task, response)
+    if "owner" in include:
+        return with_owners(tasks, owners)
+    return tasks
 
 
-@router.get("/tasks/{task_id}", response_model=Task)
+@router.get("/tasks/{task_id}", response_model=Union[TaskWithOwner, Task])
 def get_task(
     task_id: int,
-    db: Session = Depends(get_db)
+    include: Tuple[str, ...] = Depends(task_includes),
+    owners: DataLoader[User] = Depends(owner_loader),
+    db: Session = Depends(get_db),
 ) -> Task:
     """
     Get task by ID.
-    
+
     Args:
         task_id: Task ID
+        include: ``owner`` embeds the task's owner
+        owners: Per-request loader of task owners
         db: Database session
-        
+
     Returns:
         Task data
-        
+
     Raises:
         HTTPException: If task not found
     """
@@ -96,84 +374,84 @@ def get_task(
     task = task_crud.get_by_id(task_id)
     if not task:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Task with id {task_id} not found"
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Task with id {task_id} not found"
         )
-    return task
+    # A schema instance, so the ORM owner relationship is never lazy-loaded
+    result = Task.model_validate(task)
+    if "owner" in include:
+        embedded = with_owners([result], owners)
+        if not embedded:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail=f"Owner of task {task_id} not found"
+            )
+        return embedded[0]
+    return result
 
 
 @router.put("/tasks/{task_id}", response_model=Task)
-def update_task(
-    task_id: int,
-    task_data: TaskUpdate,
-    db: Session = Depends(get_db)
-) -> Task:
+def update_task(task_id: int, task_data: TaskUpdate, db: Session = Depends(get_db)) -> Task:
     """
     Update an existing task.
-    
+
+    With expected_version, the update is only applied if nobody else changed
+    the task since the client read that version; otherwise 409 is returned.
+
     Args:
         task_id: Task ID
         task_data: Task update data
         db: Database session
-        
+
     Returns:
         Updated task
-        
+
     Raises:
-        HTTPException: If task not found
+        HTTPException: If task not found, or not at the expected_version given
     """
     try:
         task_crud = get_task_crud(db)
         return task_crud.update(task_id, task_data)
     except NotFoundError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
 @router.patch("/tasks/{task_id}/status", response_model=Task)
 def update_task_status(
-    task_id: int,
-    status_data: TaskStatusUpdate,
-    db: Session = Depends(get_db)
+    task_id: int, status_data: TaskStatusUpdate, db: Session = Depends(get_db)
 ) -> Task:
     """
     Update task status.
-    
+
     Args:
         task_id: Task ID
         status_data: Status update data
         db: Database session
-        
+
     Returns:
         Updated task
-        
+
     Raises:
-        HTTPException: If task not found
+        HTTPException: If task not found, or not at the expected_version given
     """
     try:
         task_crud = get_task_crud(db)
         return task_crud.update_status(task_id, status_data)
     except NotFoundError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
 @router.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
-    task_id: int,
-    db: Session = Depends(get_db)
-) -> None:
+def delete_task(task_id: int, db: Session = Depends(get_db)) -> None:
     """
     Delete a task.
-    
+
     Args:
         task_id: Task ID
         db: Database session
-        
+
     Raises:
         HTTPException: If task not found
     """
@@ -181,39 +459,49 @@ def delete_task(
         task_crud = get_task_crud(db)
         task_crud.delete(task_id)
     except NotFoundError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @router.get("/users/{user_id}/tasks/stats")
 def get_user_task_stats(
-    user_id: int,
-    db: Session = Depends(get_db)
-) -> dict:
+    user_id: int, request: Request, include_archived: bool = False, db: Session = Depends(get_db)
+) -> Response:
     """
     Get task statistics for a user.
-    
+
     Args:
         user_id: User ID
+        request: Request, whose query parameters key the cached statistics
+        include_archived: Count archived DONE tasks as well
         db: Database session
-        
+
     Returns:
         Task statistics
     """
-    task_crud = get_task_crud(db)
-    
-    total_tasks = task_crud.count_by_user(user_id)
-    todo_tasks = task_crud.count_by_status(user_id, TaskStatus.TODO)
-    in_progress_tasks = task_crud.count_by_status(user_id, TaskStatus.IN_PROGRESS)
-    done_tasks = task_crud.count_by_status(user_id, TaskStatus.DONE)
-    
-    return {
-        "user_id": user_id,
-        "total_tasks": total_tasks,
-        "todo_tasks": todo_tasks,
-        "in_progress_tasks": in_progress_tasks,
-        "done_tasks": done_tasks,
-        "completion_rate": round((done_tasks / total_tasks * 100) if total_tasks > 0 else 0, 2)
-    }
\ No newline at end of file
+
+    def render() -> bytes:
+        task_crud = get_task_crud(db)
+
+        total_tasks = task_crud.count_by_user(user_id)
+        todo_tasks = task_crud.count_by_status(user_id, TaskStatus.TODO)
+        in_progress_tasks = task_crud.count_by_status(user_id, TaskStatus.IN_PROGRESS)
+        done_tasks = task_crud.count_by_status(user_id, TaskStatus.DONE)
+        if include_archived:
+            archived_tasks = task_crud.count_archived(user_id)
+            total_tasks += archived_tasks
+            done_tasks += archived_tasks
+
+        return JSONResponse(
+            {
+                "user_id": user_id,
+                "total_tasks": total_tasks,
+                "todo_tasks": todo_tasks,
+                "in_progress_tasks": in_progress_tasks,
+                "done_tasks": done_tasks,
+                "completion_rate": round(
+                    (done_tasks / total_tasks * 100) if total_tasks > 0 else 0, 2
+                ),
+            }
+        ).body
+
+    return cached_response(task_list_cache, user_id, request, db, render)
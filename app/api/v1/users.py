@@ -2,14 +2,21 @@
 app/api/v1/users.py
 User API endpoints.
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, List, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
-from app.crud import get_user_crud
-from app.schemas import User, UserCreate, UserUpdate, UserWithTasks
-from app.utils.exceptions import DuplicateError, NotFoundError
+from app.api.deps import get_db, id_list, page_size
+from app.api.idempotency import idempotency_key_header, request_fingerprint, run_idempotent
+from app.api.multi_get import get_many_cached
+from app.api.streaming import streamed_json_array
+from app.core.cache import user_cache
+from app.core.config import settings
+from app.crud import get_task_crud, get_user_crud
+from app.schemas import User, UserBulkResult, UserBulkUpsert, UserCreate, UserUpdate, UserWithTasks
+from app.schemas.user import user_serializer
+from app.utils.exceptions import ConflictError, DuplicateError, NotFoundError, ValidationError
 
 router = APIRouter()
 
@@ -17,67 +24,109 @@ router = APIRouter()
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
 def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
-) -> User:
+    idempotency_key: Optional[str] = Depends(idempotency_key_header),
+    db: Session = Depends(get_db),
+) -> Any:
     """
     Create a new user.
-    
+
     Args:
         user_data: User creation data
+        idempotency_key: Optional Idempotency-Key header for safe retries
         db: Database session
-        
+
     Returns:
-        Created user
-        
+        Created user, or the stored response of an earlier request with the same key
+
     Raises:
-        HTTPException: If user with email already exists
+        HTTPException: If user with email already exists or the idempotency key cannot be used
     """
     try:
         user_crud = get_user_crud(db)
-        return user_crud.create(user_data)
-    except DuplicateError as e:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=str(e)
+        return run_idempotent(
+            db,
+            idempotency_key,
+            request_fingerprint("POST", "/users/", user_data),
+            lambda: user_crud.create(user_data),
+            response_model=User,
+            status_code=status.HTTP_201_CREATED,
         )
+    except (DuplicateError, ConflictError) as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
+@router.post("/bulk", response_model=UserBulkResult)
+def bulk_upsert_users(batch: UserBulkUpsert, db: Session = Depends(get_db)) -> UserBulkResult:
+    """
+    Create or update many users in one transaction, matching them by email.
+
+    Emails match regardless of case: an existing user gets the name and email
+    of the batch entry, and users already up to date are left alone. When an
+    email appears more than once in the batch, the last entry wins.
+
+    Args:
+        batch: Users to provision, up to USER_BULK_MAX_USERS
+        db: Database session
+
+    Returns:
+        How many users were created, updated and left unchanged
+    """
+    result = get_user_crud(db).bulk_upsert(batch.users)
+    return UserBulkResult(**result._asdict())
 
 
 @router.get("/", response_model=List[User])
 def get_users(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
-) -> List[User]:
+    limit: int = Depends(page_size),
+    ids: Optional[List[int]] = Depends(id_list),
+    db: Session = Depends(get_db),
+) -> Union[List[User], Response]:
     """
-    Get all users with pagination.
-    
+    Get all users with pagination, or specific users by id.
+
+    Pages larger than STREAM_PAGE_SIZE are read and serialized in batches
+    while the response is sent.
+
     Args:
+        response: Response; with ``ids``, missing ones are listed in ``X-Missing-Ids``
         skip: Number of records to skip
-        limit: Maximum number of records to return
+        limit: Maximum number of records to return, up to MAX_PAGE_SIZE
+        ids: Optional comma-separated user ids; overrides pagination
         db: Database session
-        
+
     Returns:
         List of users
     """
     user_crud = get_user_crud(db)
-    return user_crud.get_all(skip=skip, limit=limit)
+    if ids is not None:
+        return get_many_cached(user_cache, ids, user_crud.get_many, User, response)
+    if limit > settings.STREAM_PAGE_SIZE:
+        batch_size = settings.STREAM_PAGE_SIZE
+        users = user_crud.get_all(skip=skip, limit=limit, yield_per=batch_size)
+        return streamed_json_array(users, user_serializer.dump_json, batch_size)
+    # Rows come straight from the database, so they are serialized unvalidated
+    return Response(
+        user_serializer.dump_json(user_crud.get_all(skip=skip, limit=limit)),
+        media_type="application/json",
+    )
 
 
 @router.get("/{user_id}", response_model=User)
-def get_user(
-    user_id: int,
-    db: Session = Depends(get_db)
-) -> User:
+def get_user(user_id: int, db: Session = Depends(get_db)) -> User:
     """
     Get user by ID.
-    
+
     Args:
         user_id: User ID
         db: Database session
-        
+
     Returns:
         User data
-        
+
     Raises:
         HTTPException: If user not found
     """
@@ -85,27 +134,23 @@ def get_user(
     user = user_crud.get_by_id(user_id)
     if not user:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"User with id {user_id} not found"
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id {user_id} not found"
         )
     return user
 
 
 @router.get("/{user_id}/with-tasks", response_model=UserWithTasks)
-def get_user_with_tasks(
-    user_id: int,
-    db: Session = Depends(get_db)
-) -> UserWithTasks:
+def get_user_with_tasks(user_id: int, db: Session = Depends(get_db)) -> UserWithTasks:
     """
     Get user by ID with their tasks.
-    
+
     Args:
         user_id: User ID
         db: Database session
-        
+
     Returns:
         User data with tasks
-        
+
     Raises:
         HTTPException: If user not found
     """
@@ -113,29 +158,31 @@ def get_user_with_tasks(
     user = user_crud.get_by_id(user_id)
     if not user:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"User with id {user_id} not found"
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id {user_id} not found"
+        )
+    task_crud = get_task_crud(db)
+    if task_crud.shards is not None:
+        # user.tasks only sees the primary database
+        return UserWithTasks(
+            **User.model_validate(user).model_dump(),
+            tasks=task_crud.get_by_user_id(user_id, limit=None),
         )
     return user
 
 
 @router.put("/{user_id}", response_model=User)
-def update_user(
-    user_id: int,
-    user_data: UserUpdate,
-    db: Session = Depends(get_db)
-) -> User:
+def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_db)) -> User:
     """
     Update an existing user.
-    
+
     Args:
         user_id: User ID
         user_data: User update data
         db: Database session
-        
+
     Returns:
         Updated user
-        
+
     Raises:
         HTTPException: If user not found or email already exists
     """
@@ -143,37 +190,26 @@ def update_user(
         user_crud = get_user_crud(db)
         return user_crud.update(user_id, user_data)
     except NotFoundError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except DuplicateError as e:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=str(e)
-        )
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
-    user_id: int,
-    db: Session = Depends(get_db)
-) -> None:
+def delete_user(user_id: int, db: Session = Depends(get_db)) -> None:
     """
     Delete a user.
-    
+
     Args:
         user_id: User ID
         db: Database session
-        
+
     Raises:
         HTTPException: If user not found
     """
     try:
         user_crud = get_user_crud(db)
+        get_task_crud(db).delete_by_user(user_id)
         user_crud.delete(user_id)
     except NotFoundError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
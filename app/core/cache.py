@@ -0,0 +1,281 @@
+"""
+In-process caches shared by all requests of a worker.
+
+``ReadCache`` holds single rows. Entries are evicted least-recently-used beyond
+``max_entries`` and expire after ``ttl_seconds``. Writers invalidate keys
+through ``invalidate_on_commit``: once right away and again after their
+transaction commits.
+
+A reader that loaded a row before a concurrent write committed must not put
+that stale row back. Readers take a ``stamp()`` before querying and pass it to
+``set_many``; keys invalidated after the stamp are not stored.
+
+``ResponseCache`` holds whole response bodies of an owner (a user), bounded by
+their total size. Every body is stored under the owner's write generation at
+the time the request started; invalidating an owner moves it to a new
+generation, so its old bodies are never read again and age out of the LRU.
+
+Caches are per process. ``invalidate_on_commit`` also logs the keys in
+``cache_invalidations``, in the writer's transaction, and ``app.core.cache_sync``
+applies rows logged by other processes to this one's caches.
+"""
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, TypeVar, Union
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+from app.models.cache import CacheInvalidation
+
+K = TypeVar("K", bound=Hashable)
+
+PENDING_INVALIDATIONS = "pending_cache_invalidations"
+
+hits_total = Counter("read_cache_hits_total", "Read cache hits")
+misses_total = Counter("read_cache_misses_total", "Read cache misses")
+
+
+class ReadCache:
+    """Thread-safe LRU cache with TTL and invalidation stamps."""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # Clock value of each key's latest invalidation, oldest first
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()
+        # Invalidations forgotten to keep _invalidated bounded happened at or before this
+        self._floor = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def stamp(self) -> int:
+        """Take before loading rows that will be passed to ``set_many``."""
+        with self._lock:
+            return self._clock
+
+    def get_many(self, keys: Iterable[K]) -> Dict[K, Any]:
+        """Cached values of ``keys`` that are present and fresh."""
+        if not self.enabled:
+            return {}
+        found: Dict[K, Any] = {}
+        now = time.monotonic()
+        requested = 0
+        with self._lock:
+            for key in keys:
+                requested += 1
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[1]
+        hits_total.inc(len(found), cache=self.name)
+        misses_total.inc(requested - len(found), cache=self.name)
+        return found
+
+    def set_many(self, items: Mapping[K, Any], stamp: int) -> None:
+        """Store values loaded after ``stamp`` unless their key was invalidated since."""
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, value in items.items():
+                if self._invalidated.get(key, self._floor) > stamp:
+                    continue
+                self._entries[key] = (expires, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            self._clock += 1
+            for key in keys:
+                self._entries.pop(key, None)
+                self._invalidated[key] = self._clock
+                self._invalidated.move_to_end(key)
+            while len(self._invalidated) > max(self.max_entries, 1):
+                _, forgotten = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, forgotten)
+
+    def clear(self) -> None:
+        """Drop everything, rejecting rows loaded before now."""
+        with self._lock:
+            self._clock += 1
+            self._floor = self._clock
+            self._entries.clear()
+            self._invalidated.clear()
+
+
+task_cache = ReadCache("task", settings.READ_CACHE_MAX_ENTRIES, settings.READ_CACHE_TTL_SECONDS)
+user_cache = ReadCache("user", settings.READ_CACHE_MAX_ENTRIES, settings.READ_CACHE_TTL_SECONDS)
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of response bodies keyed by owner generation."""
+
+    # Rough size of an entry's key and bookkeeping, counted against max_bytes
+    ENTRY_OVERHEAD = 256
+    # Owners whose generation is remembered; older ones fall back to the floor
+    MAX_OWNERS = 100_000
+
+    def __init__(self, name: str, max_bytes: int) -> None:
+        self.name = name
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        # Generation of each owner invalidated recently, oldest first
+        self._generations: "OrderedDict[Hashable, int]" = OrderedDict()
+        # Generation of every owner not in _generations
+        self._floor = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def generation(self, owner: Hashable) -> int:
+        """Take before querying what a body of ``owner`` is rendered from."""
+        with self._lock:
+            return self._generations.get(owner, self._floor)
+
+    def get(self, owner: Hashable, generation: int, key: Hashable) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            body = self._entries.get((owner, generation, key))
+            if body is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end((owner, generation, key))
+                self.hits += 1
+        if body is None:
+            misses_total.inc(cache=self.name)
+        else:
+            hits_total.inc(cache=self.name)
+        return body
+
+    def set(self, owner: Hashable, generation: int, key: Hashable, body: bytes) -> None:
+        """Store ``body`` unless ``owner`` was invalidated since ``generation`` was taken."""
+        cost = len(body) + self.ENTRY_OVERHEAD
+        if not self.enabled or cost > self.max_bytes:
+            return
+        with self._lock:
+            if self._generations.get(owner, self._floor) != generation:
+                return
+            old = self._entries.pop((owner, generation, key), None)
+            if old is not None:
+                self.size -= len(old) + self.ENTRY_OVERHEAD
+            self._entries[owner, generation, key] = body
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted) + self.ENTRY_OVERHEAD
+
+    def invalidate(self, owners: Iterable[Hashable]) -> None:
+        """Move ``owners`` to a new generation; their cached bodies are never served again."""
+        with self._lock:
+            self._clock += 1
+            for owner in owners:
+                self._generations[owner] = self._clock
+                self._generations.move_to_end(owner)
+            while len(self._generations) > self.MAX_OWNERS:
+                _, forgotten = self._generations.popitem(last=False)
+                self._floor = max(self._floor, forgotten)
+
+    def hit_ratio(self) -> float:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        """Drop everything and start every owner on a new generation."""
+        with self._lock:
+            self._clock += 1
+            self._floor = self._clock
+            self._entries.clear()
+            self._generations.clear()
+            self.size = 0
+
+
+# Task listings and stats of a user, invalidated by every write to their tasks
+task_list_cache = ResponseCache("task_list", settings.RESPONSE_CACHE_MAX_BYTES)
+
+Gauge(
+    "response_cache_bytes",
+    "Size of the cached task list responses",
+    lambda: task_list_cache.size,
+)
+Gauge(
+    "response_cache_hit_ratio",
+    "Share of task list lookups served from the response cache",
+    task_list_cache.hit_ratio,
+)
+
+# Every cache by name, for applying invalidations logged by other processes
+caches: Dict[str, Union[ReadCache, ResponseCache]] = {
+    task_cache.name: task_cache,
+    user_cache.name: user_cache,
+    task_list_cache.name: task_list_cache,
+}
+
+_HOSTNAME = socket.gethostname()
+LOG_INVALIDATIONS = insert(CacheInvalidation)
+
+
+def process_origin() -> str:
+    """Identifies this process in ``cache_invalidations``; differs in each forked worker."""
+    return f"{_HOSTNAME}:{os.getpid()}"
+
+
+def invalidate_on_commit(
+    db: Session, cache: Union[ReadCache, ResponseCache], keys: List[Hashable]
+) -> None:
+    """
+    Invalidate ``keys`` now and again once ``db``'s transaction ends.
+
+    The keys are also logged in ``db``'s transaction, so other processes
+    invalidate them once the write is committed and never before.
+    """
+    cache.invalidate(keys)
+    db.info.setdefault(PENDING_INVALIDATIONS, []).append((cache, keys))
+    if settings.CACHE_SYNC_INTERVAL_SECONDS > 0 and keys:
+        origin = process_origin()
+        db.execute(
+            LOG_INVALIDATIONS,
+            [{"cache": cache.name, "key": key, "origin": origin} for key in keys],
+        )
+
+
+def _flush_invalidations(db: Session) -> None:
+    for cache, keys in db.info.pop(PENDING_INVALIDATIONS, []):
+        cache.invalidate(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(db: Session) -> None:
+    if not db.in_nested_transaction():
+        _flush_invalidations(db)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _invalidate_after_rollback(db: Session, previous_transaction: Any) -> None:
+    if not previous_transaction.nested:
+        _flush_invalidations(db)
@@ -0,0 +1,186 @@
+"""
+Coherence of the in-process caches across worker processes.
+
+Every worker has its own caches. Writers log the keys they invalidate in
+``cache_invalidations`` within their transaction (see ``invalidate_on_commit``).
+``CacheSync`` polls that log in every database holding it on a background
+thread and applies the rows written by other processes, so a worker's caches
+trail another worker's commit by about one poll interval at most. Users whose
+task listing another process invalidated also get their event streams told to
+catch up through the change feed.
+
+Rows older than ``retention_seconds`` are pruned. SQLite has a single writer,
+so log ids become visible in increasing order; a worker that fell behind the
+pruning sees a gap in the ids and clears its caches rather than serve entries
+whose invalidation it missed.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, DefaultDict, Hashable, List, Optional, Sequence
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.cache import caches, process_origin, task_list_cache
+from app.core.config import settings
+from app.core.database import SessionLocal, pin_primary
+from app.core.events import broker
+from app.core.metrics import Counter
+from app.core.sharding import shard_router
+from app.models.cache import CacheInvalidation
+
+logger = logging.getLogger(__name__)
+
+applied_total = Counter(
+    "cache_invalidations_applied_total", "Cache invalidations applied from other processes"
+)
+resets_total = Counter(
+    "cache_sync_resets_total", "Cache clears after invalidations were pruned before being applied"
+)
+
+
+class CacheSync:
+    """Apply cache invalidations logged by other processes on a background thread."""
+
+    def __init__(
+        self,
+        session_factories: Sequence["sessionmaker[Any]"],
+        poll_interval_seconds: float = 0.2,
+        retention_seconds: float = 300.0,
+        batch_size: int = 1000,
+    ) -> None:
+        self.session_factories = list(session_factories)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.retention_seconds = retention_seconds
+        self.batch_size = batch_size
+        # Id of the last log row applied, per database
+        self.positions: List[int] = []
+        self._pruned_at = 0.0
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        # Caches start empty, so nothing logged before now matters
+        self.skip_to_head()
+        self._pruned_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="cache-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.poll_interval_seconds):
+            try:
+                self.run_once()
+                if time.monotonic() - self._pruned_at > self.retention_seconds / 2:
+                    self.prune()
+                    self._pruned_at = time.monotonic()
+            except Exception:
+                logger.exception("Cache invalidation sync failed")
+
+    def skip_to_head(self) -> None:
+        """Consider everything logged so far applied."""
+        self.positions = []
+        for factory in self.session_factories:
+            with factory() as db:
+                pin_primary(db)
+                self.positions.append(db.scalar(select(func.max(CacheInvalidation.id))) or 0)
+
+    def run_once(self) -> int:
+        """Apply new log rows of other processes from every database; return how many."""
+        origin = process_origin()
+        applied = 0
+        for index, factory in enumerate(self.session_factories):
+            with factory() as db:
+                pin_primary(db)
+                applied += self._apply(db, index, origin)
+        applied_total.inc(applied)
+        return applied
+
+    def _apply(self, db: Session, index: int, origin: str) -> int:
+        applied = 0
+        while True:
+            rows = db.execute(
+                select(
+                    CacheInvalidation.id,
+                    CacheInvalidation.cache,
+                    CacheInvalidation.key,
+                    CacheInvalidation.origin,
+                )
+                .where(CacheInvalidation.id > self.positions[index])
+                .order_by(CacheInvalidation.id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                return applied
+            if rows[0].id != self.positions[index] + 1:
+                logger.warning("Missed pruned cache invalidations; clearing caches")
+                resets_total.inc()
+                for cache in caches.values():
+                    cache.clear()
+                broker.notify()
+            keys: DefaultDict[str, List[Hashable]] = defaultdict(list)
+            changed_users: List[int] = []
+            for row in rows:
+                if row.origin != origin:
+                    keys[row.cache].append(row.key)
+                    if row.cache == task_list_cache.name:
+                        changed_users.append(row.key)
+            for name, cache_keys in keys.items():
+                named = caches.get(name)
+                if named is not None:
+                    named.invalidate(cache_keys)
+                    applied += len(cache_keys)
+            # Every task write invalidates its owner's listing
+            broker.notify(changed_users)
+            self.positions[index] = rows[-1].id
+            if len(rows) < self.batch_size:
+                return applied
+
+    def prune(self) -> int:
+        """Delete log rows older than the retention; return how many."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+        pruned = 0
+        for factory in self.session_factories:
+            with factory() as db:
+                newest = select(func.max(CacheInvalidation.id)).scalar_subquery()
+                pruned += db.execute(
+                    delete(CacheInvalidation)
+                    # The newest row is kept, so a starting worker's position
+                    # is where the next row's id will follow without a gap
+                    .where(CacheInvalidation.created_at < cutoff, CacheInvalidation.id < newest)
+                ).rowcount
+                db.commit()
+        return pruned
+
+
+_sync: Optional[CacheSync] = None
+
+
+def start_cache_sync() -> None:
+    """Start applying other processes' invalidations unless ``CACHE_SYNC_INTERVAL_SECONDS`` is 0."""
+    global _sync
+    if settings.CACHE_SYNC_INTERVAL_SECONDS <= 0 or _sync is not None:
+        return
+    factories: List["sessionmaker[Any]"] = [SessionLocal]
+    if shard_router is not None:
+        factories += list(shard_router.session_factories.values())
+    _sync = CacheSync(
+        factories,
+        poll_interval_seconds=settings.CACHE_SYNC_INTERVAL_SECONDS,
+        retention_seconds=settings.CACHE_SYNC_RETENTION_SECONDS,
+    )
+    _sync.start()
+
+
+def stop_cache_sync() -> None:
+    global _sync
+    if _sync is not None:
+        _sync.stop()
+        _sync = None
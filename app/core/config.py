@@ -2,32 +2,122 @@
 app/core/config.py
 Application configuration management using Pydantic Settings.
 """
-from typing import List, Optional
-from pydantic import AnyHttpUrl, validator
+from typing import Dict, List, Optional
+
+from pydantic import AnyHttpUrl, model_validator, validator
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
-    
+
     # Application Info
     APP_NAME: str = "Task Management System"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = True
     ENVIRONMENT: str = "development"
-    
+
     # API Configuration
     API_V1_STR: str = "/api/v1"
     HOST: str = "0.0.0.0"
     PORT: int = 8000
-    
+
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./task_management.db"
     TEST_DATABASE_URL: str = "sqlite:///./test_task_management.db"
-    
+    # Read replicas for read-only queries; empty sends everything to DATABASE_URL
+    DATABASE_READ_URLS: List[str] = []
+    # Reads stay on the primary this long after a client's last write
+    READ_YOUR_WRITES_WINDOW_SECONDS: float = 5.0
+    # Task shards as {"name": "url"}; empty keeps tasks in DATABASE_URL
+    TASK_SHARDS: Dict[str, str] = {}
+    TASK_SHARD_VNODES: int = 64
+    # PRAGMA synchronous for SQLite connections (FULL, NORMAL or OFF); None keeps the default
+    SQLITE_SYNCHRONOUS: Optional[str] = None
+    # PRAGMA journal_mode, e.g. WAL so readers in other worker processes do not block the writer
+    SQLITE_JOURNAL_MODE: Optional[str] = None
+
+    # Group-commit batching for task status updates
+    STATUS_WRITE_BATCHING: bool = False
+    STATUS_BATCH_MAX_SIZE: int = 64
+    STATUS_BATCH_MAX_DELAY_MS: float = 5.0
+
+    # Archival of completed tasks
+    ARCHIVE_DONE_AFTER_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 500
+
+    # Change feed: tombstones of deleted tasks are kept this long
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+
+    # Live task event streams (Server-Sent Events)
+    SSE_QUEUE_SIZE: int = 100
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    # Most changes replayed on Last-Event-ID resume before asking the client to resync
+    SSE_REPLAY_LIMIT: int = 500
+
+    # Transactional outbox: an http(s) URL, file:// path or "memory"; None disables it
+    OUTBOX_SINK: Optional[str] = None
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_CONCURRENCY: int = 4
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BASE_SECONDS: float = 1.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 300.0
+    OUTBOX_LEASE_SECONDS: float = 60.0
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_HTTP_TIMEOUT_SECONDS: float = 10.0
+    OUTBOX_DEAD_RETENTION_SECONDS: float = 7 * 24 * 60 * 60
+
+    # In-process read cache for multi-get; 0 entries disables it
+    READ_CACHE_MAX_ENTRIES: int = 10000
+    READ_CACHE_TTL_SECONDS: float = 60.0
+    # Most ids accepted by one multi-get request
+    MULTI_GET_MAX_IDS: int = 1000
+
+    # Most operations accepted by one POST /batch request
+    BATCH_MAX_OPERATIONS: int = 500
+    # Most users accepted by one POST /users/bulk request
+    USER_BULK_MAX_USERS: int = 50000
+    # Most tasks in one tag assignment, and most tags in one assignment or tag filter
+    TAG_BATCH_MAX_TASKS: int = 10000
+    TAG_MAX_PER_REQUEST: int = 20
+
+    # Status history rollups: events folded per transaction, longest analytics range
+    ROLLUP_BATCH_SIZE: int = 1000
+    ANALYTICS_MAX_DAYS: int = 366
+
+    # Most rows a task listing may sort without an index before it is rejected
+    TASK_LIST_MAX_SORT_ROWS: int = 10000
+
+    # Largest page of users or tasks a listing returns. Pages above STREAM_PAGE_SIZE are read
+    # and serialized in batches of that size as they are sent, and are not cached
+    MAX_PAGE_SIZE: int = 10000
+    STREAM_PAGE_SIZE: int = 1000
+
+    # In-process cache of task listing and stats responses; 0 bytes disables it
+    RESPONSE_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    # Workers apply cache invalidations and pass on task events logged by other processes this
+    # often; 0 disables the log. Unless set, it is 0 when WORKERS is 1
+    CACHE_SYNC_INTERVAL_SECONDS: float = 0.2
+    CACHE_SYNC_RETENTION_SECONDS: float = 300.0
+
+    # Worker processes started by app.tools.serve; 0 starts one per available CPU
+    WORKERS: int = 0
+
+    # On-demand request profiling: requests carrying a token signed with PROFILING_SECRET, and
+    # PROFILING_SAMPLE_RATE of all requests, are profiled into PROFILING_DIR
+    PROFILING_SECRET: Optional[str] = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_PROFILES: int = 50
+
+    # Idempotency-Key Configuration
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_WAIT_TIMEOUT_SECONDS: float = 30.0
+
     # CORS Configuration
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
-    
+
     @validator("BACKEND_CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v: str | List[str]) -> List[str] | str:
         """Parse CORS origins from string or list."""
@@ -36,11 +126,18 @@ class Settings(BaseSettings):
         elif isinstance(v, (list, str)):
             return v
         raise ValueError(v)
-    
+
+    @model_validator(mode="after")
+    def sync_caches_across_workers_only(self) -> "Settings":
+        """A single worker has nobody to sync with, so it skips the invalidation log."""
+        if self.WORKERS == 1 and "CACHE_SYNC_INTERVAL_SECONDS" not in self.model_fields_set:
+            self.CACHE_SYNC_INTERVAL_SECONDS = 0.0
+        return self
+
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 
 # Create a global settings instance
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,31 +1,202 @@
-from sqlalchemy import create_engine
+import functools
+import random
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Generator, Optional, Sequence, TypeVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import Session, sessionmaker
+
 from app.core.config import settings
-from typing import Generator
+from app.core.metrics import Counter
+
+F = TypeVar("F", bound=Callable[..., Any])
 
 DATABASE_URL = settings.DATABASE_URL
 
-# For SQLite, don't use StaticPool for normal file-based DB
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=settings.DEBUG,
+
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    if settings.SQLITE_SYNCHRONOUS:
+        # Trades durability of the most recent commits for cheaper fsyncs
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    if settings.SQLITE_JOURNAL_MODE:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.close()
+
+
+def create_database_engine(url: str) -> Engine:
+    """Engine for the primary, a read replica or a shard, with the configured SQLite pragmas."""
+    # For SQLite, don't use StaticPool for normal file-based DB
+    database_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        echo=settings.DEBUG,
+    )
+    if url.startswith("sqlite"):
+        event.listen(database_engine, "connect", _set_sqlite_pragmas)
+    return database_engine
+
+
+engine = create_database_engine(DATABASE_URL)
+
+compiled_cache_total = Counter(
+    "sql_compiled_cache_total", "Statements executed, by outcome of the compiled SQL cache lookup"
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_compiled_cache(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    # cache_hit is CACHE_HIT, CACHE_MISS, NO_CACHE_KEY (textual SQL), ...
+    if context is not None:
+        compiled_cache_total.inc(result=context.cache_hit.name.lower())
+
+
+# Read replicas; SQLite file copies or WAL readers work as local stand-ins
+read_engines = [create_database_engine(url) for url in settings.DATABASE_READ_URLS]
+
+# Set for requests that must read from the primary (read-your-writes window)
+primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
+
+PIN_PRIMARY = "pin_primary"
+LAST_WRITE_COOKIE = "last_write_at"
+LAST_WRITE_HEADER = "X-Last-Write-At"
+
+
+class RoutingSession(Session):
+    """Session that sends plain reads to read replicas and everything else to the primary."""
+
+    def __init__(self, *args: Any, read_binds: Sequence[Engine] = (), **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.read_binds = list(read_binds)
+
+    def get_bind(
+        self, mapper: Optional[Any] = None, clause: Optional[Any] = None, **kw: Any
+    ) -> Any:
+        if (
+            self.read_binds
+            and clause is not None
+            and getattr(clause, "is_select", False)
+            and not self._flushing
+            and not self.info.get(PIN_PRIMARY)
+            and not primary_pinned.get()
+        ):
+            return random.choice(self.read_binds)
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session: Session, flush_context: Any) -> None:
+    # Anything read after a write in the same session must see that write
+    session.info[PIN_PRIMARY] = True
+
+
+def pin_primary(db: Session) -> None:
+    """Route all further statements of ``db`` to the primary."""
+    db.info[PIN_PRIMARY] = True
+
+
+def on_primary(method: F) -> F:
+    """Decorator for CRUD methods that write, or read data they are about to write."""
+
+    @functools.wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        pin_primary(self.db)
+        return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    read_binds=read_engines,
+)
 Base = declarative_base()
 
 
+ATTACHED_SESSIONS = "attached_sessions"
+DATABASE_NAME = "database_name"
+
+
+def database_name(db: Session) -> str:
+    """Name of the database ``db`` talks to: a shard name, or "primary"."""
+    name: str = db.info.get(DATABASE_NAME, "primary")
+    return name
+
+
+def attached_sessions(db: Session) -> Dict[str, Session]:
+    """Sessions on other databases (e.g. task shards) that share ``db``'s lifetime."""
+    sessions: Dict[str, Session] = db.info.setdefault(ATTACHED_SESSIONS, {})
+    return sessions
+
+
+# Set while several CRUD calls share one transaction (POST /batch)
+commit_deferred: ContextVar[bool] = ContextVar("commit_deferred", default=False)
+
+
+def commit(db: Session) -> None:
+    """Commit ``db``, or only flush it while commits are deferred."""
+    if commit_deferred.get():
+        db.flush()
+    else:
+        db.commit()
+
+
+def rollback(db: Session) -> None:
+    """Roll back ``db`` unless commits are deferred, where the caller owns the transaction."""
+    if not commit_deferred.get():
+        db.rollback()
+
+
+def begin_explicit(db: Session, immediate: bool = False) -> None:
+    """
+    Start ``db``'s transaction with an explicit BEGIN.
+
+    pysqlite only opens a transaction before DML, so a SAVEPOINT issued first
+    would become the outermost transaction and its RELEASE would commit.
+    With ``immediate`` the write lock is taken at once, so what the
+    transaction reads cannot change until it ends.
+    """
+    connection = db.connection()
+    if connection.dialect.name == "sqlite":
+        sqlite_connection: Any = connection.connection.driver_connection
+        if not sqlite_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+
+def release_connections(db: Session) -> None:
+    """End the read transactions of ``db`` and its attached sessions, returning connections."""
+    db.rollback()
+    for attached in attached_sessions(db).values():
+        attached.rollback()
+
+
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
         db.commit()  # commit after request ends
-    except:
+        for attached in attached_sessions(db).values():
+            attached.commit()
+    except Exception:
         db.rollback()
+        for attached in attached_sessions(db).values():
+            attached.rollback()
         raise
     finally:
+        for attached in attached_sessions(db).values():
+            attached.close()
         db.close()
 
 
@@ -0,0 +1,207 @@
+"""
+In-process pub/sub of task changes.
+
+``TaskCRUD`` queues an event on the session that makes a change; the event is
+rendered once the change is flushed and handed to ``broker`` only after the
+transaction commits, so subscribers never see writes that were rolled back.
+
+Each subscriber owns a bounded asyncio queue on its event loop. A subscriber
+that falls behind loses its queued events and gets a single ``RESYNC`` marker
+instead, telling it to catch up through the change feed.
+
+Changes committed by other processes arrive through the cache invalidation log
+(see ``app.core.cache_sync``), which calls ``broker.notify``; subscribers then
+get a ``CATCH_UP`` marker and read those changes from the change feed.
+"""
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.database import database_name
+from app.utils.sync_token import encode_sync_token
+
+# Event types, shared with the outbox
+TASK_CREATED = "task.created"
+TASK_UPDATED = "task.updated"
+TASK_DELETED = "task.deleted"
+USER_CREATED = "user.created"
+USER_UPDATED = "user.updated"
+USER_DELETED = "user.deleted"
+
+PENDING_EVENTS = "pending_task_events"
+
+
+@dataclass
+class TaskEvent:
+    """A committed change to one of a user's tasks."""
+
+    user_id: int
+    type: str
+    seq: int
+    # Sync token positioned at this change, usable as Last-Event-ID
+    id: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class _Marker:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+RESYNC = _Marker("RESYNC")
+# Another process changed the user's tasks
+CATCH_UP = _Marker("CATCH_UP")
+
+
+class Subscription:
+    """One subscriber's queue of events for a single user."""
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop, maxsize: int) -> None:
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[Union[TaskEvent, _Marker]]" = asyncio.Queue(maxsize)
+        # A CATCH_UP marker is queued and not yet taken
+        self._catch_up_queued = False
+
+    def _put(self, item: Union[TaskEvent, _Marker]) -> None:
+        # Runs on self.loop
+        if item is CATCH_UP:
+            if self._catch_up_queued:
+                return
+            self._catch_up_queued = True
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            item = RESYNC
+            self._catch_up_queued = False
+        self.queue.put_nowait(item)
+
+    async def get(self) -> Union[TaskEvent, _Marker]:
+        item = await self.queue.get()
+        if item is CATCH_UP:
+            self._catch_up_queued = False
+        return item
+
+
+class TaskEventBroker:
+    """Fan committed task events out to the subscribers of each user."""
+
+    def __init__(self) -> None:
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int, maxsize: int) -> Subscription:
+        """Subscribe the running event loop to a user's events."""
+        subscription = Subscription(user_id, asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def has_subscribers(self, user_id: int) -> bool:
+        return user_id in self._subscribers
+
+    def publish(self, task_event: TaskEvent) -> None:
+        """Deliver an event to the user's subscribers; safe to call from any thread."""
+        self._deliver([task_event.user_id], task_event)
+
+    def notify(self, user_ids: Optional[Iterable[int]] = None) -> None:
+        """Tell the users' (by default all) subscribers that another process changed tasks."""
+        if user_ids is None:
+            with self._lock:
+                user_ids = list(self._subscribers)
+        self._deliver(user_ids, CATCH_UP)
+
+    def _deliver(self, user_ids: Iterable[int], item: Union[TaskEvent, _Marker]) -> None:
+        with self._lock:
+            subscribers = [
+                subscription
+                for user_id in set(user_ids)
+                for subscription in self._subscribers.get(user_id, ())
+            ]
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, item)
+            except RuntimeError:
+                # The subscriber's loop has been closed
+                self.unsubscribe(subscription)
+
+
+broker = TaskEventBroker()
+
+
+@dataclass
+class _PendingEvent:
+    user_id: int
+    type: str
+    seq: int
+    render: Callable[[], Dict[str, Any]]
+    # Innermost transaction (possibly a savepoint) the change was made in
+    transaction: Any
+    event: Optional[TaskEvent] = None
+
+
+def queue_event(
+    db: Session, user_id: int, type: str, seq: int, render: Callable[[], Dict[str, Any]]
+) -> None:
+    """
+    Publish an event once ``db`` commits.
+
+    ``render`` builds the event payload and is called after the next flush,
+    when database-generated values are available.
+    """
+    if not broker.has_subscribers(user_id):
+        return
+    transaction = db.get_nested_transaction() or db.get_transaction()
+    db.info.setdefault(PENDING_EVENTS, []).append(
+        _PendingEvent(user_id, type, seq, render, transaction)
+    )
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _render_events(db: Session, flush_context: Any) -> None:
+    database = database_name(db)
+    for pending in db.info.get(PENDING_EVENTS, ()):
+        if pending.event is None:
+            pending.event = TaskEvent(
+                pending.user_id,
+                pending.type,
+                pending.seq,
+                encode_sync_token(database, pending.seq),
+                pending.render(),
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(db: Session) -> None:
+    if db.in_nested_transaction():
+        # Releasing a savepoint; wait for the real commit
+        return
+    pending: List[_PendingEvent] = db.info.pop(PENDING_EVENTS, [])
+    for item in pending:
+        if item.event is not None:
+            broker.publish(item.event)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_events(db: Session, previous_transaction: Any) -> None:
+    if not previous_transaction.nested:
+        db.info.pop(PENDING_EVENTS, None)
+        return
+    # A savepoint was rolled back: drop only the changes made inside it
+    pending = db.info.get(PENDING_EVENTS, [])
+    pending[:] = [item for item in pending if item.transaction is not previous_transaction]
@@ -0,0 +1,102 @@
+"""
+Minimal in-process metrics in the Prometheus text exposition format.
+
+Metrics register themselves with ``registry`` on creation and are served by
+``GET /metrics``. Values are per process; a scraper sums them across workers.
+"""
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+_LabelValues = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> _LabelValues:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: _LabelValues) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[_LabelValues, float] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def samples(self) -> List[Tuple[_LabelValues, float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for labels, value in self.samples():
+            lines.append(f"{self.name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, set directly or read from a callback."""
+
+    type = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, function: Optional[Callable[[], float]] = None
+    ) -> None:
+        super().__init__(name, documentation)
+        self._function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+    def samples(self) -> List[Tuple[_LabelValues, float]]:
+        if self._function is not None:
+            return [((), float(self._function()))]
+        return super().samples()
+
+
+class Registry:
+    """All metrics of this process."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,279 @@
+"""
+Delivery of outbox messages to downstream systems.
+
+Mutations write ``OutboxMessage`` rows in their own transaction, so a change
+and its message are committed or rolled back together. ``OutboxDispatcher``
+runs on a background thread: it claims due messages in batches from every
+database holding them, hands them to a sink with at most ``concurrency``
+deliveries in flight, prunes the delivered rows and reschedules failures with
+exponential backoff until ``max_attempts`` is reached. Messages given up on
+are kept for ``dead_retention_seconds`` for inspection, then pruned.
+
+Delivery is at-least-once: a crash between delivery and pruning redelivers
+the batch once its lease expires, so consumers should dedupe on
+(``source``, ``id``). Messages of one aggregate are delivered in order, also
+across dispatchers, since a message is not claimed while an earlier one of its
+aggregate is in flight or backing off. There is no order between aggregates or
+between databases.
+"""
+import json
+import logging
+import random
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import SessionLocal, database_name
+from app.core.metrics import Counter, Gauge
+from app.core.sharding import shard_router
+from app.crud.outbox import OutboxCRUD, get_outbox_crud
+from app.models.outbox import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+delivered_total = Counter("outbox_delivered_total", "Outbox messages delivered")
+failures_total = Counter("outbox_delivery_failures_total", "Failed outbox delivery attempts")
+dead_total = Counter("outbox_dead_total", "Outbox messages given up on after max attempts")
+# How often each dispatcher prunes messages given up on
+DEAD_PURGE_INTERVAL_SECONDS = 60.0
+
+pending_messages = Gauge("outbox_pending_messages", "Undelivered outbox messages")
+lag_seconds = Gauge("outbox_lag_seconds", "Age of the oldest undelivered outbox message")
+
+
+class OutboxSink(ABC):
+    """Destination for outbox messages."""
+
+    @abstractmethod
+    def deliver(self, messages: List[Dict[str, Any]]) -> None:
+        """Deliver a batch of messages, raising if it was not accepted."""
+
+
+class HttpSink(OutboxSink):
+    """POST batches as ``{"messages": [...]}`` to a URL; any non-2xx status is a failure."""
+
+    def __init__(self, url: str, timeout: float) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, messages: List[Dict[str, Any]]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"messages": messages}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        # urlopen raises HTTPError for non-2xx responses
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class FileSink(OutboxSink):
+    """Append messages to a file as JSON lines."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def deliver(self, messages: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(message) + "\n" for message in messages)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class MemorySink(OutboxSink):
+    """Keep delivered messages in a list; a local stand-in for tests and development."""
+
+    def __init__(self) -> None:
+        self.messages: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def deliver(self, messages: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self.messages.extend(messages)
+
+
+def build_sink(target: str) -> OutboxSink:
+    """Sink for an ``OUTBOX_SINK`` value: an http(s) URL, ``file://`` path or ``memory``."""
+    if target.startswith(("http://", "https://")):
+        return HttpSink(target, timeout=settings.OUTBOX_HTTP_TIMEOUT_SECONDS)
+    if target.startswith("file://"):
+        return FileSink(target[len("file://") :])
+    if target == "memory":
+        return MemorySink()
+    raise ValueError(f"Unsupported OUTBOX_SINK: {target}")
+
+
+def _envelope(source: str, message: OutboxMessage) -> Dict[str, Any]:
+    return {
+        "source": source,
+        "id": message.id,
+        "type": message.event_type,
+        "aggregate_type": message.aggregate_type,
+        "aggregate_id": message.aggregate_id,
+        "created_at": message.created_at.isoformat(),
+        "attempt": message.attempts,
+        "payload": json.loads(message.payload),
+    }
+
+
+class OutboxDispatcher:
+    """Drain outbox tables into a sink on a background thread."""
+
+    def __init__(
+        self,
+        session_factories: Sequence["sessionmaker[Any]"],
+        sink: OutboxSink,
+        batch_size: int = 100,
+        concurrency: int = 4,
+        max_attempts: int = 10,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 300.0,
+        lease_seconds: float = 60.0,
+        poll_interval_seconds: float = 1.0,
+        dead_retention_seconds: float = 7 * 24 * 60 * 60,
+    ) -> None:
+        self.session_factories = list(session_factories)
+        self.sink = sink
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.dead_retention_seconds = dead_retention_seconds
+        self._next_purge = 0.0
+        self._executor = ThreadPoolExecutor(concurrency, thread_name_prefix="outbox-delivery")
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop after the batch in progress and wait for in-flight deliveries."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                delivered = self.run_once()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                delivered = 0
+            # Keep draining without pause while there is a backlog
+            if not delivered:
+                self._stopping.wait(self.poll_interval_seconds)
+
+    def run_once(self) -> int:
+        """Claim and deliver one batch from each database; return how many were delivered."""
+        delivered, pending, oldest = 0, 0, None
+        purge = time.monotonic() >= self._next_purge
+        if purge:
+            self._next_purge = time.monotonic() + DEAD_PURGE_INTERVAL_SECONDS
+        for factory in self.session_factories:
+            with factory() as db:
+                outbox_crud = get_outbox_crud(db)
+                if purge:
+                    outbox_crud.purge_dead(
+                        datetime.utcnow() - timedelta(seconds=self.dead_retention_seconds)
+                    )
+                messages = outbox_crud.claim(self.batch_size, self.lease_seconds)
+                if messages:
+                    delivered += self._deliver(outbox_crud, database_name(db), messages)
+                count, created_at = outbox_crud.backlog()
+            pending += count
+            if created_at is not None and (oldest is None or created_at < oldest):
+                oldest = created_at
+        pending_messages.set(pending)
+        lag_seconds.set((datetime.utcnow() - oldest).total_seconds() if oldest else 0)
+        return delivered
+
+    def _deliver(self, outbox_crud: OutboxCRUD, source: str, messages: List[OutboxMessage]) -> int:
+        # Messages of one aggregate go to the same chunk so they are delivered in order
+        chunks: Dict[int, List[OutboxMessage]] = {}
+        for message in messages:
+            key = hash((message.aggregate_type, message.aggregate_id)) % self.concurrency
+            chunks.setdefault(key, []).append(message)
+        batches = list(chunks.values())
+        results = self._executor.map(self._attempt, [source] * len(batches), batches)
+
+        delivered_ids: List[int] = []
+        failures = []
+        for batch, error in zip(batches, results):
+            if error is None:
+                delivered_ids += [message.id for message in batch]
+            else:
+                failures_total.inc(len(batch))
+                failures += [(message.id, error, self._retry_at(message)) for message in batch]
+        outbox_crud.fail(failures)
+        outbox_crud.delete_delivered(delivered_ids)
+        delivered_total.inc(len(delivered_ids))
+        return len(delivered_ids)
+
+    def _attempt(self, source: str, batch: List[OutboxMessage]) -> Optional[str]:
+        try:
+            self.sink.deliver([_envelope(source, message) for message in batch])
+        except Exception as e:
+            logger.warning("Outbox delivery of %d messages failed: %s", len(batch), e)
+            return repr(e)
+        return None
+
+    def _retry_at(self, message: OutboxMessage) -> Optional[datetime]:
+        """Next attempt time with jittered exponential backoff, or None to give up."""
+        if message.attempts >= self.max_attempts:
+            dead_total.inc()
+            logger.error(
+                "Giving up on outbox message %d after %d attempts", message.id, message.attempts
+            )
+            return None
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (message.attempts - 1))
+        return datetime.utcnow() + timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+_dispatcher: Optional[OutboxDispatcher] = None
+
+
+def start_outbox_dispatcher() -> None:
+    """Start draining the outbox when ``OUTBOX_SINK`` is configured."""
+    global _dispatcher
+    if not settings.OUTBOX_SINK:
+        logger.info("OUTBOX_SINK is not set; changes are not recorded in the outbox")
+        return
+    if _dispatcher is not None:
+        return
+    factories: List["sessionmaker[Any]"] = [SessionLocal]
+    if shard_router is not None:
+        factories += list(shard_router.session_factories.values())
+    _dispatcher = OutboxDispatcher(
+        factories,
+        build_sink(settings.OUTBOX_SINK),
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        concurrency=settings.OUTBOX_CONCURRENCY,
+        max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+        retry_base_seconds=settings.OUTBOX_RETRY_BASE_SECONDS,
+        retry_max_seconds=settings.OUTBOX_RETRY_MAX_SECONDS,
+        lease_seconds=settings.OUTBOX_LEASE_SECONDS,
+        poll_interval_seconds=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+        dead_retention_seconds=settings.OUTBOX_DEAD_RETENTION_SECONDS,
+    )
+    _dispatcher.start()
+
+
+def stop_outbox_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is not None:
+        _dispatcher.stop()
+        _dispatcher = None
@@ -0,0 +1,355 @@
+"""
+On-demand profiling of individual requests.
+
+A request is profiled when it carries a valid token in the ``X-Profile-Token``
+header or the ``profile_token`` query parameter, or when it falls in the
+``PROFILING_SAMPLE_RATE`` fraction of traffic. Tokens are
+``<expiry>.<HMAC-SHA256 of the expiry>`` signed with ``PROFILING_SECRET``;
+``python -m app.tools.profile_token`` mints one.
+
+Sync endpoints and dependencies run in the threadpool, so a deterministic
+profiler on the thread handling the request would miss most of the work.
+``StackSampler`` instead samples the stacks of the event loop thread and the
+threadpool at a fixed interval while the request runs, keeping the stacks that
+pass through ``app`` code. A thread is only sampled while it runs a callback
+or threadpool job of the profiled request, recognized by the context the
+request's work inherits, so concurrent requests stay out of the profile. One
+request is profiled at a time per process.
+
+Profiles land in ``PROFILING_DIR`` as collapsed stacks (flamegraph.pl,
+speedscope, inferno), a pstats file built from the samples (``python -m
+pstats``, snakeviz; call counts there are sample counts) and a JSON summary.
+Only the newest ``PROFILING_MAX_PROFILES`` profiles are kept.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import marshal
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from asyncio.events import Handle
+from collections import Counter as CounterDict
+from contextvars import Context, ContextVar
+from datetime import datetime
+from types import FrameType
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_TOKEN_PARAM = "profile_token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+# File extension and media type of each stored format
+PROFILE_FORMATS = {
+    "collapsed": "text/plain; charset=utf-8",
+    "pstats": "application/octet-stream",
+    "json": "application/json",
+}
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+# Command-line entry points sit at the bottom of every stack of the threads they start
+ENTRY_POINTS = os.path.join(APP_ROOT, "tools") + os.sep
+WORKER_THREAD_NAME = "AnyIO worker thread"
+# Runs each event loop callback, including task steps, in the context it was scheduled with
+_HANDLE_RUN = Handle._run.__code__
+
+_PROFILE_ID = re.compile(r"^\d{8}T\d{12}-\d+-[0-9a-f]{6}$")
+
+# (filename, first line, function name), the key pstats uses for functions
+Frame = Tuple[str, int, str]
+
+# The sampler of the request whose work runs in the current context. Event loop
+# callbacks and threadpool jobs inherit it from the request that started them.
+_active_sampler: ContextVar[Optional["StackSampler"]] = ContextVar("active_sampler", default=None)
+
+profiles_total = Counter("profiles_total", "Requests profiled")
+
+
+def sign_token(secret: str, expires_at: int) -> str:
+    """Profiling token valid until the Unix time ``expires_at``."""
+    digest = hmac.new(secret.encode(), str(expires_at).encode(), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{digest}"
+
+
+def verify_token(secret: Optional[str], token: Optional[str]) -> bool:
+    """Whether ``token`` was signed with ``secret`` and has not expired."""
+    if not secret or not token:
+        return False
+    expires, _, _ = token.partition(".")
+    try:
+        expires_at = int(expires)
+    except ValueError:
+        return False
+    return expires_at >= time.time() and hmac.compare_digest(token, sign_token(secret, expires_at))
+
+
+class StackSampler:
+    """
+    Count the stacks of the work started in one context at a fixed interval.
+
+    ``start`` marks the calling context, so the callbacks and threadpool jobs
+    it starts until ``stop`` are sampled, and nothing else.
+    """
+
+    def __init__(self, loop_thread_id: int, interval_seconds: float = 0.005) -> None:
+        self.loop_thread_id = loop_thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks: CounterDict[Tuple[Frame, ...]] = CounterDict()
+        self.samples = 0
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._token: Any = None
+
+    def start(self) -> None:
+        self._token = _active_sampler.set(self)
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._token is not None:
+            _active_sampler.reset(self._token)
+            self._token = None
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval_seconds):
+            self.sample()
+
+    def sample(self) -> None:
+        """Record the stacks of the event loop and worker threads running sampled work."""
+        worker_ids = {
+            thread.ident for thread in threading.enumerate() if thread.name == WORKER_THREAD_NAME
+        }
+        for thread_id, thread_frame in sys._current_frames().items():
+            in_worker = thread_id in worker_ids
+            if not in_worker and thread_id != self.loop_thread_id:
+                continue
+            frame: Optional[FrameType] = thread_frame
+            stack: List[Frame] = []
+            in_app = False
+            context = None
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                in_app = in_app or (
+                    code.co_filename.startswith(APP_ROOT)
+                    and not code.co_filename.startswith(ENTRY_POINTS)
+                )
+                if context is None:
+                    context = _running_context(frame, in_worker)
+                frame = frame.f_back
+            # Idle threads wait outside app code and other requests run in other contexts
+            if in_app and context is not None and context.get(_active_sampler) is self:
+                self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format, root first: ``frame;frame;frame count``."""
+        lines = [
+            ";".join(_frame_label(frame) for frame in stack) + f" {count}"
+            for stack, count in self.stacks.most_common()
+        ]
+        return "".join(line + "\n" for line in lines)
+
+    def pstats(self) -> Dict[Frame, Any]:
+        """Samples as the stats dict ``pstats.Stats`` loads, with times in seconds."""
+        own: CounterDict[Frame] = CounterDict()
+        inclusive: CounterDict[Frame] = CounterDict()
+        callers: Dict[Frame, CounterDict[Frame]] = {}
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            # Recursive frames count once per sample
+            for frame in set(stack):
+                inclusive[frame] += count
+            for caller, callee in zip(stack, stack[1:]):
+                callers.setdefault(callee, CounterDict())[caller] += count
+        interval = self.interval_seconds
+        return {
+            frame: (
+                inclusive[frame],
+                inclusive[frame],
+                own[frame] * interval,
+                inclusive[frame] * interval,
+                {
+                    caller: (count, count, 0.0, count * interval)
+                    for caller, count in callers.get(frame, {}).items()
+                },
+            )
+            for frame in inclusive
+        }
+
+
+def _running_context(frame: FrameType, in_worker: bool) -> Optional[Context]:
+    """The context ``frame`` runs an event loop callback or AnyIO worker job in, if it does."""
+    if frame.f_code is _HANDLE_RUN:
+        handle = frame.f_locals.get("self")
+        return getattr(handle, "_context", None) if isinstance(handle, Handle) else None
+    # AnyIO's WorkerThread.run calls context.run(func, *args) for each job
+    if in_worker and frame.f_code.co_name == "run":
+        context = frame.f_locals.get("context")
+        return context if isinstance(context, Context) else None
+    return None
+
+
+def _frame_label(frame: Frame) -> str:
+    filename, line, name = frame
+    # Shorten to the import path, e.g. app/crud/task.py or sqlalchemy/orm/query.py
+    for root in sorted(sys.path, key=len, reverse=True):
+        if root and filename.startswith(root + os.sep):
+            filename = filename[len(root) + 1 :]
+            break
+    return f"{name} ({filename}:{line})".replace(";", ",")
+
+
+class ProfileStore:
+    """Profiles on disk, pruned to the newest ``max_profiles``."""
+
+    def __init__(self, directory: str, max_profiles: int = 50) -> None:
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def save(self, sampler: StackSampler, summary: Dict[str, Any]) -> str:
+        """Write the profile of ``sampler`` and return its id."""
+        os.makedirs(self.directory, exist_ok=True)
+        created_at = datetime.utcnow()
+        profile_id = f"{created_at:%Y%m%dT%H%M%S%f}-{os.getpid()}-{secrets.token_hex(3)}"
+        summary = {
+            "id": profile_id,
+            "created_at": created_at.isoformat(),
+            "samples": sampler.samples,
+            "interval_ms": sampler.interval_seconds * 1000,
+            **summary,
+        }
+        with open(self._path(profile_id, "collapsed"), "w") as f:
+            f.write(sampler.collapsed())
+        with open(self._path(profile_id, "pstats"), "wb") as f:
+            marshal.dump(sampler.pstats(), f)
+        # The summary is written last; listings skip profiles without one
+        with open(self._path(profile_id, "json"), "w") as f:
+            json.dump(summary, f)
+        self.prune()
+        return profile_id
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of the stored profiles, newest first."""
+        profiles = []
+        for profile_id in self._ids():
+            try:
+                with open(self._path(profile_id, "json")) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def path(self, profile_id: str, fmt: str) -> Optional[str]:
+        """File of one stored format of a profile, or None if there is none."""
+        if not _PROFILE_ID.match(profile_id) or fmt not in PROFILE_FORMATS:
+            return None
+        path = self._path(profile_id, fmt)
+        return path if os.path.exists(path) else None
+
+    def prune(self) -> int:
+        """Delete all but the newest ``max_profiles`` profiles; return how many."""
+        stale = self._ids()[self.max_profiles :]
+        for profile_id in stale:
+            for fmt in PROFILE_FORMATS:
+                try:
+                    os.remove(self._path(profile_id, fmt))
+                except FileNotFoundError:
+                    pass
+        return len(stale)
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        ids = {name.rsplit(".", 1)[0] for name in names}
+        return sorted((i for i in ids if _PROFILE_ID.match(i)), reverse=True)
+
+    def _path(self, profile_id: str, fmt: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{fmt}")
+
+
+class RequestProfiler:
+    """Decide which requests to profile and profile them one at a time."""
+
+    def __init__(
+        self,
+        store: ProfileStore,
+        secret: Optional[str] = None,
+        sample_rate: float = 0.0,
+        interval_seconds: float = 0.005,
+    ) -> None:
+        self.store = store
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+
+    def authorized(self, request: Request) -> bool:
+        """Whether ``request`` carries a valid profiling token."""
+        token = request.headers.get(PROFILE_TOKEN_HEADER) or request.query_params.get(
+            PROFILE_TOKEN_PARAM
+        )
+        return verify_token(self.secret, token)
+
+    def wants(self, request: Request) -> bool:
+        return self.authorized(request) or (
+            self.sample_rate > 0 and random.random() < self.sample_rate
+        )
+
+    async def __call__(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        if not self.wants(request) or not self._lock.acquire(blocking=False):
+            return await call_next(request)
+        try:
+            sampler = StackSampler(threading.get_ident(), self.interval_seconds)
+            start = time.perf_counter()
+            sampler.start()
+            try:
+                response = await call_next(request)
+            finally:
+                sampler.stop()
+            duration = time.perf_counter() - start
+        finally:
+            self._lock.release()
+
+        try:
+            profile_id = self.store.save(
+                sampler,
+                {
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status_code": response.status_code,
+                    "duration_ms": round(duration * 1000, 3),
+                },
+            )
+        except OSError:
+            logger.exception("Could not store request profile")
+            return response
+        profiles_total.inc()
+        response.headers[PROFILE_ID_HEADER] = profile_id
+        return response
+
+
+request_profiler = RequestProfiler(
+    ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_PROFILES),
+    secret=settings.PROFILING_SECRET,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    interval_seconds=settings.PROFILING_INTERVAL_MS / 1000,
+)
@@ -0,0 +1,108 @@
+"""
+Horizontal sharding of tasks by user_id.
+
+Users are placed on shards with a consistent hash ring, so adding a shard only
+remaps about 1/N of the users that have no placement yet. Placements are pinned
+in ``user_shards`` when a user's first task is created and only change through
+``app.tools.rebalance_shards``. Task ids are allocated globally from
+``task_locations`` in the primary database, which also maps each id to its
+shard for lookups that are not scoped by user.
+"""
+import bisect
+import hashlib
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from app.core.config import settings
+from app.core.database import DATABASE_NAME, Base, attached_sessions, create_database_engine
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic"
+)
+
+
+def _hash(value: str) -> int:
+    return int(hashlib.md5(value.encode()).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 64) -> None:
+        self.vnodes = vnodes
+        self._points: List[Tuple[int, str]] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        for i in range(self.vnodes):
+            bisect.insort(self._points, (_hash(f"{node}#{i}"), node))
+
+    def remove(self, node: str) -> None:
+        self._points = [point for point in self._points if point[1] != node]
+
+    def get(self, key: str) -> str:
+        if not self._points:
+            raise LookupError("Hash ring has no nodes")
+        index = bisect.bisect(self._points, (_hash(key), "")) % len(self._points)
+        return self._points[index][1]
+
+
+class ShardRouter:
+    """Maps users to shard engines and hands out request-scoped shard sessions."""
+
+    def __init__(self, engines: Dict[str, Engine], vnodes: int = 64) -> None:
+        self.engines = engines
+        self.ring = HashRing(engines, vnodes)
+        self.session_factories = {
+            name: sessionmaker(
+                autocommit=False, autoflush=False, bind=engine, info={DATABASE_NAME: name}
+            )
+            for name, engine in engines.items()
+        }
+
+    def ring_shard(self, user_id: int) -> str:
+        """Shard the ring assigns to a user that has no pinned placement."""
+        return self.ring.get(str(user_id))
+
+    def session(self, db: Session, shard: str) -> Session:
+        """Session on ``shard`` that is committed and closed together with ``db``."""
+        sessions = attached_sessions(db)
+        key = f"shard:{shard}"
+        if key not in sessions:
+            sessions[key] = self.session_factories[shard]()
+        return sessions[key]
+
+    def create_databases(self) -> None:
+        """
+        Create the tables of new shards, stamped with the newest migration.
+
+        Shards that already have tables are left to ``alembic upgrade head``,
+        which migrates every shard along with the primary database.
+        """
+        script = ScriptDirectory(MIGRATIONS_DIR)
+        for engine in self.engines.values():
+            with engine.begin() as connection:
+                migrations = MigrationContext.configure(connection)
+                # Tables without a revision predate migrations; they need a manual stamp
+                unstamped = migrations.get_current_revision() is None
+                if unstamped and not inspect(connection).has_table("tasks"):
+                    Base.metadata.create_all(bind=connection)
+                    migrations.stamp(script, "head")
+
+
+def _build_router() -> Optional[ShardRouter]:
+    if not settings.TASK_SHARDS:
+        return None
+    engines = {name: create_database_engine(url) for name, url in settings.TASK_SHARDS.items()}
+    return ShardRouter(engines, vnodes=settings.TASK_SHARD_VNODES)
+
+
+# None when TASK_SHARDS is empty and tasks live in the primary database
+shard_router = _build_router()
@@ -0,0 +1,109 @@
+"""
+Group-commit write batching.
+
+Callers hand a write to ``WriteBatcher.submit`` and block until it is durable.
+A single writer thread collects queued writes until either ``max_batch_size``
+items are waiting or ``max_delay_ms`` has passed since the first one arrived,
+applies them on one session and commits once, so a burst of N writes pays for
+one commit (and one fsync) instead of N.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import DATABASE_NAME, database_name
+from app.utils.exceptions import TaskManagementException
+
+logger = logging.getLogger(__name__)
+
+_Write = Tuple[Tuple[Any, ...], "Future[Any]"]
+
+
+class WriteBatcher:
+    """Coalesce writes from many threads into shared transactions."""
+
+    def __init__(
+        self,
+        session_factory: "sessionmaker[Session]",
+        apply: Callable[..., Any],
+        max_batch_size: int,
+        max_delay_ms: float,
+        name: str = "write-batcher",
+    ) -> None:
+        self.session_factory = session_factory
+        self.apply = apply
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+        self._queue: "queue.Queue[Optional[_Write]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, *args: Any) -> Any:
+        """Queue ``apply(db, *args)`` and wait for the batch holding it to commit."""
+        future: "Future[Any]" = Future()
+        self._queue.put((args, future))
+        return future.result()
+
+    def stop(self) -> None:
+        """Flush anything still queued and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            stopping = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch: List[_Write]) -> None:
+        applied = []
+        with self.session_factory() as db:
+            try:
+                for args, future in batch:
+                    try:
+                        applied.append((self.apply(db, *args), future))
+                    except TaskManagementException as e:
+                        future.set_exception(e)
+                db.commit()
+            except Exception as e:
+                logger.exception("Batched commit of %d writes failed", len(batch))
+                db.rollback()
+                for args, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        for result, future in applied:
+            future.set_result(result)
+
+
+def batch_session_factory(db: Session) -> "sessionmaker[Session]":
+    """Session factory for a writer thread sharing ``db``'s engine."""
+    return sessionmaker(
+        bind=db.get_bind(),
+        autoflush=False,
+        expire_on_commit=False,
+        info={DATABASE_NAME: database_name(db)},
+    )
@@ -1,7 +1,21 @@
 """
 CRUD package initialization.
 """
+from app.crud.analytics import TaskAnalyticsCRUD, get_task_analytics_crud
+from app.crud.idempotency import IdempotencyCRUD, get_idempotency_crud
+from app.crud.outbox import OutboxCRUD, get_outbox_crud
 from app.crud.task import TaskCRUD, get_task_crud
 from app.crud.user import UserCRUD, get_user_crud
 
-__all__ = ["UserCRUD", "get_user_crud", "TaskCRUD", "get_task_crud"]
+__all__ = [
+    "UserCRUD",
+    "get_user_crud",
+    "TaskCRUD",
+    "get_task_crud",
+    "IdempotencyCRUD",
+    "get_idempotency_crud",
+    "OutboxCRUD",
+    "get_outbox_crud",
+    "TaskAnalyticsCRUD",
+    "get_task_analytics_crud",
+]
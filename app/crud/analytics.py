@@ -0,0 +1,434 @@
+"""
+Rollups of task status history and the analytics read from them.
+
+``roll_up`` folds new ``task_status_events`` into per-user daily counts and
+duration histograms, in batches, each committed together with the cursor
+position it reached. Analytics queries only read those rollups.
+
+Leaderboards read ``user_task_counts``, which task writes keep current, from
+the head of a per-count index: the top ``k`` users cost O(k) per database plus
+a k-way merge across shards, however many users there are. The activity
+leaderboard of the last ``ACTIVITY_WINDOW_DAYS`` days reads ``user_activity``
+the same way; the rollup keeps it current.
+"""
+import heapq
+import itertools
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import DefaultDict, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, delete, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.database import on_primary
+from app.core.sharding import shard_router
+from app.crud.task import TaskCRUD
+from app.models.analytics import (
+    RollupCursor,
+    TaskDailyStats,
+    TaskDurationHistogram,
+    TaskStatusEvent,
+    UserActivity,
+    UserTaskCounts,
+)
+from app.models.task import TaskStatus
+from app.utils.chunks import chunked
+from app.utils.exceptions import ConflictError
+from app.utils.histogram import bucket_of, percentile
+
+STATUS_EVENTS_CURSOR = "task_status_events"
+# First day of the window user_activity counts
+ACTIVITY_WINDOW_CURSOR = "user_activity"
+# Window of the activity leaderboard kept in user_activity; others sum the daily rollups
+ACTIVITY_WINDOW_DAYS = 7
+LEAD_TIME = "lead"
+CYCLE_TIME = "cycle"
+
+DAILY_ACTIVITY = TaskDailyStats.created + TaskDailyStats.started + TaskDailyStats.completed
+
+# Leaderboards over the maintained per-user counters
+LEADERBOARD_COUNTS = {
+    "open": UserTaskCounts.open_tasks,
+    "in_progress": UserTaskCounts.in_progress_tasks,
+    "completed": UserTaskCounts.done_tasks,
+}
+
+
+class DailyStats(NamedTuple):
+    """Transitions of one user's tasks on one day."""
+
+    day: date
+    created: int
+    started: int
+    completed: int
+
+
+@dataclass(frozen=True)
+class DurationStats:
+    """Percentiles of lead or cycle time, in seconds."""
+
+    count: int
+    p50: Optional[float]
+    p90: Optional[float]
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    """A user's place on a leaderboard."""
+
+    user_id: int
+    count: int
+
+
+def completion_durations(
+    history: Sequence[TaskStatusEvent],
+) -> Dict[int, Tuple[Optional[float], Optional[float]]]:
+    """
+    Lead and cycle time of every completion in one task's history.
+
+    A task's work starts at its creation, or when it is reopened after being
+    DONE. Lead time runs from there to DONE; cycle time from the first move to
+    IN_PROGRESS after it. Either is None if its start is not in ``history``.
+    A creation event discards any earlier unfinished work, which belongs to a
+    deleted task that had the same id.
+
+    Args:
+        history: The task's events in id order
+
+    Returns:
+        (lead, cycle) seconds keyed by the id of each event moving to DONE
+    """
+    durations: Dict[int, Tuple[Optional[float], Optional[float]]] = {}
+    started_at: Optional[datetime] = None
+    in_progress_at: Optional[datetime] = None
+    for event in history:
+        if event.to_status == TaskStatus.DONE:
+            done_at = event.occurred_at
+            durations[event.id] = (
+                (done_at - started_at).total_seconds() if started_at else None,
+                (done_at - in_progress_at).total_seconds() if in_progress_at else None,
+            )
+            started_at = in_progress_at = None
+            continue
+        if event.from_status is None:
+            # A creation starts a new task, even if a deleted task had its id
+            started_at, in_progress_at = event.occurred_at, None
+        elif event.from_status == TaskStatus.DONE:
+            started_at = event.occurred_at
+        if event.to_status == TaskStatus.IN_PROGRESS and in_progress_at is None:
+            in_progress_at = event.occurred_at
+    return durations
+
+
+class TaskAnalyticsCRUD(TaskCRUD):
+    """Status history rollups and analytics, placed on shards like tasks."""
+
+    @on_primary
+    def roll_up(self, batch_size: int = 1000) -> int:
+        """
+        Fold status events not rolled up yet into the daily rollups.
+
+        Returns:
+            Number of events rolled up
+
+        Raises:
+            ConflictError: If another rollup moved the cursor concurrently
+        """
+        rolled_up = 0
+        today = datetime.utcnow().date()
+        for db in self._databases():
+            window_start = self._advance_activity_window(db, today)
+            while True:
+                count = self._roll_up_batch(db, batch_size, window_start)
+                if not count:
+                    break
+                rolled_up += count
+        return rolled_up
+
+    @staticmethod
+    def _advance_activity_window(db: Session, today: date) -> date:
+        """
+        Move the ``user_activity`` window to end on ``today`` and return its first day.
+
+        The days that left the window are subtracted from the counters. On the
+        first run the counters are built from the daily rollups.
+
+        Raises:
+            ConflictError: If another rollup moved the window concurrently
+        """
+        start = today - timedelta(days=ACTIVITY_WINDOW_DAYS - 1)
+        cursor = db.get(RollupCursor, ACTIVITY_WINDOW_CURSOR)
+        if cursor is not None and cursor.position >= start.toordinal():
+            db.rollback()
+            return date.fromordinal(cursor.position)
+
+        if cursor is None:
+            # First run: build the counters from the daily rollups
+            db.execute(delete(UserActivity))
+            activity = func.sum(DAILY_ACTIVITY)
+            db.execute(
+                insert(UserActivity).from_select(
+                    ["user_id", "activity"],
+                    select(TaskDailyStats.user_id, activity)
+                    .where(TaskDailyStats.day >= start)
+                    .group_by(TaskDailyStats.user_id)
+                    .having(activity > 0),
+                )
+            )
+            db.add(RollupCursor(name=ACTIVITY_WINDOW_CURSOR, position=start.toordinal()))
+        else:
+            left = (
+                TaskDailyStats.day >= date.fromordinal(cursor.position),
+                TaskDailyStats.day < start,
+            )
+            dropped = (
+                select(func.sum(DAILY_ACTIVITY))
+                .where(TaskDailyStats.user_id == UserActivity.user_id, *left)
+                .scalar_subquery()
+            )
+            db.execute(
+                update(UserActivity)
+                .where(UserActivity.user_id.in_(select(TaskDailyStats.user_id).where(*left)))
+                .values(activity=UserActivity.activity - dropped)
+                .execution_options(synchronize_session=False)
+            )
+            db.execute(delete(UserActivity).where(UserActivity.activity <= 0))
+            moved = db.execute(
+                update(RollupCursor)
+                .where(
+                    RollupCursor.name == ACTIVITY_WINDOW_CURSOR,
+                    RollupCursor.position == cursor.position,
+                )
+                .values(position=start.toordinal())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if moved != 1:
+                db.rollback()
+                raise ConflictError("Another rollup of task status events is running")
+        db.commit()
+        return start
+
+    def _roll_up_batch(self, db: Session, batch_size: int, window_start: date) -> int:
+        cursor = db.get(RollupCursor, STATUS_EVENTS_CURSOR)
+        position = cursor.position if cursor else 0
+        # SQLite has a single writer, so ids become visible in increasing order
+        # and nothing can appear behind the cursor later
+        events = db.scalars(
+            select(TaskStatusEvent)
+            .where(TaskStatusEvent.id > position)
+            .order_by(TaskStatusEvent.id)
+            .limit(batch_size)
+        ).all()
+        if not events:
+            db.rollback()
+            return 0
+        last_id = events[-1].id
+
+        daily: DefaultDict[Tuple[int, date], List[int]] = defaultdict(lambda: [0, 0, 0])
+        histogram: DefaultDict[Tuple[int, str, date, int], int] = defaultdict(int)
+        activity: DefaultDict[int, int] = defaultdict(int)
+        completed = [event for event in events if event.to_status == TaskStatus.DONE]
+        durations = self._durations(db, completed, last_id)
+        for event in events:
+            counts = daily[event.user_id, event.occurred_at.date()]
+            if event.from_status is None:
+                counts[0] += 1
+            if event.to_status == TaskStatus.IN_PROGRESS:
+                counts[1] += 1
+            if event.to_status == TaskStatus.DONE:
+                counts[2] += 1
+        for (user_id, day), (created, started, done) in daily.items():
+            # Days before the window are not counted, so they are not taken out later either
+            if day >= window_start and created + started + done:
+                activity[user_id] += created + started + done
+        for event in completed:
+            for metric, seconds in zip((LEAD_TIME, CYCLE_TIME), durations[event.id]):
+                if seconds is not None:
+                    key = (event.user_id, metric, event.occurred_at.date(), bucket_of(seconds))
+                    histogram[key] += 1
+
+        stmt = sqlite_insert(TaskDailyStats).values(
+            [
+                {"user_id": user_id, "day": day, "created": c, "started": s, "completed": d}
+                for (user_id, day), (c, s, d) in daily.items()
+            ]
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[TaskDailyStats.user_id, TaskDailyStats.day],
+                set_={
+                    column: getattr(TaskDailyStats, column) + stmt.excluded[column]
+                    for column in ("created", "started", "completed")
+                },
+            )
+        )
+        if histogram:
+            stmt = sqlite_insert(TaskDurationHistogram).values(
+                [
+                    {"user_id": user_id, "day": day, "metric": metric, "bucket": bucket, "count": n}
+                    for (user_id, metric, day, bucket), n in histogram.items()
+                ]
+            )
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[
+                        TaskDurationHistogram.user_id,
+                        TaskDurationHistogram.day,
+                        TaskDurationHistogram.metric,
+                        TaskDurationHistogram.bucket,
+                    ],
+                    set_={"count": TaskDurationHistogram.count + stmt.excluded.count},
+                )
+            )
+
+        if activity:
+            stmt = sqlite_insert(UserActivity).values(
+                [{"user_id": user_id, "activity": n} for user_id, n in activity.items()]
+            )
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[UserActivity.user_id],
+                    set_={"activity": UserActivity.activity + stmt.excluded.activity},
+                )
+            )
+
+        if cursor is None:
+            db.add(RollupCursor(name=STATUS_EVENTS_CURSOR, position=last_id))
+        else:
+            moved = db.execute(
+                update(RollupCursor)
+                .where(RollupCursor.name == STATUS_EVENTS_CURSOR, RollupCursor.position == position)
+                .values(position=last_id)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if moved != 1:
+                db.rollback()
+                raise ConflictError("Another rollup of task status events is running")
+        db.commit()
+        return len(events)
+
+    @staticmethod
+    def _durations(
+        db: Session, completed: Sequence[TaskStatusEvent], last_id: int
+    ) -> Dict[int, Tuple[Optional[float], Optional[float]]]:
+        """Lead and cycle time of each event in ``completed``, keyed by event id."""
+        durations: Dict[int, Tuple[Optional[float], Optional[float]]] = {}
+        task_ids = list(dict.fromkeys(event.task_id for event in completed))
+        for chunk in chunked(task_ids):
+            history: DefaultDict[int, List[TaskStatusEvent]] = defaultdict(list)
+            for event in db.scalars(
+                select(TaskStatusEvent)
+                .where(TaskStatusEvent.task_id.in_(chunk), TaskStatusEvent.id <= last_id)
+                .order_by(TaskStatusEvent.task_id, TaskStatusEvent.id)
+            ):
+                history[event.task_id].append(event)
+            for events in history.values():
+                durations.update(completion_durations(events))
+        return durations
+
+    def get_daily_stats(self, user_id: int, start: date, end: date) -> List[DailyStats]:
+        """Rolled-up transitions of a user's tasks for every day from ``start`` to ``end``."""
+        db = self._db_for_user(user_id)
+        rows = {
+            row.day: row
+            for row in db.scalars(
+                select(TaskDailyStats).where(
+                    TaskDailyStats.user_id == user_id,
+                    TaskDailyStats.day >= start,
+                    TaskDailyStats.day <= end,
+                )
+            )
+        }
+        days = []
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            row = rows.get(day)
+            if row is None:
+                days.append(DailyStats(day, 0, 0, 0))
+            else:
+                days.append(DailyStats(day, row.created, row.started, row.completed))
+        return days
+
+    def get_durations(self, user_id: int, start: date, end: date) -> Dict[str, DurationStats]:
+        """Lead and cycle time percentiles of tasks completed from ``start`` to ``end``."""
+        db = self._db_for_user(user_id)
+        counts: Dict[str, Dict[int, int]] = {LEAD_TIME: {}, CYCLE_TIME: {}}
+        rows = db.execute(
+            select(
+                TaskDurationHistogram.metric,
+                TaskDurationHistogram.bucket,
+                func.sum(TaskDurationHistogram.count),
+            )
+            .where(
+                TaskDurationHistogram.user_id == user_id,
+                TaskDurationHistogram.day >= start,
+                TaskDurationHistogram.day <= end,
+            )
+            .group_by(TaskDurationHistogram.metric, TaskDurationHistogram.bucket)
+        )
+        for metric, bucket, count in rows:
+            counts[metric][bucket] = count
+        return {
+            metric: DurationStats(
+                sum(buckets.values()), percentile(buckets, 50), percentile(buckets, 90)
+            )
+            for metric, buckets in counts.items()
+        }
+
+    def top_users(self, count: str, limit: int) -> List[LeaderboardEntry]:
+        """Users with the most tasks by one of ``LEADERBOARD_COUNTS``, newest user first on ties."""
+        column = LEADERBOARD_COUNTS[count]
+        query = (
+            select(UserTaskCounts.user_id, column)
+            .where(column > 0)
+            # Both descending: a backward walk of the count's index, no sort
+            .order_by(column.desc(), UserTaskCounts.user_id.desc())
+            .limit(limit)
+        )
+        return self._merge_top(query, limit)
+
+    def most_active_users(self, days: int, limit: int) -> List[LeaderboardEntry]:
+        """
+        Users with the most task transitions (created, started, completed) in ``days`` days.
+
+        Reads the rollups, so only activity that has been rolled up counts. The
+        last ``ACTIVITY_WINDOW_DAYS`` days are read from the ``user_activity``
+        index like the other leaderboards; other windows sum the daily rollups
+        of every user active in them.
+        """
+        if days == ACTIVITY_WINDOW_DAYS:
+            query = (
+                select(UserActivity.user_id, UserActivity.activity)
+                .where(UserActivity.activity > 0)
+                # Both descending: a backward walk of the activity index, no sort
+                .order_by(UserActivity.activity.desc(), UserActivity.user_id.desc())
+                .limit(limit)
+            )
+            return self._merge_top(query, limit)
+
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        activity = func.sum(DAILY_ACTIVITY)
+        query = (
+            select(TaskDailyStats.user_id, activity)
+            .where(TaskDailyStats.day >= since)
+            .group_by(TaskDailyStats.user_id)
+            .having(activity > 0)
+            .order_by(activity.desc(), TaskDailyStats.user_id.desc())
+            .limit(limit)
+        )
+        return self._merge_top(query, limit)
+
+    def _merge_top(self, query: Select[Tuple[int, int]], limit: int) -> List[LeaderboardEntry]:
+        """Run a per-database top-``limit`` query everywhere and merge the results."""
+        per_database = [
+            [LeaderboardEntry(*row) for row in db.execute(query)] for db in self._databases()
+        ]
+        merged = heapq.merge(*per_database, key=lambda entry: (-entry.count, -entry.user_id))
+        return list(itertools.islice(merged, limit))
+
+
+def get_task_analytics_crud(db: Session) -> TaskAnalyticsCRUD:
+    """Factory function to get TaskAnalyticsCRUD instance."""
+    return TaskAnalyticsCRUD(db, shards=shard_router)
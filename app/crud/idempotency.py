@@ -0,0 +1,79 @@
+"""
+CRUD operations for stored Idempotency-Key responses.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import commit, on_primary
+from app.models.idempotency import IdempotencyKey
+
+
+class IdempotencyCRUD:
+    """CRUD operations for IdempotencyKey model."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    @on_primary
+    def get(self, key: str) -> Optional[IdempotencyKey]:
+        """Get a completed record by key, discarding it if it has expired."""
+        record = self.db.get(IdempotencyKey, key)
+        # Pending records are only committed with their response, so a pending
+        # one was left behind by a request that never finished
+        if record is not None and (
+            record.expires_at <= datetime.utcnow() or record.response_body is None
+        ):
+            self.db.delete(record)
+            self.db.commit()
+            return None
+        return record
+
+    @on_primary
+    def reserve(self, key: str, fingerprint: str) -> Optional[IdempotencyKey]:
+        """
+        Insert a pending record in the current transaction, claiming the key.
+
+        The insert takes the write lock, so a duplicate request elsewhere waits
+        until this transaction ends. Returns None if another request stored
+        the key first.
+        """
+        now = datetime.utcnow()
+        record = IdempotencyKey(
+            key=key,
+            fingerprint=fingerprint,
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        )
+        self.db.add(record)
+        try:
+            commit(self.db)
+        except IntegrityError:
+            self.db.rollback()
+            return None
+        return record
+
+    @on_primary
+    def complete(self, record: IdempotencyKey, status_code: int, response_body: str) -> None:
+        """Store the final response for a reserved key."""
+        record.status_code = status_code
+        record.response_body = response_body
+        commit(self.db)
+
+    @on_primary
+    def purge_expired(self) -> int:
+        """Delete all expired records and return how many were removed."""
+        result = self.db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow())
+        )
+        self.db.commit()
+        return result.rowcount
+
+
+def get_idempotency_crud(db: Session) -> IdempotencyCRUD:
+    """Factory function to get IdempotencyCRUD instance."""
+    return IdempotencyCRUD(db)
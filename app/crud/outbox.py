@@ -0,0 +1,154 @@
+"""
+CRUD operations for the transactional outbox.
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.core.database import on_primary
+from app.models.outbox import OutboxMessage
+
+
+class OutboxCRUD:
+    """CRUD operations for OutboxMessage model."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    @on_primary
+    def add(
+        self,
+        event_type: str,
+        aggregate_type: str,
+        aggregate: Any,
+        render: Callable[[], Dict[str, Any]],
+    ) -> None:
+        """
+        Record a change to ``aggregate`` in the current transaction without committing.
+
+        Does nothing while no ``OUTBOX_SINK`` is configured, so the table
+        only grows when a dispatcher is draining it. Changes made meanwhile
+        are never recorded, so a sink configured later does not receive them.
+        """
+        if not settings.OUTBOX_SINK:
+            return
+        # The payload needs database-generated ids and timestamps
+        self.db.flush()
+        self.db.add(
+            OutboxMessage(
+                event_type=event_type,
+                aggregate_type=aggregate_type,
+                aggregate_id=aggregate.id,
+                payload=json.dumps(render(), separators=(",", ":")),
+            )
+        )
+
+    @on_primary
+    def claim(self, limit: int, lease_seconds: float) -> List[OutboxMessage]:
+        """
+        Claim up to ``limit`` due messages, oldest first.
+
+        Claimed messages are hidden from other dispatchers for
+        ``lease_seconds``, after which they are retried unless delivered.
+        A message waits while an earlier one of its aggregate is claimed or
+        backing off, so each aggregate's messages are delivered in order
+        (messages given up on no longer hold the later ones back).
+        """
+        now = datetime.utcnow()
+        earlier = aliased(OutboxMessage)
+        held_back = exists().where(
+            earlier.aggregate_type == OutboxMessage.aggregate_type,
+            earlier.aggregate_id == OutboxMessage.aggregate_id,
+            earlier.id < OutboxMessage.id,
+            earlier.dead_at.is_(None),
+            earlier.available_at > now,
+        )
+        due = (
+            select(OutboxMessage.id)
+            .where(
+                OutboxMessage.dead_at.is_(None),
+                OutboxMessage.available_at <= now,
+                ~held_back,
+            )
+            .order_by(OutboxMessage.id)
+            .limit(limit)
+        )
+        messages = self.db.scalars(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(due))
+            .values(
+                available_at=now + timedelta(seconds=lease_seconds),
+                attempts=OutboxMessage.attempts + 1,
+            )
+            .returning(OutboxMessage),
+            execution_options={"synchronize_session": False},
+        ).all()
+        # Detach before committing so reading the claimed rows needs no refresh
+        for message in messages:
+            self.db.expunge(message)
+        self.db.commit()
+        return sorted(messages, key=lambda message: message.id)
+
+    @on_primary
+    def delete_delivered(self, ids: Sequence[int]) -> None:
+        """Prune delivered messages."""
+        if ids:
+            self.db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(ids)))
+            self.db.commit()
+
+    @on_primary
+    def fail(self, failures: Sequence[Tuple[int, str, Optional[datetime]]]) -> None:
+        """
+        Record failed deliveries as (id, error, retry_at) tuples.
+
+        Each message is retried at ``retry_at``, or given up on when that is None.
+        """
+        if not failures:
+            return
+        now = datetime.utcnow()
+        self.db.execute(
+            update(OutboxMessage),
+            [
+                {
+                    "id": id,
+                    "last_error": error,
+                    "available_at": retry_at or now,
+                    "dead_at": None if retry_at else now,
+                }
+                for id, error, retry_at in failures
+            ],
+        )
+        self.db.commit()
+
+    @on_primary
+    def purge_dead(self, older_than: datetime) -> int:
+        """Delete messages given up on before ``older_than``; returns how many."""
+        result = self.db.execute(
+            delete(OutboxMessage).where(
+                OutboxMessage.dead_at.is_not(None), OutboxMessage.dead_at < older_than
+            )
+        )
+        self.db.commit()
+        return result.rowcount
+
+    @on_primary
+    def backlog(self) -> Tuple[int, Optional[datetime]]:
+        """Number of undelivered messages and the creation time of the oldest one."""
+        count, oldest = self.db.execute(
+            select(func.count(OutboxMessage.id), func.min(OutboxMessage.created_at)).where(
+                OutboxMessage.dead_at.is_(None)
+            )
+        ).one()
+        return count, oldest
+
+    def count_dead(self) -> int:
+        return self.db.query(OutboxMessage).filter(OutboxMessage.dead_at.is_not(None)).count()
+
+
+def get_outbox_crud(db: Session) -> OutboxCRUD:
+    """Factory function to get OutboxCRUD instance."""
+    return OutboxCRUD(db)
@@ -1,22 +1,311 @@
 """
 CRUD operations for Task model.
 """
-from typing import List, Optional
+import heapq
+import itertools
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
 
+from sqlalchemy import (
+    Select,
+    bindparam,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
-from app.models.task import Task, TaskStatus
+from app.core.cache import invalidate_on_commit, task_cache, task_list_cache
+from app.core.config import settings
+from app.core.database import commit, commit_deferred, database_name, on_primary
+from app.core.events import TASK_CREATED, TASK_DELETED, TASK_UPDATED, queue_event
+from app.core.sharding import ShardRouter, shard_router
+from app.core.write_batcher import WriteBatcher, batch_session_factory
+from app.crud.outbox import get_outbox_crud
+from app.crud.task_filter import TaskFilter
+from app.models.analytics import (
+    TaskDailyStats,
+    TaskDurationHistogram,
+    TaskStatusEvent,
+    UserActivity,
+    UserTaskCounts,
+)
+from app.models.shard import TaskLocation, UserShard
+from app.models.sync import ChangeSequence, TaskTombstone
+from app.models.tag import Tag, TaskTag
+from app.models.task import (
+    HIGHEST_PRIORITY,
+    LOWEST_PRIORITY,
+    OPEN_TASK,
+    ArchivedTask,
+    Task,
+    TaskStatus,
+)
 from app.models.user import User
+from app.schemas.task import Task as TaskSchema
 from app.schemas.task import TaskCreate, TaskStatusUpdate, TaskUpdate
-from app.utils.exceptions import NotFoundError
+from app.utils.chunks import chunked
+from app.utils.exceptions import ConflictError, NotFoundError, ValidationError
+from app.utils.sync_token import decode_sync_token, encode_sync_token
+
+# Columns copied verbatim from tasks into archived_tasks
+ARCHIVED_COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "status",
+    "user_id",
+    "created_at",
+    "updated_at",
+    "due_at",
+    "priority",
+    "version",
+)
+
+# Statements of the hot paths, built once with bound parameters. SQLAlchemy
+# memoizes the cache key of a statement object, so a call only binds values
+# and looks up the compiled SQL instead of building and hashing a new query.
+TASK_BY_ID = select(Task).where(Task.id == bindparam("task_id")).limit(1)
+TASKS_BY_USER = (
+    select(Task)
+    .where(Task.user_id == bindparam("user_id"))
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+ALL_TASKS_BY_USER = (
+    select(Task).where(Task.user_id == bindparam("user_id")).offset(bindparam("skip"))
+)
+# Live and archived tasks, which listings with include_archived read together
+TASK_MODELS: Sequence[Any] = (Task, ArchivedTask)
+# GET /users/{user_id}/tasks/ without filters, sort or field selection
+DEFAULT_TASK_FILTER = TaskFilter()
+TASK_LIST_BY_USER = (
+    select(Task)
+    .where(Task.user_id == bindparam("user_id"))
+    .order_by(*DEFAULT_TASK_FILTER.order_by(Task))
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+COUNT_BY_USER = select(func.count()).select_from(Task).where(Task.user_id == bindparam("user_id"))
+COUNT_BY_STATUS = (
+    select(func.count())
+    .select_from(Task)
+    .where(Task.user_id == bindparam("user_id"), Task.status == bindparam("status"))
+)
+COUNT_ARCHIVED = (
+    select(func.count())
+    .select_from(ArchivedTask)
+    .where(ArchivedTask.user_id == bindparam("user_id"))
+)
+# Both read ix_tasks_next_up: the queue in index order, stopping after n rows,
+# and the overdue count as one range per priority over the dated open tasks
+NEXT_UP = (
+    select(Task)
+    .where(Task.user_id == bindparam("user_id"), OPEN_TASK)
+    .order_by(Task.priority, Task.due_at.is_(None), Task.due_at, Task.id)
+    .limit(bindparam("n"))
+)
+COUNT_OVERDUE = (
+    select(func.count())
+    .select_from(Task)
+    .where(
+        Task.user_id == bindparam("user_id"),
+        OPEN_TASK,
+        Task.priority.in_(list(range(HIGHEST_PRIORITY, LOWEST_PRIORITY + 1))),
+        Task.due_at.is_(None) == literal_column("0"),
+        Task.due_at < bindparam("now"),
+    )
+)
+# Every task update is one compare-and-set: the UPDATE applies only while the
+# row is at the version read, or the version the client expects, and returns
+# the updated task
+TASK_VERSION = select(Task.version, Task.status).where(Task.id == bindparam("task_id"))
+UPDATE_TASK = (
+    update(Task)
+    .where(Task.id == bindparam("task_id"), Task.version == bindparam("read_version"))
+    .values(version=Task.version + 1)
+    .returning(Task)
+)
+# Loaded from the RETURNING row, refreshing the task if already in the session
+SET_TASK_STATUS = (
+    select(Task)
+    .from_statement(
+        UPDATE_TASK.values(change_seq=bindparam("change_seq"), status=bindparam("status"))
+    )
+    .execution_options(populate_existing=True)
+)
+NEXT_CHANGE_SEQ = (
+    sqlite_insert(ChangeSequence)
+    .values(id=1, value=1, pruned_through=0)
+    .on_conflict_do_update(
+        index_elements=[ChangeSequence.id], set_={"value": ChangeSequence.value + 1}
+    )
+    .returning(ChangeSequence.value)
+)
+COUNT_COLUMNS = ("open_tasks", "in_progress_tasks", "done_tasks")
+# Executed with the user_id and the deltas of COUNT_COLUMNS as parameters; an
+# existing row gets the deltas added to its counts
+_add_counts = sqlite_insert(UserTaskCounts)
+ADD_COUNTS = _add_counts.on_conflict_do_update(
+    index_elements=[UserTaskCounts.user_id],
+    set_={
+        column: getattr(UserTaskCounts, column) + _add_counts.excluded[column]
+        for column in COUNT_COLUMNS
+    },
+)
+
+
+INSERT_TAGS = sqlite_insert(Tag).on_conflict_do_nothing(index_elements=[Tag.user_id, Tag.name])
+# Returns the tag of each pair added; pairs already there are skipped
+INSERT_TASK_TAGS = sqlite_insert(TaskTag).on_conflict_do_nothing().returning(TaskTag.tag_id)
+ADD_TAG_COUNT = (
+    update(Tag.__table__)
+    .where(Tag.id == bindparam("tag_id"))
+    .values(task_count=Tag.task_count + bindparam("delta"))
+)
+
+
+class ChangeBatch(NamedTuple):
+    """One page of the per-user change feed."""
+
+    changed: List[Task]
+    deleted: List[int]
+    next_token: str
+    has_more: bool
+    # True when the client's token could not be continued and this is a full resync
+    reset: bool
+
+
+def next_change_seq(db: Session) -> int:
+    """Allocate the next change sequence number inside the current transaction."""
+    # SQLite has a single writer, so numbers become visible in allocation order
+    return db.execute(NEXT_CHANGE_SEQ).scalar_one()
+
+
+def advance_change_seq(db: Session, value: int) -> None:
+    """Make sure the sequence never hands out numbers at or below ``value``."""
+    stmt = (
+        sqlite_insert(ChangeSequence)
+        .values(id=1, value=value, pruned_through=0)
+        .on_conflict_do_update(
+            index_elements=[ChangeSequence.id],
+            set_={"value": func.max(ChangeSequence.value, value)},
+        )
+    )
+    db.execute(stmt)
+
+
+class TagChange(NamedTuple):
+    """Result of adding tags to or removing them from tasks."""
+
+    # Task-tag pairs added or removed; pairs already as requested are not counted
+    changed: int
+    tags: List[Tag]
+
+
+def count_tag_changes(db: Session, tag_ids: Iterable[int], sign: int) -> None:
+    """Add ``sign`` to the task count of a tag for each time it appears in ``tag_ids``."""
+    deltas = Counter(tag_ids)
+    if deltas:
+        db.execute(
+            ADD_TAG_COUNT,
+            [{"tag_id": tag_id, "delta": sign * count} for tag_id, count in deltas.items()],
+        )
+
+
+def count_status_change(
+    db: Session, user_id: int, previous: Optional[TaskStatus], current: Optional[TaskStatus]
+) -> None:
+    """Move a task between the user's counters; None stands for no task."""
+    open_statuses = (TaskStatus.TODO, TaskStatus.IN_PROGRESS)
+    deltas = {
+        "open_tasks": (current in open_statuses) - (previous in open_statuses),
+        "in_progress_tasks": (current == TaskStatus.IN_PROGRESS)
+        - (previous == TaskStatus.IN_PROGRESS),
+        "done_tasks": (current == TaskStatus.DONE) - (previous == TaskStatus.DONE),
+    }
+    # An atomic increment, so concurrent writers never lose each other's counts
+    db.execute(ADD_COUNTS, {"user_id": user_id, **deltas})
 
 
 class TaskCRUD:
     """CRUD operations for Task model."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, shards: Optional[ShardRouter] = None):
         self.db = db
+        self.shards = shards
+
+    def _db_for_user(self, user_id: int) -> Session:
+        """Session on the database holding the user's tasks."""
+        if self.shards is None:
+            return self.db
+        placement = self.db.get(UserShard, user_id)
+        shard = placement.shard if placement else self.shards.ring_shard(user_id)
+        return self.shards.session(self.db, shard)
 
+    def _db_for_task(self, task_id: int) -> Optional[Session]:
+        """Session on the database holding the task, or None if the id is unknown."""
+        if self.shards is None:
+            return self.db
+        location = self.db.get(TaskLocation, task_id)
+        if location is None:
+            return None
+        return self.shards.session(self.db, location.shard)
+
+    def _databases(self) -> List[Session]:
+        """Sessions on every database holding tasks."""
+        if self.shards is None:
+            return [self.db]
+        return [self.shards.session(self.db, shard) for shard in self.shards.engines]
+
+    def _allocate_id(self, shards: ShardRouter, user_id: int) -> TaskLocation:
+        """Reserve a global task id on the user's shard, pinning the placement."""
+        placement = self.db.get(UserShard, user_id)
+        if placement is None:
+            placement = UserShard(user_id=user_id, shard=shards.ring_shard(user_id))
+            self.db.add(placement)
+        location = TaskLocation(user_id=user_id, shard=placement.shard)
+        self.db.add(location)
+        self.db.flush()
+        return location
+
+    def _publish(self, db: Session, task: Task, type: str, seq: Optional[int] = None) -> None:
+        """Record the change to ``task`` in the outbox and for live subscribers."""
+        if type == TASK_DELETED:
+            data = {"id": task.id, "user_id": task.user_id}
+            render = lambda: data  # noqa: E731
+        else:
+            render = lambda: TaskSchema.model_validate(task).model_dump(mode="json")  # noqa: E731
+        get_outbox_crud(db).add(type, "task", task, render)
+        queue_event(db, task.user_id, type, task.change_seq if seq is None else seq, render)
+        if type != TASK_CREATED:
+            invalidate_on_commit(db, task_cache, [task.id])
+        invalidate_on_commit(db, task_list_cache, [task.user_id])
+
+    @staticmethod
+    def _record_status(db: Session, task: Task, previous: Optional[TaskStatus]) -> None:
+        """Append the transition of ``task`` to its status history and count it."""
+        if task.id is None:
+            db.flush()
+        db.add(
+            TaskStatusEvent(
+                task_id=task.id,
+                user_id=task.user_id,
+                from_status=previous,
+                to_status=task.status,
+            )
+        )
+        count_status_change(db, task.user_id, previous, task.status)
+
+    @on_primary
     def create(self, task_data: TaskCreate, user_id: int) -> Task:
         """Create a new task for a user."""
         # Verify user exists
@@ -24,72 +313,675 @@ class TaskCRUD:
         if not user:
             raise NotFoundError(f"User with id {user_id} not found")
 
-        task = Task(title=task_data.title, description=task_data.description, user_id=user_id)
-        self.db.add(task)
-        self.db.commit()
-        self.db.refresh(task)
+        task = Task(
+            title=task_data.title,
+            description=task_data.description,
+            status=TaskStatus.TODO,
+            user_id=user_id,
+            due_at=task_data.due_at,
+            priority=task_data.priority,
+        )
+        location = None
+        if self.shards is not None:
+            location = self._allocate_id(self.shards, user_id)
+            task.id = location.id
+        db = self._db_for_user(user_id)
+        try:
+            task.change_seq = next_change_seq(db)
+            db.add(task)
+            self._record_status(db, task, None)
+            self._publish(db, task, TASK_CREATED)
+            commit(db)
+        except Exception:
+            # Free the reserved id so the directory never points at a missing task
+            if location is not None:
+                self.db.delete(location)
+                self.db.flush()
+            raise
+        if location is not None:
+            commit(self.db)
+        db.refresh(task)
         return task
 
     def get_by_id(self, task_id: int) -> Optional[Task]:
         """Get task by ID."""
-        return self.db.query(Task).filter(Task.id == task_id).first()
+        db = self._db_for_task(task_id)
+        if db is None:
+            return None
+        return db.scalars(TASK_BY_ID, {"task_id": task_id}).first()
+
+    def get_many(self, task_ids: Sequence[int]) -> List[Task]:
+        """Get tasks by id in the order given, skipping ids that do not exist."""
+        ids = list(dict.fromkeys(task_ids))
+        if self.shards is None:
+            by_database = {None: ids}
+        else:
+            by_database = {}
+            for chunk in chunked(ids):
+                locations = self.db.execute(
+                    select(TaskLocation.id, TaskLocation.shard).where(TaskLocation.id.in_(chunk))
+                )
+                for task_id, shard in locations:
+                    by_database.setdefault(shard, []).append(task_id)
+
+        found: Dict[int, Task] = {}
+        for shard, shard_ids in by_database.items():
+            db = self.db if self.shards is None else self.shards.session(self.db, shard)
+            for chunk in chunked(shard_ids):
+                tasks = db.scalars(select(Task).where(Task.id.in_(chunk)))
+                found.update((task.id, task) for task in tasks)
+        return [found[task_id] for task_id in ids if task_id in found]
+
+    def get_by_user_id(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: Optional[int] = 100,
+        include_archived: bool = False,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Any]:
+        """
+        Get all tasks for a specific user with pagination (``limit=None`` for all).
+
+        With ``columns``, only those columns are selected and plain rows are
+        returned instead of Task objects.
+        """
+        db = self._db_for_user(user_id)
+        if include_archived:
+            return list(self._with_archived(db, user_id, TaskFilter(), skip, limit, columns))
+        if columns is None:
+            if limit is None:
+                return list(db.scalars(ALL_TASKS_BY_USER, {"user_id": user_id, "skip": skip}))
+            params = {"user_id": user_id, "skip": skip, "limit": limit}
+            return list(db.scalars(TASKS_BY_USER, params))
+        query = self._select(columns).where(Task.user_id == user_id).offset(skip).limit(limit)
+        return list(self._fetch(db, query, columns))
+
+    def get_by_status(
+        self,
+        user_id: int,
+        status: TaskStatus,
+        include_archived: bool = False,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Any]:
+        """Get tasks by status for a specific user, optionally projected to ``columns``."""
+        db = self._db_for_user(user_id)
+        if include_archived:
+            return list(
+                self._with_archived(db, user_id, TaskFilter(statuses=(status,)), 0, None, columns)
+            )
+        query = self._select(columns).where(Task.user_id == user_id, Task.status == status)
+        return list(self._fetch(db, query, columns))
 
-    def get_by_user_id(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Task]:
-        """Get all tasks for a specific user with pagination."""
-        return self.db.query(Task).filter(Task.user_id == user_id).offset(skip).limit(limit).all()
+    def list_by_user(
+        self,
+        user_id: int,
+        task_filter: TaskFilter = TaskFilter(),
+        skip: int = 0,
+        limit: int = 100,
+        include_archived: bool = False,
+        columns: Optional[Sequence[str]] = None,
+        yield_per: Optional[int] = None,
+    ) -> Iterable[Any]:
+        """
+        Get one page of a user's tasks matching ``task_filter``, in its sort order.
 
-    def get_by_status(self, user_id: int, status: TaskStatus) -> List[Task]:
-        """Get tasks by status for a specific user."""
-        return self.db.query(Task).filter(Task.user_id == user_id, Task.status == status).all()
+        With ``yield_per``, the rows are fetched lazily in batches of that size
+        and an iterator is returned; it reads from the session as it is consumed.
+
+        Raises:
+            ValidationError: If the listing cannot be read in order from an
+                index and matches more than TASK_LIST_MAX_SORT_ROWS rows
+        """
+        db = self._db_for_user(user_id)
+        if task_filter.tags:
+            resolved = self._resolve_tags(db, user_id, task_filter, skip + limit)
+            if resolved is None:
+                return []
+            task_filter = resolved
+        if not task_filter.plan(include_archived).ordered:
+            models = TASK_MODELS if include_archived else TASK_MODELS[:1]
+            self._check_sort_size(db, user_id, task_filter, models)
+        if include_archived:
+            return self._with_archived(db, user_id, task_filter, skip, limit, columns, yield_per)
+        if task_filter == DEFAULT_TASK_FILTER and columns is None:
+            params = {"user_id": user_id, "skip": skip, "limit": limit}
+            return self._fetch(db, TASK_LIST_BY_USER, columns, yield_per, params)
+        query = (
+            self._select(columns)
+            .where(Task.user_id == user_id, *task_filter.conditions(Task))
+            .order_by(*task_filter.order_by(Task))
+            .offset(skip)
+            .limit(limit)
+        )
+        return self._fetch(db, query, columns, yield_per)
+
+    @staticmethod
+    def _resolve_tags(
+        db: Session, user_id: int, task_filter: TaskFilter, rows: Optional[int]
+    ) -> Optional[TaskFilter]:
+        """Match ``task_filter``'s tags by the user's tag ids, or None if nothing can match."""
+        tag_counts = db.execute(
+            select(Tag.id, Tag.task_count).where(
+                Tag.user_id == user_id, Tag.name.in_(task_filter.tags)
+            )
+        ).all()
+        total_tasks = db.scalar(
+            select(UserTaskCounts.open_tasks + UserTaskCounts.done_tasks).where(
+                UserTaskCounts.user_id == user_id
+            )
+        )
+        return task_filter.with_tags(
+            [(tag_id, count) for tag_id, count in tag_counts], total_tasks or 0, rows
+        )
+
+    @staticmethod
+    def _check_sort_size(
+        db: Session, user_id: int, task_filter: TaskFilter, models: Sequence[Any]
+    ) -> None:
+        """Refuse to sort more than TASK_LIST_MAX_SORT_ROWS rows without an index."""
+        cap = settings.TASK_LIST_MAX_SORT_ROWS
+        matching = 0
+        for model in models:
+            # Count no further than the cap so the check stays cheap
+            rows = (
+                select(model.id)
+                .where(model.user_id == user_id, *task_filter.conditions(model))
+                .limit(cap + 1)
+                .subquery()
+            )
+            matching += db.execute(select(func.count()).select_from(rows)).scalar_one()
+        if matching > cap:
+            raise ValidationError(
+                f"Sorting by {task_filter.sort} would sort more than {cap} tasks; "
+                f"narrow the filters or sort by a field they restrict"
+            )
+
+    @staticmethod
+    def _select(columns: Optional[Sequence[str]]) -> Select[Any]:
+        if columns is None:
+            return select(Task)
+        return select(*[getattr(Task, column) for column in columns])
+
+    @staticmethod
+    def _fetch(
+        db: Session,
+        query: Select[Any],
+        columns: Optional[Sequence[str]],
+        yield_per: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Iterable[Any]:
+        options = {} if yield_per is None else {"yield_per": yield_per}
+        rows: Iterable[Any]
+        if columns is None:
+            rows = db.scalars(query, params, execution_options=options)
+        else:
+            rows = db.execute(query, params, execution_options=options)
+        return rows if yield_per is not None else list(rows)
+
+    def _with_archived(
+        self,
+        db: Session,
+        user_id: int,
+        task_filter: TaskFilter,
+        skip: int,
+        limit: Optional[int],
+        columns: Optional[Sequence[str]] = None,
+        yield_per: Optional[int] = None,
+    ) -> Iterable[Any]:
+        """Rows from tasks and archived_tasks in ``task_filter``'s order, as plain rows."""
+        selected = ARCHIVED_COLUMNS if columns is None else columns
+        # The sort columns are always needed for the ordering
+        union_columns = list(dict.fromkeys(["id", task_filter.sort, *selected]))
+        parts = []
+        for model in TASK_MODELS:
+            query = select(*[getattr(model, column) for column in union_columns]).where(
+                model.user_id == user_id, *task_filter.conditions(model)
+            )
+            parts.append(query)
+        union = parts[0].union_all(parts[1]).subquery()
+        query = (
+            select(*[union.c[column] for column in selected])
+            .order_by(*task_filter.order_by(union.c))
+            .offset(skip)
+            .limit(limit)
+        )
+        return self._fetch(db, query, selected, yield_per)
 
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Task]:
         """Get all tasks with pagination."""
-        return self.db.query(Task).offset(skip).limit(limit).all()
+        if self.shards is None:
+            return self.db.query(Task).offset(skip).limit(limit).all()
+
+        # Each shard returns its first skip + limit tasks by id; merging those
+        # gives the same page a single database would
+        per_shard = [
+            db.query(Task).order_by(Task.id).limit(skip + limit).all() for db in self._databases()
+        ]
+        merged = heapq.merge(*per_shard, key=lambda task: task.id)
+        return list(itertools.islice(merged, skip, skip + limit))
 
+    @on_primary
     def update(self, task_id: int, task_data: TaskUpdate) -> Task:
-        """Update an existing task."""
-        task = self.get_by_id(task_id)
-        if not task:
+        """
+        Update an existing task, only if it is still at ``expected_version`` when given.
+
+        Raises:
+            NotFoundError: If the task does not exist
+            ConflictError: If the task is not at ``expected_version``
+        """
+        db = self._db_for_task(task_id)
+        if db is None:
             raise NotFoundError(f"Task with id {task_id} not found")
+        values = task_data.model_dump(exclude_unset=True, exclude={"expected_version"})
+        task = self._compare_and_set(db, task_id, values, task_data.expected_version)
+        commit(db)
+        db.refresh(task)
+        return task
 
-        update_data = task_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(task, field, value)
+    @on_primary
+    def update_status(self, task_id: int, status_data: TaskStatusUpdate) -> Task:
+        """Update task status, group-committed with other updates when batching is enabled."""
+        db = self._db_for_task(task_id)
+        if db is None:
+            raise NotFoundError(f"Task with id {task_id} not found")
+        # The batcher commits on its own session, outside a deferred-commit transaction
+        batcher = None if commit_deferred.get() else get_status_batcher(db)
+        if batcher is not None:
+            task: Task = batcher.submit(task_id, status_data.status, status_data.expected_version)
+            return task
 
-        self.db.commit()
-        self.db.refresh(task)
+        task = self._compare_and_set(
+            db, task_id, {"status": status_data.status}, status_data.expected_version
+        )
+        commit(db)
+        db.refresh(task)
         return task
 
-    def update_status(self, task_id: int, status_data: TaskStatusUpdate) -> Task:
-        """Update task status."""
-        task = self.get_by_id(task_id)
-        if not task:
+    @on_primary
+    def set_status(
+        self, task_id: int, status: TaskStatus, expected_version: Optional[int] = None
+    ) -> Task:
+        """Change task status in the current transaction without committing."""
+        db = self._db_for_task(task_id)
+        if db is None:
             raise NotFoundError(f"Task with id {task_id} not found")
+        return self._compare_and_set(db, task_id, {"status": status}, expected_version)
+
+    def _compare_and_set(
+        self, db: Session, task_id: int, values: Dict[str, Any], expected_version: Optional[int]
+    ) -> Task:
+        """
+        Apply ``values`` to a task with one UPDATE ... WHERE version = ? RETURNING.
+
+        The change sequence is taken first, which takes the write lock, so no
+        other write can land between a read and the UPDATE. With
+        ``expected_version`` the UPDATE is issued straight away and the row is
+        only read when it matched nothing, to tell a conflict from a missing
+        task. A status change still reads the previous status first, as
+        SQLite's RETURNING only reports the updated row.
 
-        task.status = status_data.status
-        self.db.commit()
-        self.db.refresh(task)
+        Raises:
+            NotFoundError: If the task does not exist
+            ConflictError: If the task is not at ``expected_version``
+        """
+        seq = next_change_seq(db)
+        previous = None
+        if expected_version is None or "status" in values:
+            previous = self._read_version(db, task_id, expected_version)
+        read_version = expected_version if previous is None else previous.version
+        params = {"task_id": task_id, "read_version": read_version}
+        if values.keys() == {"status"}:
+            statement = SET_TASK_STATUS
+            params.update(change_seq=seq, status=values["status"])
+        else:
+            # Loaded from the RETURNING row, refreshing the task if already in the session
+            statement = (
+                select(Task)
+                .from_statement(UPDATE_TASK.values(change_seq=seq, **values))
+                .execution_options(populate_existing=True)
+            )
+        task: Optional[Task] = db.scalars(statement, params).first()
+        if task is None:
+            # Raises, as the version read under the write lock was the one compared
+            self._read_version(db, task_id, expected_version)
+            raise ConflictError(f"Task {task_id} changed while being updated")
+
+        if previous is not None and task.status != previous.status:
+            self._record_status(db, task, previous.status)
+        self._publish(db, task, TASK_UPDATED)
         return task
 
+    @staticmethod
+    def _read_version(db: Session, task_id: int, expected_version: Optional[int]) -> Any:
+        """
+        Read the version and status of a task, checking ``expected_version``.
+
+        Raises:
+            NotFoundError: If the task does not exist
+            ConflictError: If the task is not at ``expected_version``
+        """
+        current = db.execute(TASK_VERSION, {"task_id": task_id}).first()
+        if current is None:
+            raise NotFoundError(f"Task with id {task_id} not found")
+        if expected_version is not None and current.version != expected_version:
+            raise ConflictError(
+                f"Task {task_id} is at version {current.version}, not {expected_version}"
+            )
+        return current
+
+    @on_primary
     def delete(self, task_id: int) -> bool:
         """Delete a task."""
-        task = self.get_by_id(task_id)
-        if not task:
+        db = self._db_for_task(task_id)
+        task = None if db is None else db.scalars(TASK_BY_ID, {"task_id": task_id}).first()
+        if db is None or task is None:
             raise NotFoundError(f"Task with id {task_id} not found")
 
-        self.db.delete(task)
-        self.db.commit()
+        # merge: SQLite may hand out the id of a deleted task again
+        tombstone = db.merge(
+            TaskTombstone(task_id=task.id, user_id=task.user_id, change_seq=next_change_seq(db))
+        )
+        self._publish(db, task, TASK_DELETED, seq=tombstone.change_seq)
+        count_status_change(db, task.user_id, task.status, None)
+        untagged = db.scalars(
+            delete(TaskTag).where(TaskTag.task_id == task.id).returning(TaskTag.tag_id)
+        )
+        count_tag_changes(db, untagged, -1)
+        db.delete(task)
+        commit(db)
+        if self.shards is not None:
+            self.db.query(TaskLocation).filter(TaskLocation.id == task_id).delete()
+            commit(self.db)
         return True
 
+    @on_primary
+    def delete_by_user(self, user_id: int) -> int:
+        """
+        Delete all tasks of a user.
+
+        The users.tasks cascade only reaches tasks in the primary database, so
+        this must run before a user is deleted when tasks are sharded.
+        """
+        db = self._db_for_user(user_id)
+        task_ids = db.scalars(select(Task.id).where(Task.user_id == user_id)).all()
+        invalidate_on_commit(db, task_cache, list(task_ids))
+        invalidate_on_commit(db, task_list_cache, [user_id])
+        deleted = db.query(Task).filter(Task.user_id == user_id).delete()
+        db.query(ArchivedTask).filter(ArchivedTask.user_id == user_id).delete()
+        db.query(TaskTombstone).filter(TaskTombstone.user_id == user_id).delete()
+        db.query(TaskTag).filter(
+            TaskTag.tag_id.in_(select(Tag.id).where(Tag.user_id == user_id))
+        ).delete(synchronize_session=False)
+        db.query(Tag).filter(Tag.user_id == user_id).delete()
+        models: Sequence[Any] = (
+            TaskStatusEvent,
+            TaskDailyStats,
+            TaskDurationHistogram,
+            UserActivity,
+            UserTaskCounts,
+        )
+        for model in models:
+            db.query(model).filter(model.user_id == user_id).delete()
+        commit(db)
+        if self.shards is not None:
+            self.db.query(TaskLocation).filter(TaskLocation.user_id == user_id).delete()
+            self.db.query(UserShard).filter(UserShard.user_id == user_id).delete()
+            commit(self.db)
+        return deleted
+
     def count_by_user(self, user_id: int) -> int:
         """Get total number of tasks for a user."""
-        return self.db.query(Task).filter(Task.user_id == user_id).count()
+        db = self._db_for_user(user_id)
+        return db.execute(COUNT_BY_USER, {"user_id": user_id}).scalar_one()
 
     def count_by_status(self, user_id: int, status: TaskStatus) -> int:
         """Get count of tasks by status for a user."""
-        return self.db.query(Task).filter(Task.user_id == user_id, Task.status == status).count()
+        db = self._db_for_user(user_id)
+        return db.execute(COUNT_BY_STATUS, {"user_id": user_id, "status": status}).scalar_one()
+
+    def next_up(self, user_id: int, n: int = 10) -> List[Task]:
+        """Get a user's ``n`` most pressing open tasks: by priority, then due date, undated last."""
+        db = self._db_for_user(user_id)
+        return list(db.scalars(NEXT_UP, {"user_id": user_id, "n": n}))
+
+    def count_overdue(self, user_id: int, now: datetime) -> int:
+        """Get number of a user's open tasks due before ``now``."""
+        db = self._db_for_user(user_id)
+        return db.execute(COUNT_OVERDUE, {"user_id": user_id, "now": now}).scalar_one()
+
+    def get_changes(self, user_id: int, token: Optional[str], limit: int = 100) -> ChangeBatch:
+        """
+        Get tasks created, updated or deleted since a sync token.
+
+        Without a token, or when the token cannot be continued (tombstones it
+        depends on were purged, or the user moved to another shard), the page
+        starts from the beginning and ``reset`` is set.
+        """
+        db = self._db_for_user(user_id)
+        database = database_name(db)
+        since, reset = -1, True
+        if token is not None:
+            token_database, token_seq = decode_sync_token(token)
+            sequence = db.get(ChangeSequence, 1)
+            pruned_through = sequence.pruned_through if sequence else 0
+            if token_database == database and token_seq >= pruned_through:
+                since, reset = token_seq, False
+
+        tasks = (
+            db.query(Task)
+            .filter(Task.user_id == user_id, Task.change_seq > since)
+            .order_by(Task.change_seq)
+            .limit(limit + 1)
+            .all()
+        )
+        tombstones = (
+            db.query(TaskTombstone)
+            .filter(TaskTombstone.user_id == user_id, TaskTombstone.change_seq > since)
+            .order_by(TaskTombstone.change_seq)
+            .limit(limit + 1)
+            .all()
+        )
+        rows: List[Any] = [tasks, tombstones]
+        merged = list(heapq.merge(*rows, key=lambda row: row.change_seq))
+        page = merged[:limit]
+        next_seq = page[-1].change_seq if page else max(since, 0)
+        return ChangeBatch(
+            changed=[row for row in page if isinstance(row, Task)],
+            deleted=[row.task_id for row in page if isinstance(row, TaskTombstone)],
+            next_token=encode_sync_token(database, next_seq),
+            has_more=len(merged) > limit,
+            reset=reset,
+        )
+
+    def get_change_token(self, user_id: int) -> str:
+        """Sync token at the newest change in the database holding the user's tasks."""
+        db = self._db_for_user(user_id)
+        sequence = db.get(ChangeSequence, 1)
+        return encode_sync_token(database_name(db), sequence.value if sequence else 0)
+
+    @on_primary
+    def purge_tombstones(self, older_than: datetime) -> int:
+        """Delete tombstones older than ``older_than``; clients behind them must resync."""
+        purged = 0
+        for db in self._databases():
+            condition = TaskTombstone.deleted_at < older_than
+            horizon = db.scalar(select(func.max(TaskTombstone.change_seq)).where(condition))
+            if horizon is None:
+                continue
+            # Every write takes a change_seq, so a tombstone implies the sequence row
+            sequence = db.get_one(ChangeSequence, 1)
+            sequence.pruned_through = max(sequence.pruned_through, horizon)
+            purged += db.execute(delete(TaskTombstone).where(condition)).rowcount
+            db.commit()
+        return purged
+
+    def count_archived(self, user_id: int) -> int:
+        """Get number of archived (always DONE) tasks for a user."""
+        db = self._db_for_user(user_id)
+        return db.execute(COUNT_ARCHIVED, {"user_id": user_id}).scalar_one()
+
+    def get_tags(self, user_id: int) -> List[Tag]:
+        """Get a user's tags, those on the most tasks first."""
+        db = self._db_for_user(user_id)
+        return list(
+            db.scalars(
+                select(Tag).where(Tag.user_id == user_id).order_by(Tag.task_count.desc(), Tag.name)
+            )
+        )
+
+    @on_primary
+    def tag_tasks(self, user_id: int, task_ids: Sequence[int], names: Sequence[str]) -> TagChange:
+        """
+        Add tags to tasks of a user in one transaction, creating missing tags.
+
+        Raises:
+            NotFoundError: If any of the tasks is not one of the user's
+        """
+        db = self._db_for_user(user_id)
+        task_ids = self._owned_task_ids(db, user_id, task_ids)
+        names = list(dict.fromkeys(names))
+        db.execute(INSERT_TAGS, [{"user_id": user_id, "name": name} for name in names])
+        tag_ids = [tag.id for tag in self._tags_named(db, user_id, names)]
+        added = db.scalars(
+            INSERT_TASK_TAGS,
+            [{"tag_id": tag_id, "task_id": task_id} for tag_id in tag_ids for task_id in task_ids],
+        ).all()
+        return self._finish_tag_change(db, user_id, names, added, 1)
+
+    @on_primary
+    def untag_tasks(self, user_id: int, task_ids: Sequence[int], names: Sequence[str]) -> TagChange:
+        """
+        Remove tags from tasks of a user in one transaction; unknown tags are ignored.
+
+        Raises:
+            NotFoundError: If any of the tasks is not one of the user's
+        """
+        db = self._db_for_user(user_id)
+        task_ids = self._owned_task_ids(db, user_id, task_ids)
+        names = list(dict.fromkeys(names))
+        tag_ids = [tag.id for tag in self._tags_named(db, user_id, names)]
+        removed: List[int] = []
+        if tag_ids:
+            for chunk in chunked(task_ids):
+                removed.extend(
+                    db.scalars(
+                        delete(TaskTag)
+                        .where(TaskTag.tag_id.in_(tag_ids), TaskTag.task_id.in_(chunk))
+                        .returning(TaskTag.tag_id)
+                        .execution_options(synchronize_session=False)
+                    )
+                )
+        return self._finish_tag_change(db, user_id, names, removed, -1)
+
+    def _finish_tag_change(
+        self, db: Session, user_id: int, names: List[str], tag_ids: Sequence[int], sign: int
+    ) -> TagChange:
+        """Count the pairs of ``tag_ids`` changed, commit and return the tags' new counts."""
+        count_tag_changes(db, tag_ids, sign)
+        if tag_ids:
+            # Tag filters of cached task pages may now match other tasks
+            invalidate_on_commit(db, task_list_cache, [user_id])
+        commit(db)
+        return TagChange(changed=len(tag_ids), tags=self._tags_named(db, user_id, names))
+
+    @staticmethod
+    def _tags_named(db: Session, user_id: int, names: List[str]) -> List[Tag]:
+        """The user's tags out of ``names``, in that order, read afresh from the database."""
+        tags = db.scalars(
+            select(Tag)
+            .where(Tag.user_id == user_id, Tag.name.in_(names))
+            .execution_options(populate_existing=True)
+        )
+        by_name = {tag.name: tag for tag in tags}
+        return [by_name[name] for name in names if name in by_name]
+
+    @staticmethod
+    def _owned_task_ids(db: Session, user_id: int, task_ids: Sequence[int]) -> List[int]:
+        """``task_ids`` without duplicates, checked to be tasks of the user."""
+        ids = list(dict.fromkeys(task_ids))
+        owned: Set[int] = set()
+        for chunk in chunked(ids):
+            owned.update(
+                db.scalars(select(Task.id).where(Task.user_id == user_id, Task.id.in_(chunk)))
+            )
+        missing = [task_id for task_id in ids if task_id not in owned]
+        if missing:
+            shown = ", ".join(map(str, missing[:10])) + (", ..." if len(missing) > 10 else "")
+            raise NotFoundError(f"Tasks not found for user {user_id}: {shown}")
+        return ids
+
+    @on_primary
+    def archive_done(self, older_than: datetime, batch_size: int = 500) -> int:
+        """
+        Move DONE tasks last updated before ``older_than`` into archived_tasks.
+
+        Works in batches of ``batch_size`` rows, each in its own transaction, so
+        the write lock is never held for long. Returns the number archived.
+        """
+        source = [Task.__table__.c[column] for column in ARCHIVED_COLUMNS]
+        archived = 0
+        for db in self._databases():
+            while True:
+                rows = db.execute(
+                    select(Task.id, Task.user_id)
+                    .where(Task.status == TaskStatus.DONE, Task.updated_at < older_than)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                ids = [row.id for row in rows]
+                db.execute(
+                    insert(ArchivedTask).from_select(
+                        [*ARCHIVED_COLUMNS, "archived_at"],
+                        select(*source, literal(datetime.utcnow())).where(Task.id.in_(ids)),
+                    )
+                )
+                db.execute(delete(Task).where(Task.id.in_(ids)))
+                invalidate_on_commit(db, task_cache, ids)
+                invalidate_on_commit(db, task_list_cache, list({row.user_id for row in rows}))
+                db.commit()
+                archived += len(ids)
+        return archived
 
 
 def get_task_crud(db: Session) -> TaskCRUD:
     """Factory function to get TaskCRUD instance."""
-    return TaskCRUD(db)
+    return TaskCRUD(db, shards=shard_router)
+
+
+_status_batchers: Dict[Engine, WriteBatcher] = {}
+_status_batchers_lock = threading.Lock()
+
+
+def _apply_status(
+    db: Session, task_id: int, status: TaskStatus, expected_version: Optional[int] = None
+) -> Task:
+    return TaskCRUD(db).set_status(task_id, status, expected_version)
+
+
+def get_status_batcher(db: Session) -> Optional[WriteBatcher]:
+    """Get the status write batcher for the session's engine, if batching is enabled."""
+    if not settings.STATUS_WRITE_BATCHING:
+        return None
+    bind = db.get_bind().engine
+    with _status_batchers_lock:
+        batcher = _status_batchers.get(bind)
+        if batcher is None:
+            batcher = _status_batchers[bind] = WriteBatcher(
+                batch_session_factory(db),
+                _apply_status,
+                max_batch_size=settings.STATUS_BATCH_MAX_SIZE,
+                max_delay_ms=settings.STATUS_BATCH_MAX_DELAY_MS,
+                name="status-write-batcher",
+            )
+    return batcher
+
+
+def shutdown_status_batchers() -> None:
+    """Flush and stop all status write batchers."""
+    with _status_batchers_lock:
+        batchers = list(_status_batchers.values())
+        _status_batchers.clear()
+    for batcher in batchers:
+        batcher.stop()
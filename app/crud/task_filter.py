@@ -0,0 +1,203 @@
+"""
+Filters and sort orders for listing a user's tasks, and the index serving each.
+
+A listing is always scoped to one user and ordered by one of ``SORT_FIELDS``
+with the id as tie-breaker. Every sort field has a ``(user_id, field)`` index
+that returns rows already in order, so a page is read by walking that index
+and stops after ``skip + limit`` matches. A range filter on another column
+(times, title prefix) instead narrows the scan to that column's index, and the
+matching rows then have to be sorted; ``TaskCRUD.list_by_user`` rejects those
+listings when they match more than ``TASK_LIST_MAX_SORT_ROWS`` rows.
+
+Tag filters are matched in one of two ways, picked from the tags' maintained
+task counts (``TaskFilter.with_tags``). When the tags are common, the listing
+walks its index as above and looks each task up in the (tag_id, task_id) key
+of task_tags, and a page is filled after a few rows. When they are rare, the
+tags' posting lists, ranges of that key in task id order, are merged into the
+ids of the matching tasks (``tag_postings``), which are then read by id and,
+unless sorted by id, sorted.
+"""
+import math
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import ColumnElement, exists, intersect, select, union
+from sqlalchemy.sql.elements import UnaryExpression
+from sqlalchemy.sql.operators import custom_op
+
+from app.core.config import settings
+from app.models.tag import TaskTag
+from app.models.task import TaskStatus
+
+# Index on (user_id, <field>) of the tasks table serving each sort field
+SORT_INDEXES = {
+    "id": "ix_tasks_user_id",
+    "created_at": "ix_tasks_user_id_created_at",
+    "updated_at": "ix_tasks_user_id_updated_at",
+    "title": "ix_tasks_user_id_title",
+}
+SORT_FIELDS = tuple(SORT_INDEXES)
+
+# Cost of looking a walked task up in task_tags, in posting list entries merged
+TAG_PROBE_COST = 4
+
+
+@dataclass(frozen=True)
+class TaskListPlan:
+    """How a task listing is read."""
+
+    # Index of the tasks table the listing scans
+    index: str
+    # False when the matching rows are sorted after the scan
+    ordered: bool
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Smallest string greater than every string starting with ``prefix``."""
+    stripped = prefix.rstrip(chr(0x10FFFF))
+    if not stripped:
+        return None
+    return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+
+def tag_postings(tag_ids: Sequence[int], any_tag: bool = False) -> Any:
+    """Ids of the tasks carrying all (or with ``any_tag``, any) of ``tag_ids``, in order."""
+    postings = [select(TaskTag.task_id).where(TaskTag.tag_id == tag_id) for tag_id in tag_ids]
+    if len(postings) == 1:
+        return postings[0]
+    # Ordered, SQLite merges the posting lists instead of building a temp B-tree of each
+    combined = union(*postings) if any_tag else intersect(*postings)
+    return combined.order_by(TaskTag.task_id)
+
+
+def _unindexed(column: Any) -> ColumnElement[Any]:
+    """``column`` under a unary +, which keeps SQLite from reading it from an index."""
+    return UnaryExpression(column, operator=custom_op("+"), type_=column.type)
+
+
+@dataclass(frozen=True)
+class TaskFilter:
+    """Which of a user's tasks to list, and in which order."""
+
+    statuses: Tuple[TaskStatus, ...] = ()
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+    # Case-sensitive, so it can be answered by a range scan of the title index
+    title_prefix: Optional[str] = None
+    sort: str = "id"
+    descending: bool = False
+    # Tag names the tasks carry, all of them or with any_tag any
+    tags: Tuple[str, ...] = ()
+    any_tag: bool = False
+    # The listed user's ids of ``tags``, filled in by ``with_tags``
+    tag_ids: Tuple[int, ...] = ()
+    # True when the tag posting lists drive the listing rather than its index
+    merge_tags: bool = False
+
+    def __post_init__(self) -> None:
+        if self.sort not in SORT_INDEXES:
+            raise ValueError(f"Cannot sort tasks by {self.sort!r}")
+
+    def with_tags(
+        self, tag_counts: Sequence[Tuple[int, int]], total_tasks: int, rows: Optional[int]
+    ) -> Optional["TaskFilter"]:
+        """
+        Resolve ``tags`` to tag ids and pick how to match them.
+
+        Args:
+            tag_counts: (id, task count) of the user's tags named in ``tags``
+            total_tasks: Number of the user's tasks, archived ones included
+            rows: Rows the listing reads (skip + limit), or None for all
+
+        Returns:
+            The filter matching by tag id, or None if no task can match
+        """
+        if not tag_counts or (not self.any_tag and len(tag_counts) < len(self.tags)):
+            return None
+        tag_counts = sorted(tag_counts, key=lambda tag: tag[1])
+        total = max(total_tasks, tag_counts[-1][1], 1)
+        # Share of the tasks matching, taking the tags to be independent
+        fractions = [count / total for _, count in tag_counts]
+        if self.any_tag:
+            matching = 1 - math.prod(1 - fraction for fraction in fractions)
+        else:
+            matching = math.prod(fractions)
+        walked = total if rows is None or matching == 0 else min(total, rows / matching)
+        merged = sum(count for _, count in tag_counts)
+        merge_tags = walked * TAG_PROBE_COST > merged and (
+            # The merged matches are sorted unless sorted by id
+            self.sort == "id"
+            or matching * total <= settings.TASK_LIST_MAX_SORT_ROWS
+        )
+        return replace(
+            self, tag_ids=tuple(tag_id for tag_id, _ in tag_counts), merge_tags=merge_tags
+        )
+
+    def range_fields(self) -> List[str]:
+        """Columns this filter restricts to a range, in index preference order."""
+        fields = []
+        if self.created_after is not None or self.created_before is not None:
+            fields.append("created_at")
+        if self.updated_after is not None or self.updated_before is not None:
+            fields.append("updated_at")
+        if self.title_prefix:
+            fields.append("title")
+        return fields
+
+    def plan(self, include_archived: bool = False) -> TaskListPlan:
+        """
+        Pick the index serving this listing.
+
+        With ``include_archived``, tasks and archived tasks are merged in id
+        order; any other order sorts the union of both.
+        """
+        if include_archived or self.merge_tags:
+            return TaskListPlan(SORT_INDEXES["id"], self.sort == "id")
+        ranges = self.range_fields()
+        if not ranges or self.sort in ranges:
+            return TaskListPlan(SORT_INDEXES[self.sort], True)
+        return TaskListPlan(SORT_INDEXES[ranges[0]], False)
+
+    def conditions(self, model: Any) -> List[ColumnElement[Any]]:
+        """WHERE clauses for ``model`` (Task or ArchivedTask), besides the user."""
+        conditions = []
+        if self.statuses:
+            conditions.append(model.status.in_(self.statuses))
+        if self.created_after is not None:
+            conditions.append(model.created_at >= self.created_after)
+        if self.created_before is not None:
+            conditions.append(model.created_at < self.created_before)
+        if self.updated_after is not None:
+            conditions.append(model.updated_at >= self.updated_after)
+        if self.updated_before is not None:
+            conditions.append(model.updated_at < self.updated_before)
+        if self.title_prefix:
+            conditions.append(model.title >= self.title_prefix)
+            upper = prefix_upper_bound(self.title_prefix)
+            if upper is not None:
+                conditions.append(model.title < upper)
+        if self.merge_tags:
+            conditions.append(model.id.in_(tag_postings(self.tag_ids, self.any_tag)))
+        elif self.any_tag:
+            conditions.append(
+                exists().where(TaskTag.tag_id.in_(self.tag_ids), TaskTag.task_id == model.id)
+            )
+        else:
+            conditions.extend(
+                exists().where(TaskTag.tag_id == tag_id, TaskTag.task_id == model.id)
+                for tag_id in self.tag_ids
+            )
+        return conditions
+
+    def order_by(self, columns: Any) -> List[ColumnElement[Any]]:
+        """ORDER BY clauses over ``columns`` (a model or a subquery's ``c``)."""
+        keys = [getattr(columns, self.sort)]
+        if self.sort != "id":
+            if self.merge_tags:
+                # Read by id from the merged posting lists and then sorted
+                keys[0] = _unindexed(keys[0])
+            keys.append(columns.id)
+        return [key.desc() if self.descending else key.asc() for key in keys]
@@ -1,10 +1,50 @@
-from typing import List, Optional
+import string
+from functools import partial
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import bindparam, func, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+
+from app.core.cache import invalidate_on_commit, user_cache
+from app.core.database import begin_explicit, commit, on_primary, rollback
+from app.core.events import USER_CREATED, USER_DELETED, USER_UPDATED
+from app.crud.outbox import get_outbox_crud
 from app.models.user import User
+from app.schemas.user import User as UserSchema
 from app.schemas.user import UserCreate, UserUpdate
+from app.utils.chunks import chunked
 from app.utils.exceptions import DuplicateError, NotFoundError
 
+# Built once, so lookups reuse the compiled SQL (see app.crud.task)
+USER_BY_ID = select(User).where(User.id == bindparam("user_id")).limit(1)
+# Emails match regardless of case, through ix_users_email_lower
+USER_BY_EMAIL = (
+    select(User).where(func.lower(User.email) == func.lower(bindparam("email"))).limit(1)
+)
+
+_insert_users = sqlite_insert(User)
+UPSERT_USERS = _insert_users.on_conflict_do_update(
+    index_elements=[func.lower(User.email)],
+    set_={"name": _insert_users.excluded.name, "email": _insert_users.excluded.email},
+    # Users already up to date are neither written nor returned
+    where=or_(User.name != _insert_users.excluded.name, User.email != _insert_users.excluded.email),
+).returning(User.id, User.name, User.email, User.created_at)
+
+# SQLite's lower() folds ASCII letters only; batches are deduplicated the same way
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _payload(user: Any) -> Dict[str, Any]:
+    return UserSchema.model_validate(user).model_dump(mode="json")
+
+
+class BulkUpsertResult(NamedTuple):
+    created: int
+    updated: int
+    unchanged: int
+
 
 class UserCRUD:
     """CRUD operations for User model."""
@@ -12,27 +52,57 @@ class UserCRUD:
     def __init__(self, db: Session) -> None:
         self.db = db
 
+    def _publish(self, user: User, type: str) -> None:
+        """Record the change to ``user`` in the outbox."""
+        if type == USER_DELETED:
+            render = lambda: {"id": user.id}  # noqa: E731
+        else:
+            render = lambda: UserSchema.model_validate(user).model_dump(mode="json")  # noqa: E731
+        get_outbox_crud(self.db).add(type, "user", user, render)
+        if type != USER_CREATED:
+            invalidate_on_commit(self.db, user_cache, [user.id])
+
+    @on_primary
     def create(self, user_data: UserCreate) -> User:
         """Create a new user and commit immediately."""
         user = User(name=user_data.name, email=user_data.email)
         self.db.add(user)
         try:
-            self.db.commit()
+            self._publish(user, USER_CREATED)
+            commit(self.db)
             self.db.refresh(user)
             return user
         except IntegrityError:
-            self.db.rollback()
+            rollback(self.db)
             raise DuplicateError(f"User with email '{user_data.email}' already exists")
 
     def get_by_id(self, user_id: int) -> Optional[User]:
-        return self.db.query(User).filter(User.id == user_id).first()
+        return self.db.scalars(USER_BY_ID, {"user_id": user_id}).first()
 
     def get_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(User).filter(User.email == email).first()
+        return self.db.scalars(USER_BY_EMAIL, {"email": email}).first()
+
+    def get_many(self, user_ids: Sequence[int]) -> List[User]:
+        """Get users by id in the order given, skipping ids that do not exist."""
+        ids = list(dict.fromkeys(user_ids))
+        found: Dict[int, User] = {}
+        for chunk in chunked(ids):
+            users = self.db.scalars(select(User).where(User.id.in_(chunk)))
+            found.update((user.id, user) for user in users)
+        return [found[user_id] for user_id in ids if user_id in found]
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[User]:
-        return self.db.query(User).offset(skip).limit(limit).all()
+    def get_all(
+        self, skip: int = 0, limit: int = 100, yield_per: Optional[int] = None
+    ) -> Iterable[User]:
+        """
+        Get a page of users; with ``yield_per``, lazily in batches of that size.
+        """
+        query = self.db.query(User).offset(skip).limit(limit)
+        if yield_per is None:
+            return query.all()
+        return query.yield_per(yield_per)
 
+    @on_primary
     def update(self, user_id: int, user_data: UserUpdate) -> User:
         user = self.get_by_id(user_id)
         if not user:
@@ -40,18 +110,59 @@ class UserCRUD:
         update_data = user_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(user, field, value)
-        self.db.commit()
+        self._publish(user, USER_UPDATED)
+        commit(self.db)
         self.db.refresh(user)
         return user
 
+    @on_primary
     def delete(self, user_id: int) -> bool:
         user = self.get_by_id(user_id)
         if not user:
             raise NotFoundError(f"User with id {user_id} not found")
+        self._publish(user, USER_DELETED)
         self.db.delete(user)
-        self.db.commit()
+        commit(self.db)
         return True
 
+    @on_primary
+    def bulk_upsert(self, users: Sequence[UserCreate]) -> BulkUpsertResult:
+        """
+        Create users, or update the name and email of those whose email exists in any case.
+
+        The batch is written with multi-row ``INSERT ... ON CONFLICT`` statements
+        in one transaction. A user whose email appears again later in the batch
+        is replaced by the later one, and counted once.
+        """
+        latest = {user.email.translate(_ASCII_LOWER): user for user in users}
+        if not latest:
+            return BulkUpsertResult(created=0, updated=0, unchanged=0)
+        # Read the largest id holding the write lock, so nobody else can insert
+        # before the upsert: users has no AUTOINCREMENT, so created rows get
+        # ids above it
+        begin_explicit(self.db, immediate=True)
+        max_id = self.db.scalar(select(func.max(User.id))) or 0
+        rows = self.db.execute(
+            UPSERT_USERS,
+            [{"name": user.name, "email": user.email} for user in latest.values()],
+        ).all()
+
+        outbox = get_outbox_crud(self.db)
+        updated_ids = []
+        for row in rows:
+            render = partial(_payload, row)
+            if row.id > max_id:
+                outbox.add(USER_CREATED, "user", row, render)
+            else:
+                outbox.add(USER_UPDATED, "user", row, render)
+                updated_ids.append(row.id)
+        invalidate_on_commit(self.db, user_cache, updated_ids)
+        commit(self.db)
+        created = len(rows) - len(updated_ids)
+        return BulkUpsertResult(
+            created=created, updated=len(updated_ids), unchanged=len(latest) - len(rows)
+        )
+
     def count(self) -> int:
         return self.db.query(User).count()
 
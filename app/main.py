@@ -3,20 +3,36 @@ FastAPI main application.
 """
 import logging
 import time
+from typing import Awaitable, Callable, Dict
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.api.v1.api import api_router
+from app.core.cache_sync import start_cache_sync, stop_cache_sync
 from app.core.config import settings
-from app.core.database import create_database
+from app.core.database import (
+    LAST_WRITE_COOKIE,
+    LAST_WRITE_HEADER,
+    SessionLocal,
+    create_database,
+    primary_pinned,
+)
+from app.core.metrics import registry
+from app.core.outbox import start_outbox_dispatcher, stop_outbox_dispatcher
+from app.core.profiling import request_profiler
+from app.core.sharding import shard_router
+from app.crud import get_idempotency_crud
+from app.crud.task import shutdown_status_batchers
 from app.utils.exceptions import TaskManagementException
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+CallNext = Callable[[Request], Awaitable[Response]]
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
@@ -40,14 +56,16 @@ if settings.BACKEND_CORS_ORIGINS:
 
 # Custom exception handler for application exceptions
 @app.exception_handler(TaskManagementException)
-async def task_management_exception_handler(request: Request, exc: TaskManagementException):
+async def task_management_exception_handler(
+    request: Request, exc: TaskManagementException
+) -> JSONResponse:
     """Handle custom task management exceptions."""
     return JSONResponse(status_code=400, content={"detail": str(exc)})
 
 
 # Request logging middleware
 @app.middleware("http")
-async def log_requests(request: Request, call_next) -> JSONResponse:
+async def log_requests(request: Request, call_next: CallNext) -> Response:
     """Log HTTP requests."""
     start_time = time.time()
     response = await call_next(request)
@@ -62,9 +80,45 @@ async def log_requests(request: Request, call_next) -> JSONResponse:
     return response
 
 
+# Read-your-writes middleware for read replica routing
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next: CallNext) -> Response:
+    """Pin reads to the primary for clients that wrote within the last few seconds."""
+    if not settings.DATABASE_READ_URLS:
+        return await call_next(request)
+
+    window = settings.READ_YOUR_WRITES_WINDOW_SECONDS
+    last_write = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        pinned = last_write is not None and time.time() - float(last_write) < window
+    except ValueError:
+        pinned = False
+
+    token = primary_pinned.set(pinned)
+    try:
+        response = await call_next(request)
+    finally:
+        primary_pinned.reset(token)
+
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        written_at = f"{time.time():.3f}"
+        response.headers[LAST_WRITE_HEADER] = written_at
+        response.set_cookie(
+            LAST_WRITE_COOKIE, written_at, max_age=max(1, int(window)), httponly=True
+        )
+    return response
+
+
+# On-demand profiling middleware, added last so the profile covers the other middleware too
+@app.middleware("http")
+async def profile_requests(request: Request, call_next: CallNext) -> Response:
+    """Profile requests carrying a profiling token and a sampled fraction of traffic."""
+    return await request_profiler(request, call_next)
+
+
 # Health check endpoint
 @app.get("/health", tags=["health"])
-async def health_check():
+async def health_check() -> Dict[str, str]:
     """Health check endpoint."""
     return {
         "status": "healthy",
@@ -74,9 +128,16 @@ async def health_check():
     }
 
 
+# Metrics endpoint
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def metrics() -> str:
+    """Process metrics in the Prometheus text format."""
+    return registry.render()
+
+
 # Root endpoint
 @app.get("/", tags=["root"])
-async def root():
+async def root() -> Dict[str, str]:
     """Root endpoint with API information."""
     return {
         "message": f"Welcome to {settings.APP_NAME}",
@@ -99,14 +160,26 @@ async def startup_event() -> None:
     logging.info(f"Using database URL: {settings.DATABASE_URL}")
     # Create database tables
     create_database()
+    if shard_router is not None:
+        shard_router.create_databases()
     logger.info("Database initialized successfully")
 
+    with SessionLocal() as db:
+        purged = get_idempotency_crud(db).purge_expired()
+    logger.info(f"Purged {purged} expired idempotency keys")
+
+    start_outbox_dispatcher()
+    start_cache_sync()
+
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
     """Cleanup on application shutdown."""
     logger.info(f"Shutting down {settings.APP_NAME}")
+    shutdown_status_batchers()
+    stop_outbox_dispatcher()
+    stop_cache_sync()
 
 
 if __name__ == "__main__":
@@ -2,7 +2,41 @@
 Models package initialization.
 Import all models here to ensure they are registered with SQLAlchemy.
 """
-from app.models.task import Task, TaskStatus
+from app.models.analytics import (
+    RollupCursor,
+    TaskDailyStats,
+    TaskDurationHistogram,
+    TaskStatusEvent,
+    UserActivity,
+    UserTaskCounts,
+)
+from app.models.cache import CacheInvalidation
+from app.models.idempotency import IdempotencyKey
+from app.models.outbox import OutboxMessage
+from app.models.shard import TaskLocation, UserShard
+from app.models.sync import ChangeSequence, TaskTombstone
+from app.models.tag import Tag, TaskTag
+from app.models.task import ArchivedTask, Task, TaskStatus
 from app.models.user import User
 
-__all__ = ["User", "Task", "TaskStatus"]
+__all__ = [
+    "User",
+    "Task",
+    "TaskStatus",
+    "ArchivedTask",
+    "IdempotencyKey",
+    "UserShard",
+    "TaskLocation",
+    "ChangeSequence",
+    "TaskTombstone",
+    "OutboxMessage",
+    "TaskStatusEvent",
+    "TaskDailyStats",
+    "TaskDurationHistogram",
+    "RollupCursor",
+    "UserTaskCounts",
+    "UserActivity",
+    "CacheInvalidation",
+    "Tag",
+    "TaskTag",
+]
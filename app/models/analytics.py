@@ -0,0 +1,113 @@
+"""
+SQLAlchemy models for task status history and its precomputed rollups.
+"""
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import Date, DateTime
+from sqlalchemy import Enum as SqlEnum
+from sqlalchemy import Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models.task import TaskStatus
+
+
+class TaskStatusEvent(Base):
+    """One status transition of a task; rows are only ever appended."""
+
+    __tablename__ = "task_status_events"
+    __table_args__ = (
+        # Walks a task's history when its completion is rolled up
+        Index("ix_task_status_events_task_id_id", "task_id", "id"),
+        # AUTOINCREMENT: ids are never reused, so the rollup cursor never skips a row
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    task_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    # None for the creation of the task
+    from_status: Mapped[Optional[TaskStatus]] = mapped_column(SqlEnum(TaskStatus), nullable=True)
+    to_status: Mapped[TaskStatus] = mapped_column(SqlEnum(TaskStatus), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<TaskStatusEvent(task_id={self.task_id}, {self.from_status} -> {self.to_status})>"
+
+
+class TaskDailyStats(Base):
+    """Per-user, per-day counts of task transitions, maintained by the rollup job."""
+
+    __tablename__ = "task_daily_stats"
+    # Finds every user active in a recent window for the activity leaderboard
+    __table_args__ = (Index("ix_task_daily_stats_day", "day"),)
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    created: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    started: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class TaskDurationHistogram(Base):
+    """
+    Per-user, per-day histogram of lead or cycle times of completed tasks.
+
+    Buckets are logarithmic (see ``app.utils.histogram``), so histograms of
+    several days can be added up and percentiles read from the sum.
+    """
+
+    __tablename__ = "task_duration_histogram"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    # "lead" (created -> DONE) or "cycle" (first IN_PROGRESS -> DONE)
+    metric: Mapped[str] = mapped_column(String(10), primary_key=True)
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class UserTaskCounts(Base):
+    """
+    Current task counts of a user, kept up to date by every TaskCRUD write.
+
+    Each count is indexed, so the top users by it are read from the end of
+    that index instead of counting every user's tasks.
+    """
+
+    __tablename__ = "user_task_counts"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    # TODO or IN_PROGRESS
+    open_tasks: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
+    in_progress_tasks: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
+    # Archived tasks stay counted as done
+    done_tasks: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
+
+
+class UserActivity(Base):
+    """
+    Task transitions of a user over the activity leaderboard window, kept by the rollup job.
+
+    The rollup adds each batch of transitions and takes out the days that
+    leave the window, so the most active users are read from the end of the
+    index on ``activity`` instead of summing every user's daily rollups.
+    """
+
+    __tablename__ = "user_activity"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    activity: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
+
+
+class RollupCursor(Base):
+    """
+    Position a rollup job has reached: the id of the last source row it has
+    folded in, or the ordinal of the first day of a rolling window.
+    """
+
+    __tablename__ = "rollup_cursors"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,29 @@
+"""
+SQLAlchemy model for the log of cache invalidations shared by worker processes.
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class CacheInvalidation(Base):
+    """A cache key invalidated by a write, written in the transaction that made it."""
+
+    __tablename__ = "cache_invalidations"
+    # AUTOINCREMENT: ids are never reused, so a gap means pruned rows were missed
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cache: Mapped[str] = mapped_column(String(20), nullable=False)
+    key: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Process that made the write; it already invalidated its own caches
+    origin: Mapped[str] = mapped_column(String(100), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<CacheInvalidation(id={self.id}, cache='{self.cache}', key={self.key})>"
@@ -0,0 +1,41 @@
+"""
+SQLAlchemy model for the transactional outbox.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class OutboxMessage(Base):
+    """A change waiting to be delivered downstream, written in the transaction that made it."""
+
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        # Serves the dispatcher's claim query
+        Index("ix_outbox_messages_dead_at_available_at", "dead_at", "available_at"),
+        # Finds earlier messages of the same aggregate, which hold a message back
+        Index("ix_outbox_messages_aggregate", "aggregate_type", "aggregate_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    aggregate_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    aggregate_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # JSON document
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Not claimable before this time: the retry backoff or the current claim's lease
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Set when delivery was given up after too many attempts
+    dead_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<OutboxMessage(id={self.id}, event_type='{self.event_type}')>"
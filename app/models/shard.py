@@ -0,0 +1,38 @@
+"""
+SQLAlchemy models for the task shard directory.
+
+Both tables live in the primary database next to ``users``.
+"""
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class UserShard(Base):
+    """Shard holding a user's tasks, pinned when the first task is created."""
+
+    __tablename__ = "user_shards"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    shard: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<UserShard(user_id={self.user_id}, shard='{self.shard}')>"
+
+
+class TaskLocation(Base):
+    """Global task id allocator and map from task id to shard."""
+
+    __tablename__ = "task_locations"
+    # AUTOINCREMENT keeps ids of deleted tasks from being handed out again
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    shard: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<TaskLocation(id={self.id}, user_id={self.user_id}, shard='{self.shard}')>"
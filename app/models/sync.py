@@ -0,0 +1,37 @@
+"""
+SQLAlchemy models backing the task change feed.
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ChangeSequence(Base):
+    """Single-row counter handing out monotonic change sequence numbers."""
+
+    __tablename__ = "change_sequence"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Highest sequence number of a tombstone that has been purged
+    pruned_through: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class TaskTombstone(Base):
+    """Marker left behind by a deleted task so sync clients learn about the delete."""
+
+    __tablename__ = "task_tombstones"
+    __table_args__ = (Index("ix_task_tombstones_user_id_change_seq", "user_id", "change_seq"),)
+
+    task_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    change_seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<TaskTombstone(task_id={self.task_id}, change_seq={self.change_seq})>"
@@ -0,0 +1,42 @@
+"""
+SQLAlchemy models for task tags and their inverted index.
+"""
+from sqlalchemy import Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class Tag(Base):
+    """A label of one user's tasks, with the number of tasks carrying it."""
+
+    __tablename__ = "tags"
+    __table_args__ = (Index("ix_tags_user_id_name", "user_id", "name", unique=True),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    name: Mapped[str] = mapped_column(String(50), nullable=False)
+    # Maintained with every assignment, so the tag cloud never counts task_tags
+    task_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<Tag(id={self.id}, name='{self.name}', task_count={self.task_count})>"
+
+
+class TaskTag(Base):
+    """
+    One task carrying one tag; the rows of a tag are its posting list.
+
+    WITHOUT ROWID, so the table is stored as its (tag_id, task_id) primary key
+    and a tag's posting list is a range of it in task id order.
+    """
+
+    __tablename__ = "task_tags"
+    __table_args__ = (
+        # Finds the tags of a task when it is deleted
+        Index("ix_task_tags_task_id", "task_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+    tag_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    task_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
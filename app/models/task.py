@@ -4,39 +4,116 @@ SQLAlchemy Task model.
 """
 from datetime import datetime
 from enum import Enum
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Column, DateTime, Enum as SqlEnum, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import relationship
+from typing import Optional
+
+from sqlalchemy import DateTime
+from sqlalchemy import Enum as SqlEnum
+from sqlalchemy import ForeignKey, Index, Integer, String, Text, literal_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
 
 
 class TaskStatus(str, Enum):
     """Task status enumeration."""
+
     TODO = "TODO"
     IN_PROGRESS = "IN_PROGRESS"
     DONE = "DONE"
 
 
+# Task priorities, 1 being the most urgent
+HIGHEST_PRIORITY = 1
+LOWEST_PRIORITY = 5
+DEFAULT_PRIORITY = 3
+
+
 class Task(Base):
     """Task model for storing task information."""
-    
+
     __tablename__ = "tasks"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(200), nullable=False, index=True)
-    description = Column(Text, nullable=True)
+    __table_args__ = (
+        # Lets the archival job find old DONE tasks without a table scan
+        Index("ix_tasks_status_updated_at", "status", "updated_at"),
+        # Serves the per-user change feed in sequence order
+        Index("ix_tasks_user_id_change_seq", "user_id", "change_seq"),
+        # Serve the sorts of task listings (see app.crud.task_filter)
+        Index("ix_tasks_user_id_created_at", "user_id", "created_at"),
+        Index("ix_tasks_user_id_updated_at", "user_id", "updated_at"),
+        Index("ix_tasks_user_id_title", "user_id", "title"),
+        # AUTOINCREMENT keeps the ids of archived and deleted tasks from being
+        # handed out again, which would clash in archived_tasks and inherit
+        # their tags and status history
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    title: Mapped[str] = mapped_column(String(200), nullable=False, index=True)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     status: Mapped[TaskStatus] = mapped_column(
-        SqlEnum(TaskStatus), 
-        default=TaskStatus.TODO, 
-        nullable=False
+        SqlEnum(TaskStatus), default=TaskStatus.TODO, nullable=False
+    )
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False, index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True
     )
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
-    
+    # Position in the change feed, bumped by every write through TaskCRUD
+    change_seq: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    due_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    priority: Mapped[int] = mapped_column(
+        Integer, default=DEFAULT_PRIORITY, server_default=str(DEFAULT_PRIORITY), nullable=False
+    )
+    # Bumped by every update; updates compare and set it (see TaskCRUD.update)
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
+
     # Relationship to user
     owner = relationship("User", back_populates="tasks")
-    
+
+    def __repr__(self) -> str:
+        return (
+            f"<Task(id={self.id}, title='{self.title}', status='{self.status}', "
+            f"user_id={self.user_id})>"
+        )
+
+
+# Tasks not DONE, with a literal since index definitions cannot take parameters
+OPEN_TASK = Task.status != literal_column(f"'{TaskStatus.DONE.name}'")
+
+# Serves the "next up" queue, a user's open tasks by priority and then due
+# date with undated tasks last, and the overdue count, in index order
+Index(
+    "ix_tasks_next_up",
+    Task.user_id,
+    Task.priority,
+    Task.due_at.is_(None),
+    Task.due_at,
+    sqlite_where=OPEN_TASK,
+)
+
+
+class ArchivedTask(Base):
+    """DONE tasks moved out of the active tasks table by the archival job."""
+
+    __tablename__ = "archived_tasks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    title: Mapped[str] = mapped_column(String(200), nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    status: Mapped[TaskStatus] = mapped_column(SqlEnum(TaskStatus), nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False, index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    due_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    priority: Mapped[int] = mapped_column(
+        Integer, default=DEFAULT_PRIORITY, server_default=str(DEFAULT_PRIORITY), nullable=False
+    )
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
     def __repr__(self) -> str:
-        return f"<Task(id={self.id}, title='{self.title}', status='{self.status}', user_id={self.user_id})>"
\ No newline at end of file
+        return f"<ArchivedTask(id={self.id}, title='{self.title}', user_id={self.user_id})>"
@@ -2,8 +2,33 @@
 Schemas package initialization.
 """
 
-from app.schemas.task import Task, TaskCreate, TaskStatusUpdate, TaskUpdate, TaskWithOwner
-from app.schemas.user import User, UserCreate, UserUpdate, UserWithTasks
+from app.schemas.analytics import (
+    DurationPercentiles,
+    Leaderboard,
+    LeaderboardEntry,
+    TaskCycleTimes,
+    TaskDayStats,
+    TaskThroughput,
+)
+from app.schemas.batch import BatchOperation, BatchRequest, BatchResponse, BatchResult
+from app.schemas.profiling import RequestProfile
+from app.schemas.tag import Tag, TagAssignment, TagAssignmentResult
+from app.schemas.task import (
+    Task,
+    TaskChanges,
+    TaskCreate,
+    TaskStatusUpdate,
+    TaskUpdate,
+    TaskWithOwner,
+)
+from app.schemas.user import (
+    User,
+    UserBulkResult,
+    UserBulkUpsert,
+    UserCreate,
+    UserUpdate,
+    UserWithTasks,
+)
 
 # Resolve forward references AFTER all imports
 UserWithTasks.model_rebuild()
@@ -14,9 +39,26 @@ __all__ = [
     "UserCreate",
     "UserUpdate",
     "UserWithTasks",
+    "UserBulkUpsert",
+    "UserBulkResult",
     "Task",
     "TaskCreate",
     "TaskUpdate",
     "TaskStatusUpdate",
     "TaskWithOwner",
+    "TaskChanges",
+    "BatchOperation",
+    "BatchRequest",
+    "BatchResult",
+    "BatchResponse",
+    "TaskDayStats",
+    "TaskThroughput",
+    "DurationPercentiles",
+    "TaskCycleTimes",
+    "Leaderboard",
+    "LeaderboardEntry",
+    "RequestProfile",
+    "Tag",
+    "TagAssignment",
+    "TagAssignmentResult",
 ]
@@ -0,0 +1,49 @@
+from datetime import date
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+class TaskDayStats(BaseModel):
+    day: date
+    created: int
+    started: int
+    completed: int
+
+
+class TaskThroughput(BaseModel):
+    user_id: int
+    start: date
+    end: date
+    days: List[TaskDayStats]
+
+
+class DurationPercentiles(BaseModel):
+    # Completed tasks the percentiles are taken over
+    count: int
+    p50_seconds: Optional[float]
+    p90_seconds: Optional[float]
+
+
+class TaskCycleTimes(BaseModel):
+    user_id: int
+    start: date
+    end: date
+    # From creation (or reopening) to DONE
+    lead_time: DurationPercentiles
+    # From the first move to IN_PROGRESS to DONE
+    cycle_time: DurationPercentiles
+
+
+LeaderboardMetric = Literal["open", "in_progress", "completed", "active"]
+
+
+class LeaderboardEntry(BaseModel):
+    user_id: int
+    name: str
+    count: int
+
+
+class Leaderboard(BaseModel):
+    by: LeaderboardMetric
+    entries: List[LeaderboardEntry]
@@ -0,0 +1,39 @@
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+BatchOp = Literal[
+    "user.create",
+    "user.update",
+    "user.delete",
+    "task.create",
+    "task.update",
+    "task.update_status",
+    "task.delete",
+]
+
+
+class BatchOperation(BaseModel):
+    op: BatchOp
+    user_id: Optional[int] = None
+    task_id: Optional[int] = None
+    data: Dict[str, Any] = {}
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(
+        ..., min_length=1, max_length=settings.BATCH_MAX_OPERATIONS
+    )
+    # All operations succeed or none are applied; otherwise each one stands alone
+    atomic: bool = False
+
+
+class BatchResult(BaseModel):
+    status: int
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
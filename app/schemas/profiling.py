@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+ProfileFormat = Literal["collapsed", "pstats", "json"]
+
+
+class RequestProfile(BaseModel):
+    id: str
+    created_at: datetime
+    method: str
+    path: str
+    status_code: int
+    duration_ms: float
+    # Stack samples taken while the request ran, interval_ms apart
+    samples: int
+    interval_ms: float
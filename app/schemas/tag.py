@@ -0,0 +1,32 @@
+from typing import List
+
+from pydantic import BaseModel, Field, StringConstraints
+from typing_extensions import Annotated
+
+from app.core.config import settings
+
+# Commas separate the tags of a listing's tag filter, so names cannot contain one
+TagName = Annotated[
+    str, StringConstraints(strip_whitespace=True, min_length=1, max_length=50, pattern=r"^[^,]+$")
+]
+
+
+class Tag(BaseModel):
+    id: int
+    name: str
+    # Tasks carrying the tag, archived ones included
+    task_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class TagAssignment(BaseModel):
+    task_ids: List[int] = Field(..., min_length=1, max_length=settings.TAG_BATCH_MAX_TASKS)
+    tags: List[TagName] = Field(..., min_length=1, max_length=settings.TAG_MAX_PER_REQUEST)
+
+
+class TagAssignmentResult(BaseModel):
+    # Task-tag pairs added or removed; pairs already as requested are not counted
+    changed: int
+    tags: List[Tag]
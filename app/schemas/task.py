@@ -1,17 +1,38 @@
-from datetime import datetime
-from typing import TYPE_CHECKING, Optional
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
-from app.models.task import TaskStatus
+from app.models.task import DEFAULT_PRIORITY, HIGHEST_PRIORITY, LOWEST_PRIORITY, TaskStatus
+from app.schemas.trusted import TrustedSerializer
 
 if TYPE_CHECKING:
     from app.schemas.user import User
 
 
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to the naive UTC datetimes stored in the database."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def not_null(value: Any) -> Any:
+    """Reject an explicit null for a field whose column is NOT NULL."""
+    if value is None:
+        raise ValueError("may not be null")
+    return value
+
+
 class TaskBase(BaseModel):
     title: str
     description: Optional[str] = None
+    due_at: Optional[datetime] = None
+    # 1 is the most urgent
+    priority: int = Field(DEFAULT_PRIORITY, ge=HIGHEST_PRIORITY, le=LOWEST_PRIORITY)
+
+    _due_at_utc = field_validator("due_at")(naive_utc)
 
 
 class TaskCreate(TaskBase):
@@ -22,10 +43,19 @@ class TaskUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     status: Optional[TaskStatus] = None
+    due_at: Optional[datetime] = None
+    priority: Optional[int] = Field(None, ge=HIGHEST_PRIORITY, le=LOWEST_PRIORITY)
+    # Apply the update only if the task is still at this version, else 409
+    expected_version: Optional[int] = None
+
+    _due_at_utc = field_validator("due_at")(naive_utc)
+    # Omitted fields are left alone; sent as null they would violate NOT NULL
+    _not_null = field_validator("title", "status", "priority")(not_null)
 
 
 class TaskStatusUpdate(BaseModel):
     status: TaskStatus
+    expected_version: Optional[int] = None
 
 
 class TaskInDBBase(TaskBase):
@@ -34,6 +64,7 @@ class TaskInDBBase(TaskBase):
     user_id: int
     created_at: datetime
     updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
@@ -43,5 +74,23 @@ class Task(TaskInDBBase):
     pass
 
 
+# Fields a client can select with ``fields=``, in response order
+TASK_FIELDS: Tuple[str, ...] = tuple(Task.model_fields)
+
+
+@lru_cache(maxsize=256)
+def task_serializer(fields: Tuple[str, ...]) -> TrustedSerializer:
+    """Unvalidated serializer of task rows read from the database, with only ``fields``."""
+    return TrustedSerializer(Task, fields)
+
+
 class TaskWithOwner(Task):
     owner: "User"
+
+
+class TaskChanges(BaseModel):
+    changed: List[Task]
+    deleted: List[int]
+    next_token: str
+    has_more: bool
+    reset: bool
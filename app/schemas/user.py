@@ -3,6 +3,9 @@ from typing import TYPE_CHECKING, List, Optional
 
 from pydantic import BaseModel, Field
 
+from app.core.config import settings
+from app.schemas.trusted import TrustedSerializer
+
 if TYPE_CHECKING:
     from app.schemas.task import Task
 
@@ -16,6 +19,17 @@ class UserCreate(UserBase):
     pass
 
 
+class UserBulkUpsert(BaseModel):
+    users: List[UserCreate] = Field(..., min_length=1, max_length=settings.USER_BULK_MAX_USERS)
+
+
+class UserBulkResult(BaseModel):
+    created: int
+    updated: int
+    # Users whose name and email were already up to date
+    unchanged: int
+
+
 class UserUpdate(BaseModel):
     name: Optional[str] = None
     email: Optional[str] = None
@@ -33,5 +47,9 @@ class User(UserInDBBase):
     pass
 
 
+# Unvalidated serializer of user rows read from the database
+user_serializer = TrustedSerializer(User, tuple(User.model_fields))
+
+
 class UserWithTasks(User):
     tasks: List["Task"] = []
@@ -0,0 +1,38 @@
+"""
+Archive completed tasks.
+
+Usage:
+    python -m app.tools.archive_tasks [--older-than-days 30] [--batch-size 500]
+
+Moves DONE tasks whose last update is older than the cut-off from ``tasks``
+into ``archived_tasks`` on every task database, in bounded batches. Intended to
+run periodically, e.g. from cron.
+"""
+import argparse
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.core.database import SessionLocal, attached_sessions
+from app.crud import get_task_crud
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Archive completed tasks.")
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_DONE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    cutoff = datetime.utcnow() - timedelta(days=args.older_than_days)
+    db = SessionLocal()
+    try:
+        archived = get_task_crud(db).archive_done(cutoff, batch_size=args.batch_size)
+        print(f"Archived {archived} tasks completed before {cutoff:%Y-%m-%d %H:%M}")
+    finally:
+        for attached in attached_sessions(db).values():
+            attached.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
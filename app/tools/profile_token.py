@@ -0,0 +1,30 @@
+"""
+Mint a token that asks the API to profile requests.
+
+Usage:
+    python -m app.tools.profile_token [--ttl-seconds 3600]
+
+Send it as the ``X-Profile-Token`` header or the ``profile_token`` query
+parameter; the response names the stored profile in ``X-Profile-Id``. The
+token is signed with ``PROFILING_SECRET``, which must match the server's.
+"""
+import argparse
+import time
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.core.profiling import sign_token
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Mint a request profiling token.")
+    parser.add_argument("--ttl-seconds", type=int, default=3600)
+    args = parser.parse_args(argv)
+
+    if not settings.PROFILING_SECRET:
+        parser.error("PROFILING_SECRET is not set")
+    print(sign_token(settings.PROFILING_SECRET, int(time.time()) + args.ttl_seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Purge old tombstones of deleted tasks from the change feed.
+
+Usage:
+    python -m app.tools.purge_tombstones [--older-than-days 30]
+
+Clients whose sync token predates a purged tombstone get a full resync
+(``reset: true``) on their next sync instead of silently missing the delete.
+"""
+import argparse
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.core.database import SessionLocal, attached_sessions
+from app.crud import get_task_crud
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Purge old task tombstones.")
+    parser.add_argument(
+        "--older-than-days", type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS
+    )
+    args = parser.parse_args(argv)
+
+    cutoff = datetime.utcnow() - timedelta(days=args.older_than_days)
+    db = SessionLocal()
+    try:
+        purged = get_task_crud(db).purge_tombstones(cutoff)
+        print(f"Purged {purged} tombstones older than {cutoff:%Y-%m-%d %H:%M}")
+    finally:
+        for attached in attached_sessions(db).values():
+            attached.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Move users and their tasks between task shards.
+
+Usage:
+    python -m app.tools.rebalance_shards [--dry-run]
+    python -m app.tools.rebalance_shards --user-id 7 --to shard-b
+
+Without ``--user-id`` every user whose pinned shard differs from the one the
+hash ring now assigns (e.g. after adding a shard to TASK_SHARDS) is moved.
+A move copies the user's rows to the target shard, repoints ``user_shards``
+and ``task_locations``, then deletes the source rows. Tags get new ids on the
+target, as their ids are local to a shard, and the postings follow. Status history arrives
+after the target's rollup cursor, so the user's analytics rollups are dropped
+on the source and rebuilt on the target by its next rollup run. Writes to that user's
+tasks while the move runs can be lost, so run it when those users are idle.
+"""
+import argparse
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, attached_sessions
+from app.core.sharding import ShardRouter, shard_router
+from app.crud.task import advance_change_seq
+from app.models.analytics import (
+    TaskDailyStats,
+    TaskDurationHistogram,
+    TaskStatusEvent,
+    UserActivity,
+    UserTaskCounts,
+)
+from app.models.shard import TaskLocation, UserShard
+from app.models.sync import TaskTombstone
+from app.models.tag import Tag, TaskTag
+from app.models.task import ArchivedTask, Task
+from app.utils.chunks import chunked
+
+# Tables on the shards whose rows belong to a single user
+USER_SCOPED_MODELS: List[Any] = [Task, ArchivedTask, TaskTombstone, TaskStatusEvent, UserTaskCounts]
+# User-scoped tables whose ids are local to a shard and renumbered on arrival
+RENUMBERED_MODELS: List[Any] = [TaskStatusEvent]
+# Rollups of the user's rows, rebuilt on the target rather than copied
+DERIVED_MODELS: List[Any] = [TaskDailyStats, TaskDurationHistogram, UserActivity]
+
+Move = Tuple[int, str, str]
+
+
+def move_user(db: Session, router: ShardRouter, user_id: int, target: str) -> int:
+    """Move a user's rows to ``target`` and return the number of tasks moved."""
+    if target not in router.engines:
+        raise ValueError(f"Unknown shard '{target}'")
+    placement = db.get(UserShard, user_id)
+    source = placement.shard if placement else router.ring_shard(user_id)
+    if source == target:
+        return 0
+
+    src = router.session(db, source)
+    dst = router.session(db, target)
+    moved = max_change_seq = 0
+    for model in USER_SCOPED_MODELS:
+        table = model.__table__
+        result = src.execute(
+            select(table).where(table.c.user_id == user_id).order_by(*table.primary_key)
+        )
+        rows = [dict(row) for row in result.mappings()]
+        if model in RENUMBERED_MODELS:
+            for row in rows:
+                del row["id"]
+        if rows:
+            dst.execute(insert(table), rows)
+        if model is Task:
+            moved = len(rows)
+        if "change_seq" in table.c:
+            max_change_seq = max([max_change_seq] + [row["change_seq"] for row in rows])
+    tag_ids = _copy_tags(src, dst, user_id)
+    # Later writes on the target must sort after the rows that just arrived
+    advance_change_seq(dst, max_change_seq)
+    dst.commit()
+
+    if placement is None:
+        db.add(UserShard(user_id=user_id, shard=target))
+    else:
+        placement.shard = target
+    db.execute(update(TaskLocation).where(TaskLocation.user_id == user_id).values(shard=target))
+    db.commit()
+
+    for chunk in chunked(list(tag_ids)):
+        src.execute(delete(TaskTag).where(TaskTag.tag_id.in_(chunk)))
+    for model in USER_SCOPED_MODELS + DERIVED_MODELS + [Tag]:
+        table = model.__table__
+        src.execute(delete(table).where(table.c.user_id == user_id))
+    src.commit()
+    return moved
+
+
+def _copy_tags(src: Session, dst: Session, user_id: int) -> Dict[int, int]:
+    """Copy the user's tags and their postings to ``dst``; returns new tag ids by old id."""
+    tags = [
+        dict(row)
+        for row in src.execute(
+            select(Tag.__table__).where(Tag.user_id == user_id).order_by(Tag.id)
+        ).mappings()
+    ]
+    if not tags:
+        return {}
+    old_ids = [tag.pop("id") for tag in tags]
+    new_ids = dst.scalars(insert(Tag).returning(Tag.id, sort_by_parameter_order=True), tags).all()
+    tag_ids = dict(zip(old_ids, new_ids))
+    for chunk in chunked(old_ids):
+        postings = [
+            {"tag_id": tag_ids[tag_id], "task_id": task_id}
+            for tag_id, task_id in src.execute(
+                select(TaskTag.tag_id, TaskTag.task_id).where(TaskTag.tag_id.in_(chunk))
+            )
+        ]
+        if postings:
+            dst.execute(insert(TaskTag), postings)
+    return tag_ids
+
+
+def plan_rebalance(db: Session, router: ShardRouter) -> List[Move]:
+    """Users whose pinned shard is not the one the ring assigns, as (user_id, from, to)."""
+    moves = []
+    for placement in db.query(UserShard).order_by(UserShard.user_id):
+        target = router.ring_shard(placement.user_id)
+        if target != placement.shard:
+            moves.append((placement.user_id, placement.shard, target))
+    return moves
+
+
+def rebalance(db: Session, router: ShardRouter, dry_run: bool = False) -> List[Move]:
+    """Move every misplaced user to its ring shard."""
+    moves = plan_rebalance(db, router)
+    if not dry_run:
+        for user_id, _, target in moves:
+            move_user(db, router, user_id, target)
+    return moves
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Move users' tasks between shards.")
+    parser.add_argument("--user-id", type=int, help="move a single user")
+    parser.add_argument("--to", help="target shard for --user-id")
+    parser.add_argument("--dry-run", action="store_true", help="only print the planned moves")
+    args = parser.parse_args(argv)
+
+    if shard_router is None:
+        parser.error("TASK_SHARDS is not configured")
+    if (args.user_id is None) != (args.to is None):
+        parser.error("--user-id and --to must be used together")
+
+    db = SessionLocal()
+    try:
+        if args.user_id is not None:
+            moved = move_user(db, shard_router, args.user_id, args.to)
+            print(f"Moved {moved} tasks of user {args.user_id} to {args.to}")
+            return
+        moves = rebalance(db, shard_router, dry_run=args.dry_run)
+        for user_id, source, target in moves:
+            print(f"user {user_id}: {source} -> {target}")
+        print(f"{len(moves)} users {'to move' if args.dry_run else 'moved'}")
+    finally:
+        for attached in attached_sessions(db).values():
+            attached.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Roll up task status history into daily analytics.
+
+Usage:
+    python -m app.tools.roll_up_task_stats [--batch-size 1000]
+
+Folds ``task_status_events`` recorded since the last run into the per-user
+daily counts and duration histograms behind the analytics endpoints, on every
+task database. Each batch is committed with the position it reached, so an
+interrupted run resumes where it stopped. Intended to run every few minutes,
+e.g. from cron; runs must not overlap.
+"""
+import argparse
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.core.database import SessionLocal, attached_sessions
+from app.crud import get_task_analytics_crud
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Roll up task status history.")
+    parser.add_argument("--batch-size", type=int, default=settings.ROLLUP_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        rolled_up = get_task_analytics_crud(db).roll_up(batch_size=args.batch_size)
+        print(f"Rolled up {rolled_up} task status events")
+    finally:
+        for attached in attached_sessions(db).values():
+            attached.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
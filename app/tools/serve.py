@@ -0,0 +1,73 @@
+"""
+Serve the API with uvicorn worker processes.
+
+Usage:
+    python -m app.tools.serve [--workers N] [--host 0.0.0.0] [--port 8000]
+
+Without ``--workers``, ``WORKERS`` is used; 0 (the default) starts one worker
+per CPU this process may use, honouring a container's CPU quota. Workers keep
+their caches coherent, and pass task events on to each other's streams, through
+the ``cache_invalidations`` log (see ``app.core.cache_sync``), so
+``CACHE_SYNC_INTERVAL_SECONDS`` must stay above 0 with more than one worker. A
+single worker skips the log unless the interval is set explicitly.
+"""
+import argparse
+import logging
+import math
+import os
+from typing import Optional, Sequence
+
+import uvicorn
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, capped by a cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open(CGROUP_CPU_MAX) as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        return cpus
+    if quota == "max":
+        return cpus
+    return max(1, min(cpus, math.ceil(int(quota) / int(period))))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the API with uvicorn worker processes.")
+    parser.add_argument("--workers", type=int, default=settings.WORKERS)
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    args = parser.parse_args(argv)
+
+    workers = args.workers if args.workers > 0 else available_cpus()
+    sync_interval_set = "CACHE_SYNC_INTERVAL_SECONDS" in settings.model_fields_set
+    if workers > 1 and sync_interval_set and settings.CACHE_SYNC_INTERVAL_SECONDS <= 0:
+        parser.error("CACHE_SYNC_INTERVAL_SECONDS must be above 0 with more than one worker")
+    # Worker processes load their settings afresh; a single worker runs in this one
+    os.environ["WORKERS"] = str(workers)
+    if workers == 1 and not sync_interval_set:
+        settings.CACHE_SYNC_INTERVAL_SECONDS = 0.0
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Starting %d worker(s) on %s:%d", workers, args.host, args.port)
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    main()
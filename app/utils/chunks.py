@@ -0,0 +1,15 @@
+"""
+Helpers for splitting large ``IN (...)`` lookups.
+"""
+from typing import Iterator, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Stays under SQLite's limit on bound parameters (999 on builds before 3.32)
+IN_CLAUSE_CHUNK_SIZE = 500
+
+
+def chunked(items: Sequence[T], size: int = IN_CLAUSE_CHUNK_SIZE) -> Iterator[List[T]]:
+    """Yield consecutive slices of ``items`` with at most ``size`` elements."""
+    for start in range(0, len(items), size):
+        yield list(items[start : start + size])
@@ -0,0 +1,46 @@
+"""
+Logarithmic duration histograms.
+
+A duration of ``s`` seconds falls in bucket ``floor(log2(s) * BUCKETS_PER_DOUBLING)``;
+durations under a second share bucket 0. Bucket boundaries are fixed, so
+histograms can be stored per day and summed over any range, and a percentile
+read from the sum is within about 9% of the exact value.
+"""
+import math
+from typing import Dict, Optional
+
+BUCKETS_PER_DOUBLING = 4
+
+
+def bucket_of(seconds: float) -> int:
+    """Bucket holding a duration of ``seconds``."""
+    if seconds < 1:
+        return 0
+    return int(math.log2(seconds) * BUCKETS_PER_DOUBLING)
+
+
+def bucket_value(bucket: int) -> float:
+    """Representative duration of ``bucket``: the geometric middle of its bounds."""
+    return 2 ** ((bucket + 0.5) / BUCKETS_PER_DOUBLING)
+
+
+def percentile(counts: Dict[int, int], q: float) -> Optional[float]:
+    """
+    Approximate ``q``-th percentile (0-100) of the durations in ``counts``.
+
+    Args:
+        counts: Number of durations per bucket
+
+    Returns:
+        Duration in seconds, or None if ``counts`` is empty
+    """
+    total = sum(counts.values())
+    if total == 0:
+        return None
+    rank = max(1, math.ceil(total * q / 100))
+    seen = 0
+    for bucket in sorted(counts):
+        seen += counts[bucket]
+        if seen >= rank:
+            return bucket_value(bucket)
+    return bucket_value(max(counts))
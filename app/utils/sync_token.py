@@ -0,0 +1,28 @@
+"""
+Opaque sync tokens for the task change feed.
+"""
+import base64
+import json
+from typing import Tuple
+
+from app.utils.exceptions import ValidationError
+
+_VERSION = 1
+
+
+def encode_sync_token(database: str, change_seq: int) -> str:
+    """Encode a position in a database's change sequence."""
+    raw = json.dumps({"v": _VERSION, "d": database, "s": change_seq}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> Tuple[str, int]:
+    """Decode a token produced by ``encode_sync_token`` into (database, change_seq)."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["v"] != _VERSION:
+            raise ValueError(data["v"])
+        return str(data["d"]), int(data["s"])
+    except (ValueError, KeyError, TypeError):
+        raise ValidationError("Invalid sync token")
@@ -0,0 +1,62 @@
+"""
+Benchmark active-set query latency before and after archiving DONE tasks.
+
+Usage:
+    python -m benchmarks.bench_archival [--users 200] [--tasks-per-user 500] [--done-ratio 0.9]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.crud.task import TaskCRUD
+from app.models import Task, TaskStatus
+from benchmarks.common import seed, temp_database, timed
+
+
+def measure(session_factory, user_ids):
+    with session_factory() as db:
+        crud = TaskCRUD(db)
+        return {
+            "get_by_user_id": timed(lambda: crud.get_by_user_id(random.choice(user_ids))),
+            "count_by_status(TODO)": timed(
+                lambda: crud.count_by_status(random.choice(user_ids), TaskStatus.TODO)
+            ),
+            "count_by_user": timed(lambda: crud.count_by_user(random.choice(user_ids))),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tasks-per-user", type=int, default=500)
+    parser.add_argument("--done-ratio", type=float, default=0.9)
+    args = parser.parse_args()
+
+    with temp_database() as (engine, session_factory):
+        user_ids = seed(engine, args.users, args.tasks_per_user, done_ratio=args.done_ratio)
+        with engine.begin() as conn:
+            conn.execute(
+                update(Task)
+                .where(Task.status == TaskStatus.DONE)
+                .values(updated_at=datetime.utcnow() - timedelta(days=90))
+            )
+
+        before = measure(session_factory, user_ids)
+        with session_factory() as db:
+            start = time.perf_counter()
+            archived = TaskCRUD(db).archive_done(datetime.utcnow() - timedelta(days=30))
+            elapsed = time.perf_counter() - start
+        after = measure(session_factory, user_ids)
+
+    print(f"Archived {archived} tasks in {elapsed:.2f}s\n")
+    print(f"{'query':<24} {'before p50/p95 ms':>20} {'after p50/p95 ms':>20}")
+    for name in before:
+        b, a = before[name], after[name]
+        print(f"{name:<24} {b[0]:>9.2f} / {b[1]:<8.2f} {a[0]:>9.2f} / {a[1]:<8.2f}")
+
+
+if __name__ == "__main__":
+    main()
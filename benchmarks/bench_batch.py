@@ -0,0 +1,65 @@
+"""
+Benchmark a sync of many task changes as separate requests versus one POST /batch.
+
+Usage:
+    python -m benchmarks.bench_batch [--changes 200]
+"""
+import argparse
+
+from fastapi.testclient import TestClient
+
+from app.core.database import get_db
+from app.main import app
+from benchmarks.common import seed, temp_database, timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--changes", type=int, default=200)
+    args = parser.parse_args()
+
+    with temp_database() as (engine, session_factory):
+        [user_id] = seed(engine, 1, 0)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        # No lifespan: startup would touch the configured database
+        client = TestClient(app)
+        url = f"/api/v1/users/{user_id}/tasks/"
+        operations = [
+            {"op": "task.create", "user_id": user_id, "data": {"title": f"Task {i}"}}
+            for i in range(args.changes)
+        ]
+
+        def separate() -> None:
+            for i in range(args.changes):
+                client.post(url, json={"title": f"Task {i}"})
+
+        def batched() -> None:
+            client.post("/api/v1/batch", json={"operations": operations})
+
+        def batched_atomic() -> None:
+            client.post("/api/v1/batch", json={"operations": operations, "atomic": True})
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            results = {
+                f"{args.changes} requests": timed(separate, repeat=5),
+                "1 batch, savepoints": timed(batched, repeat=5),
+                "1 batch, atomic": timed(batched_atomic, repeat=5),
+            }
+        finally:
+            app.dependency_overrides.clear()
+
+    print(f"{'sync':<24} {'p50/p95 ms':>20}")
+    for name, (p50, p95) in results.items():
+        print(f"{name:<24} {p50:>9.2f} / {p95:<8.2f}")
+
+
+if __name__ == "__main__":
+    main()
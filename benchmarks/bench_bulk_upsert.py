@@ -0,0 +1,72 @@
+"""
+Benchmark provisioning users one create per commit versus one bulk upsert.
+
+Usage:
+    python -m benchmarks.bench_bulk_upsert [--users 20000]
+"""
+import argparse
+import time
+from typing import List
+
+from app.crud.user import UserCRUD
+from app.schemas import UserCreate
+from app.utils.exceptions import DuplicateError
+from benchmarks.common import temp_database
+
+
+def feed(count: int, renamed_every: int = 0) -> List[UserCreate]:
+    return [
+        UserCreate(
+            name=f"User {i}" + (" (renamed)" if renamed_every and i % renamed_every == 0 else ""),
+            email=f"user{i}@example.com",
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20000)
+    args = parser.parse_args()
+    users = feed(args.users)
+
+    results = {}
+    with temp_database("NORMAL") as (_, session_factory):
+        with session_factory() as db:
+            crud = UserCRUD(db)
+            start = time.perf_counter()
+            for user in users:
+                try:
+                    crud.create(user)
+                except DuplicateError:
+                    pass
+            results["create per user"] = (time.perf_counter() - start, None)
+
+    with temp_database("NORMAL") as (_, session_factory):
+        with session_factory() as db:
+            crud = UserCRUD(db)
+            for name, batch in (
+                ("bulk, all new", users),
+                ("bulk, 10% renamed", feed(args.users, renamed_every=10)),
+                ("bulk, unchanged", feed(args.users, renamed_every=10)),
+            ):
+                start = time.perf_counter()
+                outcome = crud.bulk_upsert(batch)
+                results[name] = (time.perf_counter() - start, outcome)
+
+    print(f"{args.users} users")
+    print(f"{'run':<20} {'seconds':>8} {'users/s':>9}  outcome")
+    for name, (elapsed, outcome) in results.items():
+        summary = (
+            ""
+            if outcome is None
+            else (
+                f"{outcome.created} created, {outcome.updated} updated, "
+                f"{outcome.unchanged} unchanged"
+            )
+        )
+        print(f"{name:<20} {elapsed:>8.2f} {args.users / elapsed:>9.0f}  {summary}")
+
+
+if __name__ == "__main__":
+    main()
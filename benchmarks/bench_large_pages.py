@@ -0,0 +1,87 @@
+"""
+Benchmark peak memory and time of one large task page, rendered whole versus streamed.
+
+Calls the endpoint function directly and drains the streamed body, so the
+numbers cover reading, serializing and emitting the page but not HTTP.
+
+Usage:
+    python -m benchmarks.bench_large_pages [--tasks 50000] [--batch 1000]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import AsyncIterator, Tuple
+
+from starlette.requests import Request
+
+from app.api.v1.tasks import get_user_tasks
+from app.core.cache import task_list_cache
+from app.core.config import settings
+from app.crud.task_filter import TaskFilter
+from benchmarks.common import seed, temp_database
+
+
+def _request(path: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [],
+        }
+    )
+
+
+async def _drain(body_iterator: AsyncIterator[bytes]) -> int:
+    return sum([len(chunk) async for chunk in body_iterator])
+
+
+def measure(session_factory, user_id: int, limit: int) -> Tuple[float, float, int]:
+    """Peak traced memory in MiB, seconds and body size of one page of ``limit`` tasks."""
+    task_list_cache.clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with session_factory() as db:
+        response = get_user_tasks(
+            user_id,
+            _request(f"/api/v1/users/{user_id}/tasks/"),
+            limit=limit,
+            filters=TaskFilter(),
+            fields=None,
+            db=db,
+        )
+        body_iterator = getattr(response, "body_iterator", None)
+        if body_iterator is None:
+            size = len(response.body)
+        else:
+            size = asyncio.run(_drain(body_iterator))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20, elapsed, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+    settings.MAX_PAGE_SIZE = args.tasks
+
+    with temp_database() as (engine, session_factory):
+        [user_id] = seed(engine, 1, args.tasks)
+        results = {}
+        for name, stream_page_size in (("rendered whole", args.tasks), ("streamed", args.batch)):
+            settings.STREAM_PAGE_SIZE = stream_page_size
+            results[name] = measure(session_factory, user_id, args.tasks)
+
+    print(f"page of {args.tasks} tasks, batches of {args.batch}")
+    print(f"{'mode':<16} {'peak MiB':>9} {'seconds':>8} {'body MiB':>9}")
+    for name, (peak, elapsed, size) in results.items():
+        print(f"{name:<16} {peak:>9.1f} {elapsed:>8.2f} {size / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
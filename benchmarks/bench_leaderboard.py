@@ -0,0 +1,70 @@
+"""
+Benchmark the top users by open tasks: counting per user versus maintained counters.
+
+Usage:
+    python -m benchmarks.bench_leaderboard [--users 2000] [--tasks-per-user 20] [--top 10]
+"""
+import argparse
+import heapq
+
+from sqlalchemy import case, func, insert, select
+
+from app.crud.analytics import TaskAnalyticsCRUD
+from app.crud.task import TaskCRUD
+from app.crud.user import UserCRUD
+from app.models import Task, TaskStatus, UserTaskCounts
+from benchmarks.common import seed, temp_database, timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--tasks-per-user", type=int, default=20)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    with temp_database() as (engine, session_factory):
+        seed(engine, args.users, args.tasks_per_user, done_ratio=0.3)
+        # seed() bypasses TaskCRUD, so fill the counters the way the migration does
+        with engine.begin() as conn:
+            conn.execute(
+                insert(UserTaskCounts).from_select(
+                    ["user_id", "open_tasks", "in_progress_tasks", "done_tasks"],
+                    select(
+                        Task.user_id,
+                        func.sum(case((Task.status != TaskStatus.DONE, 1), else_=0)),
+                        func.sum(case((Task.status == TaskStatus.IN_PROGRESS, 1), else_=0)),
+                        func.sum(case((Task.status == TaskStatus.DONE, 1), else_=0)),
+                    ).group_by(Task.user_id),
+                )
+            )
+
+        def per_user() -> list:
+            with session_factory() as db:
+                tasks = TaskCRUD(db)
+                open_counts = (
+                    (
+                        tasks.count_by_status(user.id, TaskStatus.TODO)
+                        + tasks.count_by_status(user.id, TaskStatus.IN_PROGRESS),
+                        user.id,
+                    )
+                    for user in UserCRUD(db).get_all(limit=args.users)
+                )
+                return heapq.nlargest(args.top, open_counts)
+
+        def counters() -> list:
+            with session_factory() as db:
+                return TaskAnalyticsCRUD(db).top_users("open", args.top)
+
+        results = {
+            f"count per user ({args.users} users)": timed(per_user, repeat=5),
+            "user_task_counts index": timed(counters, repeat=50),
+        }
+
+    print(f"{'top users by open tasks':<36} {'p50/p95 ms':>20}")
+    for name, (p50, p95) in results.items():
+        print(f"{name:<36} {p50:>9.2f} / {p95:<8.2f}")
+
+
+if __name__ == "__main__":
+    main()
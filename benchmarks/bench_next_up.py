@@ -0,0 +1,62 @@
+"""
+Benchmark next-up queue and overdue count latency as one user's backlog grows.
+
+Runs the same queries with ix_tasks_next_up and after dropping it, when SQLite
+falls back to the user_id index and sorts or scans the whole backlog.
+
+Usage:
+    python -m benchmarks.bench_next_up [--backlogs 1000,10000,100000] [--n 10]
+"""
+import argparse
+from datetime import datetime
+from typing import Dict, Tuple
+
+from sqlalchemy import text
+
+from app.crud.task import TaskCRUD
+from benchmarks.common import seed, temp_database, timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backlogs", default="1000,10000,100000")
+    parser.add_argument("--n", type=int, default=10)
+    args = parser.parse_args()
+    now = datetime(2026, 6, 1)
+
+    print(f"{'backlog':>8} {'query':<10} {'no index p50 ms':>16} {'indexed p50 ms':>15}")
+    for backlog in [int(value) for value in args.backlogs.split(",")]:
+        with temp_database() as (engine, session_factory):
+            user_id = seed(engine, 1, backlog, done_ratio=0.3)[0]
+            with engine.begin() as conn:
+                # Priorities 1-5 and due dates over 2026 on all but every fifth task
+                conn.execute(
+                    text(
+                        "UPDATE tasks SET priority = abs(random()) % 5 + 1, due_at = CASE "
+                        "WHEN id % 5 = 0 THEN NULL "
+                        "ELSE datetime('2026-01-01', '+' || (abs(random()) % 365) || ' days') END"
+                    )
+                )
+            db = session_factory()
+            tasks = TaskCRUD(db)
+
+            def run() -> Dict[str, Tuple[float, float]]:
+                return {
+                    "next": timed(lambda: tasks.next_up(user_id, args.n)),
+                    "overdue": timed(lambda: tasks.count_overdue(user_id, now)),
+                }
+
+            expected = (tasks.next_up(user_id, args.n), tasks.count_overdue(user_id, now))
+            indexed = run()
+            db.execute(text("DROP INDEX ix_tasks_next_up"))
+            db.commit()
+            assert (tasks.next_up(user_id, args.n), tasks.count_overdue(user_id, now)) == expected
+            unindexed = run()
+            db.close()
+
+        for query, (p50, _) in indexed.items():
+            print(f"{backlog:>8} {query:<10} {unindexed[query][0]:>16.2f} {p50:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark task listing and stats endpoints rendered every time versus served
+from the response cache.
+
+Calls the endpoint functions directly, so the numbers leave out HTTP and
+framework overhead that cached and rendered responses share.
+
+Usage:
+    python -m benchmarks.bench_response_cache [--tasks 2000] [--limit 100]
+"""
+import argparse
+from typing import Callable
+from urllib.parse import urlencode
+
+from starlette.requests import Request
+
+from app.api.v1.tasks import get_user_task_stats, get_user_tasks
+from app.core.cache import task_list_cache
+from app.crud.task_filter import TaskFilter
+from benchmarks.common import seed, temp_database, timed
+
+
+def _request(path: str, params: dict) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": urlencode(params).encode(),
+            "headers": [],
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    with temp_database() as (engine, session_factory):
+        [user_id] = seed(engine, 1, args.tasks, done_ratio=0.3)
+        page_request = _request(
+            f"/api/v1/users/{user_id}/tasks/", {"limit": args.limit, "sort": "-created_at"}
+        )
+        stats_request = _request(f"/api/v1/users/{user_id}/tasks/stats", {})
+
+        def page() -> None:
+            with session_factory() as db:
+                get_user_tasks(
+                    user_id,
+                    page_request,
+                    limit=args.limit,
+                    filters=TaskFilter(sort="created_at", descending=True),
+                    fields=None,
+                    db=db,
+                )
+
+        def stats() -> None:
+            with session_factory() as db:
+                get_user_task_stats(user_id, stats_request, db=db)
+
+        def rendered(endpoint: Callable[[], None]) -> Callable[[], None]:
+            def call() -> None:
+                # As if every read followed a write
+                task_list_cache.invalidate([user_id])
+                endpoint()
+
+            return call
+
+        results = {
+            f"page of {args.limit}, rendered": timed(rendered(page)),
+            f"page of {args.limit}, cached": timed(page, repeat=500),
+            "stats, rendered": timed(rendered(stats)),
+            "stats, cached": timed(stats, repeat=500),
+        }
+
+    print(f"{'request':<28} {'p50/p95 ms':>20}")
+    for name, (p50, p95) in results.items():
+        print(f"{name:<28} {p50:>9.2f} / {p95:<8.2f}")
+    print(f"hit ratio {task_list_cache.hit_ratio():.2f}, {task_list_cache.size} bytes cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark listing a user's tasks as full rows versus a sparse fieldset.
+
+Usage:
+    python -m benchmarks.bench_sparse_fields [--tasks-per-user 1000] [--fields id,title,status]
+"""
+import argparse
+
+from app.crud.task import TaskCRUD
+from app.schemas.task import TASK_FIELDS, Task
+from benchmarks.common import seed, task_projection, temp_database, timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks-per-user", type=int, default=1000)
+    parser.add_argument("--fields", default="id,title,status")
+    args = parser.parse_args()
+    fields = tuple(name for name in TASK_FIELDS if name in args.fields.split(","))
+
+    with temp_database() as (engine, session_factory):
+        [user_id] = seed(engine, 1, args.tasks_per_user)
+        full_adapter = task_projection(TASK_FIELDS)
+        sparse_adapter = task_projection(fields)
+
+        def full() -> bytes:
+            with session_factory() as db:
+                tasks = TaskCRUD(db).get_by_user_id(user_id, limit=None)
+                return full_adapter.dump_json([Task.model_validate(task) for task in tasks])
+
+        def sparse() -> bytes:
+            with session_factory() as db:
+                rows = TaskCRUD(db).get_by_user_id(user_id, limit=None, columns=fields)
+                return sparse_adapter.dump_json(
+                    sparse_adapter.validate_python(rows, from_attributes=True)
+                )
+
+        results = {
+            "full rows": (timed(full, repeat=20), len(full())),
+            f"fields={','.join(fields)}": (timed(sparse, repeat=20), len(sparse())),
+        }
+
+    print(f"{'response':<32} {'p50/p95 ms':>20} {'bytes':>10}")
+    for name, ((p50, p95), size) in results.items():
+        print(f"{name:<32} {p50:>9.2f} / {p95:<8.2f} {size:>10}")
+
+
+if __name__ == "__main__":
+    main()
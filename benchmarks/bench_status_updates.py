@@ -0,0 +1,65 @@
+"""
+Benchmark status update throughput with and without group commit.
+
+Usage:
+    python -m benchmarks.bench_status_updates [--threads 16] [--updates 50]
+
+Each thread updates its own tasks through ``TaskCRUD.update_status`` on its
+own session, mimicking concurrent PATCH /tasks/{id}/status requests.
+"""
+import argparse
+import threading
+import time
+
+from app.core.config import settings
+from app.crud.task import TaskCRUD, shutdown_status_batchers
+from app.models import Task, TaskStatus
+from app.schemas import TaskStatusUpdate
+from benchmarks.common import seed, temp_database
+
+STATUSES = [TaskStatus.IN_PROGRESS, TaskStatus.DONE, TaskStatus.TODO]
+
+
+def run(threads: int, updates: int, batching: bool, delay_ms: float, synchronous: str) -> float:
+    settings.STATUS_WRITE_BATCHING = batching
+    settings.STATUS_BATCH_MAX_DELAY_MS = delay_ms
+    settings.STATUS_BATCH_MAX_SIZE = threads
+    with temp_database(synchronous) as (engine, session_factory):
+        seed(engine, users=1, tasks_per_user=threads)
+        with session_factory() as db:
+            task_ids = [task.id for task in db.query(Task).all()]
+
+        def worker(task_id: int) -> None:
+            with session_factory() as db:
+                crud = TaskCRUD(db)
+                for i in range(updates):
+                    crud.update_status(task_id, TaskStatusUpdate(status=STATUSES[i % 3]))
+
+        workers = [threading.Thread(target=worker, args=(task_id,)) for task_id in task_ids]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        shutdown_status_batchers()
+    return threads * updates / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--updates", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'mode':<28} {'synchronous':<12} {'updates/s':>10}")
+    for synchronous in ("FULL", "NORMAL"):
+        rate = run(args.threads, args.updates, False, 0, synchronous)
+        print(f"{'commit per update':<28} {synchronous:<12} {rate:>10.0f}")
+        for delay_ms in (1.0, 5.0, 20.0):
+            rate = run(args.threads, args.updates, True, delay_ms, synchronous)
+            print(f"{f'group commit ({delay_ms:g} ms)':<28} {synchronous:<12} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
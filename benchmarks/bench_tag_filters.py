@@ -0,0 +1,78 @@
+"""
+Benchmark tag-filtered task pages on one user's large backlog.
+
+Tags are on 50%, 30%, 1% and 0.1% of the tasks. Each page is read by looking
+every walked task up in task_tags, by merging the tags' posting lists, and by
+the strategy ``TaskFilter.with_tags`` picks from the tag counts.
+
+Usage:
+    python -m benchmarks.bench_tag_filters [--tasks 100000] [--limit 20]
+"""
+import argparse
+import random
+import time
+from typing import Dict
+
+from sqlalchemy import insert, select
+
+from app.crud import task_filter as task_filter_module
+from app.crud.task import TaskCRUD
+from app.crud.task_filter import TaskFilter
+from app.models import Task, UserTaskCounts
+from benchmarks.common import seed, temp_database, timed
+
+DENSITIES = {"half": 0.5, "third": 0.3, "rare": 0.01, "rarest": 0.001}
+FILTERS = [
+    ("half", "third"),
+    ("half", "rare"),
+    ("third", "rarest"),
+    ("rare", "rarest"),
+]
+STRATEGIES = {"probe": 0, "merge": 10**9, "picked": task_filter_module.TAG_PROBE_COST}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with temp_database() as (engine, session_factory):
+        user_id = seed(engine, 1, args.tasks)[0]
+        db = session_factory()
+        db.execute(
+            insert(UserTaskCounts).values(
+                user_id=user_id, open_tasks=args.tasks, in_progress_tasks=0, done_tasks=0
+            )
+        )
+        db.commit()
+        tasks = TaskCRUD(db)
+        task_ids = list(db.scalars(select(Task.id)))
+        random.seed(0)
+        start = time.perf_counter()
+        for tag, density in DENSITIES.items():
+            tasks.tag_tasks(user_id, random.sample(task_ids, int(len(task_ids) * density)), [tag])
+        print(f"tagged {args.tasks} tasks in {time.perf_counter() - start:.2f} s")
+
+        print(f"{'tags':<14} {'sort':<6} " + " ".join(f"{name + ' ms':>10}" for name in STRATEGIES))
+        for tags in FILTERS:
+            for sort in ("id", "title"):
+                task_filter = TaskFilter(tags=tags, sort=sort)
+                results: Dict[str, float] = {}
+                pages = []
+                for name, probe_cost in STRATEGIES.items():
+                    task_filter_module.TAG_PROBE_COST = probe_cost
+                    pages.append(tasks.list_by_user(user_id, task_filter, limit=args.limit))
+                    results[name] = timed(
+                        lambda: tasks.list_by_user(user_id, task_filter, limit=args.limit), 20
+                    )[0]
+                assert all(page == pages[0] for page in pages)
+                print(
+                    f"{','.join(tags):<14} {sort:<6} "
+                    + " ".join(f"{results[name]:>10.2f}" for name in STRATEGIES)
+                )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
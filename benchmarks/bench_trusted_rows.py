@@ -0,0 +1,72 @@
+"""
+Benchmark serializing database rows validated ``from_attributes`` versus the trusted path.
+
+Usage:
+    python -m benchmarks.bench_trusted_rows [--rows 10000]
+"""
+import argparse
+from typing import Any, Callable, Dict, List, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.models import Task, User
+from app.schemas import User as UserSchema
+from app.schemas.task import TASK_FIELDS, task_serializer
+from app.schemas.user import user_serializer
+from benchmarks.common import seed, task_projection, temp_database, timed
+
+Serialize = Callable[[List[Any]], bytes]
+
+
+def validated(adapter: "TypeAdapter[List[Any]]") -> Serialize:
+    """The from_attributes flow the endpoints used before the trusted path."""
+    return lambda rows: adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+    sparse = ("id", "title", "status")
+
+    with temp_database() as (engine, session_factory):
+        seed(engine, args.rows, 1)
+        with session_factory() as db:
+            tasks = list(db.scalars(select(Task)))
+            task_rows = list(db.execute(select(*[getattr(Task, name) for name in sparse])))
+            users = list(db.scalars(select(User)))
+
+        cases: Dict[str, Tuple[Serialize, Serialize, List[Any]]] = {
+            "tasks, ORM objects": (
+                validated(task_projection(TASK_FIELDS)),
+                task_serializer(TASK_FIELDS).dump_json,
+                tasks,
+            ),
+            "tasks, sparse rows": (
+                validated(task_projection(sparse)),
+                task_serializer(sparse).dump_json,
+                task_rows,
+            ),
+            "users, ORM objects": (
+                validated(TypeAdapter(List[UserSchema])),
+                user_serializer.dump_json,
+                users,
+            ),
+        }
+        results = {}
+        for name, (validating, trusted, rows) in cases.items():
+            assert validating(rows) == trusted(rows)
+            results[name] = (
+                timed(lambda: validating(rows), repeat=20)[0],
+                timed(lambda: trusted(rows), repeat=20)[0],
+            )
+
+    print(f"{args.rows} rows, median ms")
+    print(f"{'rows':<22} {'validated':>10} {'trusted':>9} {'saved':>7}")
+    for name, (before, after) in results.items():
+        print(f"{name:<22} {before:>10.1f} {after:>9.1f} {1 - after / before:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
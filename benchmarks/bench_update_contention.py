@@ -0,0 +1,147 @@
+"""
+Benchmark task updates under contention: concurrent writers on a few hot tasks.
+
+Every writer increments a counter kept in its task's description: it reads the
+task, adds one and writes it back. With the old read-modify-write update
+(SELECT, setattr, flush) a write committed in between is silently overwritten
+and its increment lost; with ``expected_version`` the update conflicts and the
+writer reads again and retries. Blind writes, which send new values without
+reading first, compare the cost of the two update paths themselves.
+
+Usage:
+    python -m benchmarks.bench_update_contention [--threads 1,4,16] [--tasks 2] [--updates 50]
+"""
+import argparse
+import statistics
+import threading
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session, object_session
+
+from app.core.database import commit
+from app.core.events import TASK_UPDATED
+from app.crud.task import TaskCRUD, next_change_seq
+from app.models import Task
+from app.schemas import TaskUpdate
+from app.utils.exceptions import ConflictError
+from benchmarks.common import seed, temp_database
+
+
+class LegacyTaskCRUD(TaskCRUD):
+    """TaskCRUD with the read-modify-write update that compare-and-set replaced."""
+
+    def update(self, task_id: int, task_data: TaskUpdate) -> Task:
+        task = self.get_by_id(task_id)
+        previous = task.status
+        for field, value in task_data.model_dump(exclude_unset=True).items():
+            setattr(task, field, value)
+        db = object_session(task)
+        if task.status != previous:
+            self._record_status(db, task, previous)
+        task.change_seq = next_change_seq(db)
+        self._publish(db, task, TASK_UPDATED)
+        commit(db)
+        db.refresh(task)
+        return task
+
+
+def increment(crud: TaskCRUD, db: Session, task_id: int, checked: bool) -> int:
+    """Add one to the task's counter; returns the number of conflicts retried."""
+    conflicts = 0
+    while True:
+        task = crud.get_by_id(task_id)
+        data = TaskUpdate(
+            description=str(int(task.description) + 1),
+            expected_version=task.version if checked else None,
+        )
+        db.expire_all()
+        try:
+            crud.update(task_id, data)
+            return conflicts
+        except ConflictError:
+            db.rollback()
+            conflicts += 1
+
+
+def blind_write(crud: TaskCRUD, db: Session, task_id: int, checked: bool) -> int:
+    crud.update(task_id, TaskUpdate(title=f"Title {time.perf_counter_ns()}"))
+    return 0
+
+
+def run(
+    write: Callable[[TaskCRUD, Session, int, bool], int],
+    crud_class: type,
+    checked: bool,
+    threads: int,
+    tasks: int,
+    updates: int,
+) -> Dict[str, float]:
+    with temp_database() as (engine, session_factory):
+        seed(engine, users=1, tasks_per_user=tasks)
+        with engine.begin() as conn:
+            conn.execute(update(Task).values(description="0"))
+        with session_factory() as db:
+            task_ids = [task.id for task in db.query(Task).order_by(Task.id)]
+        latencies: List[float] = []
+        conflicts: List[int] = []
+
+        def writer(index: int) -> None:
+            with session_factory() as db:
+                crud = crud_class(db)
+                for i in range(updates):
+                    start = time.perf_counter()
+                    conflicts.append(write(crud, db, task_ids[(index + i) % tasks], checked))
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+        workers = [threading.Thread(target=writer, args=(index,)) for index in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        with session_factory() as db:
+            counted = sum(int(task.description) for task in db.query(Task))
+        latencies.sort()
+        return {
+            "rate": threads * updates / elapsed,
+            "p50": statistics.median(latencies),
+            "p95": latencies[int(len(latencies) * 0.95) - 1],
+            "conflicts": sum(conflicts),
+            "lost": threads * updates - counted if write is increment else 0,
+        }
+
+
+MODES = [
+    ("increment", "read-modify-write", increment, LegacyTaskCRUD, False),
+    ("increment", "compare-and-set", increment, TaskCRUD, True),
+    ("blind", "read-modify-write", blind_write, LegacyTaskCRUD, False),
+    ("blind", "compare-and-set", blind_write, TaskCRUD, False),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", default="1,4,16")
+    parser.add_argument("--tasks", type=int, default=2)
+    parser.add_argument("--updates", type=int, default=50)
+    args = parser.parse_args()
+
+    print(
+        f"{'writes':<10} {'update':<18} {'threads':>7} {'updates/s':>10} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'conflicts':>9} {'lost':>6}"
+    )
+    for threads in [int(value) for value in args.threads.split(",")]:
+        for writes, name, write, crud_class, checked in MODES:
+            result = run(write, crud_class, checked, threads, args.tasks, args.updates)
+            print(
+                f"{writes:<10} {name:<18} {threads:>7} {result['rate']:>10.0f} "
+                f"{result['p50']:>8.2f} {result['p95']:>8.2f} {result['conflicts']:>9} "
+                f"{result['lost']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
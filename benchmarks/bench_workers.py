@@ -0,0 +1,103 @@
+"""
+Benchmark request throughput of app.tools.serve with 1, 2, 4, ... worker processes.
+
+Starts the server on a seeded throwaway database for each worker count and
+drives it with keep-alive clients in separate processes. Clients share the
+machine with the server, so expect throughput to grow with workers only while
+idle cores remain.
+
+Usage:
+    python -m benchmarks.bench_workers [--workers 1,2,4] [--seconds 5] [--clients 8]
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import List
+
+from app.tools.serve import available_cpus
+from benchmarks.common import seed, temp_database
+
+PORT = 8765
+USERS = 100
+TASKS_PER_USER = 20
+
+
+def _client(seconds: float, task_count: int) -> int:
+    """Issue GET /tasks/{id} over one keep-alive connection for ``seconds``; return requests."""
+    conn = http.client.HTTPConnection("127.0.0.1", PORT)
+    done = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        conn.request("GET", f"/api/v1/tasks/{random.randint(1, task_count)}")
+        conn.getresponse().read()
+        done += 1
+    conn.close()
+    return done
+
+
+def _wait_until_up(timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def run(database_url: str, workers: int, seconds: float, clients: int) -> float:
+    env = {**os.environ, "DATABASE_URL": database_url, "SQLITE_JOURNAL_MODE": "WAL"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.tools.serve", "--workers", str(workers), "--port", str(PORT)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_up()
+        # Warm every worker's connection pool and code paths
+        _client(1.0, USERS * TASKS_PER_USER)
+        with multiprocessing.Pool(clients) as pool:
+            counts = pool.starmap(_client, [(seconds, USERS * TASKS_PER_USER)] * clients)
+        return sum(counts) / seconds
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    cpus = available_cpus()
+    default = [1]
+    while default[-1] * 2 <= cpus:
+        default.append(default[-1] * 2)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", default=",".join(map(str, default)))
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--clients", type=int, default=8)
+    args = parser.parse_args()
+    worker_counts: List[int] = [int(value) for value in args.workers.split(",")]
+
+    with temp_database() as (engine, _):
+        seed(engine, USERS, TASKS_PER_USER)
+        database_url = str(engine.url)
+        results = {
+            workers: run(database_url, workers, args.seconds, args.clients)
+            for workers in worker_counts
+        }
+
+    print(f"{cpus} CPU(s) available")
+    print(f"{'workers':<10} {'req/s':>10} {'speedup':>9}")
+    for workers, rate in results.items():
+        print(f"{workers:<10} {rate:>10.0f} {rate / results[worker_counts[0]]:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
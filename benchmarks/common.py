@@ -0,0 +1,84 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from pydantic import ConfigDict, TypeAdapter, create_model
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import Task, TaskStatus, User
+from app.schemas.task import Task as TaskSchema
+
+
+@contextmanager
+def temp_database(synchronous: Optional[str] = None) -> Iterator[Tuple[Engine, sessionmaker]]:
+    """Create a throwaway SQLite file database with all tables."""
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    if synchronous:
+
+        @event.listens_for(engine, "connect")
+        def _set_synchronous(dbapi_connection, connection_record) -> None:
+            dbapi_connection.execute(f"PRAGMA synchronous={synchronous}")
+
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+def seed(engine: Engine, users: int, tasks_per_user: int, done_ratio: float = 0.0) -> List[int]:
+    """Bulk insert users and tasks, returning the user ids."""
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [{"name": f"User {i}", "email": f"user{i}@example.com"} for i in range(users)],
+        )
+        user_ids = [row.id for row in conn.execute(User.__table__.select())]
+        rows = []
+        for user_id in user_ids:
+            for i in range(tasks_per_user):
+                status = TaskStatus.DONE if i % 100 < done_ratio * 100 else TaskStatus.TODO
+                rows.append(
+                    {
+                        "title": f"Task {i}",
+                        "description": "x" * 200,
+                        "user_id": user_id,
+                        "status": status,
+                    }
+                )
+        for start in range(0, len(rows), 5000):
+            conn.execute(insert(Task), rows[start : start + 5000])
+    return user_ids
+
+
+def timed(fn: Callable[[], object], repeat: int = 50) -> Tuple[float, float]:
+    """Run ``fn`` repeatedly and return (median, p95) latency in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def task_projection(fields: Tuple[str, ...]) -> "TypeAdapter[List[Any]]":
+    """Validating adapter of lists of rows with only ``fields`` of the Task schema."""
+    model = create_model(  # type: ignore[call-overload]
+        "TaskFields_" + "_".join(fields),
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (TaskSchema.model_fields[name].annotation, ...) for name in fields},
+    )
+    return TypeAdapter(List[model])  # type: ignore[valid-type]
@@ -57,6 +57,46 @@ def sample_user_data():
     return {"name": "John Doe", "email": f"john.doe.{uuid.uuid4().hex[:8]}@example.com"}
 
 
+@pytest.fixture
+def user_with_tasks(client, sample_user_data):
+    """
+    Factory creating the sample user and their tasks through the API.
+
+    ``tasks`` is a number of tasks titled ``Task 0``, ``Task 1``... or a list of
+    titles or task payloads, where a payload may also carry the task's
+    ``status``. Returns the user id and the task ids in creation order.
+    """
+
+    def create(tasks=()):
+        if isinstance(tasks, int):
+            tasks = [f"Task {i}" for i in range(tasks)]
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        task_ids = []
+        for task in tasks:
+            data = {"title": task} if isinstance(task, str) else dict(task)
+            task_status = data.pop("status", "TODO")
+            response = client.post(f"/api/v1/users/{user_id}/tasks/", json=data)
+            assert response.status_code == 201, response.text
+            task_ids.append(response.json()["id"])
+            if task_status != "TODO":
+                client.patch(f"/api/v1/tasks/{task_ids[-1]}/status", json={"status": task_status})
+        return user_id, task_ids
+
+    return create
+
+
+@pytest.fixture
+def task_titles(client):
+    """Titles of a user's tasks as listed by ``/users/{user_id}/tasks/{endpoint}``."""
+
+    def titles(user_id, endpoint="", **params):
+        response = client.get(f"/api/v1/users/{user_id}/tasks/{endpoint}", params=params)
+        assert response.status_code == 200, response.text
+        return [task["title"] for task in response.json()]
+
+    return titles
+
+
 @pytest.fixture
 def sample_task_data():
     return {"title": "Complete project", "description": "Finish the task management system project"}
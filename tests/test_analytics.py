@@ -0,0 +1,211 @@
+"""
+Tests for task status history, its rollups and the analytics endpoints.
+"""
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from app.crud import get_task_analytics_crud
+from app.crud.analytics import ACTIVITY_WINDOW_CURSOR, ACTIVITY_WINDOW_DAYS, completion_durations
+from app.models import RollupCursor, TaskStatus, TaskStatusEvent, UserActivity, UserTaskCounts
+from app.utils.histogram import bucket_of, bucket_value, percentile
+
+DAY = datetime(2026, 3, 2)
+
+
+def _event(id, from_status, to_status, hours):
+    return TaskStatusEvent(
+        id=id,
+        from_status=from_status,
+        to_status=to_status,
+        occurred_at=DAY + timedelta(hours=hours),
+    )
+
+
+class TestStatusHistory:
+    """Test cases for recording and rolling up status transitions."""
+
+    def _history(self, db_session, task_id):
+        events = (
+            db_session.query(TaskStatusEvent)
+            .filter(TaskStatusEvent.task_id == task_id)
+            .order_by(TaskStatusEvent.id)
+        )
+        return [(event.from_status, event.to_status) for event in events]
+
+    def test_transitions_are_recorded(self, client, db_session, user_with_tasks):
+        _, [task_id] = user_with_tasks(1)
+
+        client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": "IN_PROGRESS"})
+        client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": "IN_PROGRESS"})
+        client.put(f"/api/v1/tasks/{task_id}", json={"title": "Renamed"})
+        client.put(f"/api/v1/tasks/{task_id}", json={"status": "DONE"})
+
+        assert self._history(db_session, task_id) == [
+            (None, TaskStatus.TODO),
+            (TaskStatus.TODO, TaskStatus.IN_PROGRESS),
+            (TaskStatus.IN_PROGRESS, TaskStatus.DONE),
+        ]
+
+    def test_rollups_feed_analytics(self, client, db_session, user_with_tasks):
+        analytics = get_task_analytics_crud(db_session)
+        analytics.roll_up()
+        user_id, task_ids = user_with_tasks(3)
+
+        # Task i is created at 08:00, started i hours later and done 2*i hours later
+        for i, task_id in enumerate(task_ids, 1):
+            for target in ("IN_PROGRESS", "DONE"):
+                client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": target})
+            events = db_session.query(TaskStatusEvent).filter(TaskStatusEvent.task_id == task_id)
+            for offset, event in enumerate(events.order_by(TaskStatusEvent.id)):
+                event.occurred_at = DAY + timedelta(hours=8 + offset * i)
+        db_session.commit()
+
+        assert analytics.roll_up(batch_size=4) == 9
+        assert analytics.roll_up() == 0
+
+        params = {"start": "2026-03-01", "end": "2026-03-03"}
+        throughput = client.get(
+            f"/api/v1/users/{user_id}/tasks/analytics/throughput", params=params
+        )
+        assert throughput.status_code == status.HTTP_200_OK
+        assert [
+            (d["day"], d["created"], d["started"], d["completed"])
+            for d in throughput.json()["days"]
+        ] == [("2026-03-01", 0, 0, 0), ("2026-03-02", 3, 3, 3), ("2026-03-03", 0, 0, 0)]
+
+        times = client.get(
+            f"/api/v1/users/{user_id}/tasks/analytics/cycle-time", params=params
+        ).json()
+        assert times["lead_time"]["count"] == times["cycle_time"]["count"] == 3
+        assert abs(times["lead_time"]["p50_seconds"] - 4 * 3600) / (4 * 3600) < 0.1
+        assert abs(times["cycle_time"]["p90_seconds"] - 3 * 3600) / (3 * 3600) < 0.1
+
+    def test_invalid_range(self, client):
+        url = "/api/v1/users/1/tasks/analytics/throughput"
+        assert (
+            client.get(url, params={"start": "2026-03-02", "end": "2026-03-01"}).status_code == 400
+        )
+        assert (
+            client.get(url, params={"start": "2020-01-01", "end": "2026-01-01"}).status_code == 400
+        )
+
+
+class TestLeaderboard:
+    """Test cases for maintained per-user counters and the admin leaderboard."""
+
+    def test_counters_follow_writes(self, client, db_session, user_with_tasks):
+        statuses = ["TODO", "TODO", "IN_PROGRESS", "DONE"]
+        user_id, task_ids = user_with_tasks([{"title": "T", "status": s} for s in statuses])
+        client.put(f"/api/v1/tasks/{task_ids[0]}", json={"status": "DONE"})
+        client.delete(f"/api/v1/tasks/{task_ids[1]}")
+
+        counts = db_session.get(UserTaskCounts, user_id)
+        assert (counts.open_tasks, counts.in_progress_tasks, counts.done_tasks) == (1, 1, 2)
+
+        client.delete(f"/api/v1/users/{user_id}")
+        db_session.expire_all()
+        assert db_session.get(UserTaskCounts, user_id) is None
+
+    def test_top_users(self, client, sample_user_data, user_with_tasks):
+        statuses = ["TODO"] * 5 + ["IN_PROGRESS"] * 2
+        user_id, _ = user_with_tasks([{"title": "T", "status": s} for s in statuses])
+        entry = {"user_id": user_id, "name": sample_user_data["name"]}
+        url = "/api/v1/admin/leaderboard"
+
+        response = client.get(url, params={"by": "open", "limit": 100})
+        assert response.status_code == status.HTTP_200_OK
+        entries = response.json()["entries"]
+        assert {**entry, "count": 7} in entries
+        counts = [entry["count"] for entry in entries]
+        assert counts == sorted(counts, reverse=True)
+
+        in_progress = client.get(url, params={"by": "in_progress", "limit": 100}).json()
+        assert {**entry, "count": 2} in in_progress["entries"]
+        assert client.get(url, params={"by": "oldest"}).status_code == 422
+
+    def test_most_active_users(self, client, db_session, sample_user_data, user_with_tasks):
+        statuses = ["DONE", "IN_PROGRESS"]
+        user_id, _ = user_with_tasks([{"title": "T", "status": s} for s in statuses])
+        get_task_analytics_crud(db_session).roll_up()
+
+        # 2 created, 1 started, 1 completed
+        entry = {"user_id": user_id, "name": sample_user_data["name"], "count": 4}
+        # The default window is kept in user_activity; others sum the daily rollups
+        for days in (ACTIVITY_WINDOW_DAYS, 30):
+            response = client.get(
+                "/api/v1/admin/leaderboard", params={"by": "active", "limit": 100, "days": days}
+            )
+            assert entry in response.json()["entries"]
+
+    def test_activity_window_rolls(self, client, db_session, user_with_tasks):
+        analytics = get_task_analytics_crud(db_session)
+        analytics.roll_up()
+        user_id, [task_id] = user_with_tasks(1)
+        client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": "IN_PROGRESS"})
+        # Created three days ago, started today
+        creation = db_session.query(TaskStatusEvent).filter(
+            TaskStatusEvent.task_id == task_id, TaskStatusEvent.from_status.is_(None)
+        )
+        creation.one().occurred_at = datetime.utcnow() - timedelta(days=3)
+        db_session.commit()
+        today = datetime.utcnow().date()
+
+        def activity():
+            entries = analytics.most_active_users(ACTIVITY_WINDOW_DAYS, 1000)
+            return next((entry.count for entry in entries if entry.user_id == user_id), None)
+
+        try:
+            analytics.roll_up()
+            assert activity() == 2
+            # The day of the creation leaves the window
+            analytics._advance_activity_window(db_session, today + timedelta(days=4))
+            assert activity() == 1
+            analytics._advance_activity_window(db_session, today + timedelta(days=7))
+            assert activity() is None
+            assert db_session.get(UserActivity, user_id) is None
+        finally:
+            db_session.query(RollupCursor).filter(
+                RollupCursor.name == ACTIVITY_WINDOW_CURSOR
+            ).delete()
+            db_session.commit()
+
+        # Without a window the next rollup rebuilds it from the daily rollups
+        analytics.roll_up()
+        assert activity() == 2
+
+
+def test_completion_durations_restart_when_reopened():
+    history = [
+        _event(1, None, TaskStatus.TODO, 0),
+        _event(2, TaskStatus.TODO, TaskStatus.IN_PROGRESS, 2),
+        _event(3, TaskStatus.IN_PROGRESS, TaskStatus.DONE, 5),
+        _event(4, TaskStatus.DONE, TaskStatus.TODO, 10),
+        _event(5, TaskStatus.TODO, TaskStatus.DONE, 11),
+    ]
+
+    assert completion_durations(history) == {3: (5 * 3600, 3 * 3600), 5: (3600, None)}
+
+
+def test_completion_durations_restart_at_creation():
+    # A deleted task left IN_PROGRESS, then a new task with its id went straight to DONE
+    history = [
+        _event(1, None, TaskStatus.TODO, 0),
+        _event(2, TaskStatus.TODO, TaskStatus.IN_PROGRESS, 2),
+        _event(3, None, TaskStatus.TODO, 10),
+        _event(4, TaskStatus.TODO, TaskStatus.DONE, 11),
+    ]
+
+    assert completion_durations(history) == {4: (3600, None)}
+
+
+def test_histogram_percentiles():
+    counts = {}
+    for seconds in range(1, 101):
+        bucket = bucket_of(seconds * 60)
+        counts[bucket] = counts.get(bucket, 0) + 1
+
+    assert abs(percentile(counts, 50) - 50 * 60) / (50 * 60) < 0.1
+    assert abs(percentile(counts, 90) - 90 * 60) / (90 * 60) < 0.1
+    assert percentile({}, 50) is None
+    assert bucket_value(bucket_of(0.5)) < 2
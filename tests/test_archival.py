@@ -0,0 +1,85 @@
+"""
+Tests for archiving completed tasks.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy import update
+
+from app.crud import get_task_crud
+from app.models.task import Task
+
+
+def _age_tasks(db_session, task_ids, days):
+    db_session.execute(
+        update(Task)
+        .where(Task.id.in_(task_ids))
+        .values(updated_at=datetime.utcnow() - timedelta(days=days))
+    )
+    db_session.commit()
+
+
+class TestArchival:
+    """Test cases for the archival subsystem."""
+
+    @pytest.fixture()
+    def archived(self, db_session, user_with_tasks):
+        """Four tasks, three of them DONE, archived with a 30 day cutoff."""
+        user_id, ids = user_with_tasks(
+            [{"title": f"Task {i}", "status": "DONE"} for i in range(3)] + ["Task 3"]
+        )
+        # Only two of the three DONE tasks are old enough to archive
+        _age_tasks(db_session, ids[:2], days=90)
+        archived = get_task_crud(db_session).archive_done(
+            datetime.utcnow() - timedelta(days=30), batch_size=1
+        )
+        return user_id, ids, archived
+
+    def test_archive_moves_old_done_tasks(self, client, archived):
+        user_id, ids, count = archived
+
+        assert count == 2
+        active = client.get(f"/api/v1/users/{user_id}/tasks/").json()
+        assert sorted(task["id"] for task in active) == ids[2:]
+        assert client.get(f"/api/v1/tasks/{ids[0]}").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_include_archived_in_listing(self, client, archived):
+        user_id, ids, _ = archived
+
+        response = client.get(f"/api/v1/users/{user_id}/tasks/?include_archived=true")
+        assert [task["id"] for task in response.json()] == ids
+
+        done = client.get(
+            f"/api/v1/users/{user_id}/tasks/",
+            params={"status_filter": "DONE", "include_archived": True},
+        )
+        assert [task["id"] for task in done.json()] == ids[:3]
+
+    def test_stats_with_archived(self, client, archived):
+        user_id, _, _ = archived
+
+        active = client.get(f"/api/v1/users/{user_id}/tasks/stats").json()
+        assert (active["total_tasks"], active["done_tasks"]) == (2, 1)
+
+        everything = client.get(f"/api/v1/users/{user_id}/tasks/stats?include_archived=true").json()
+        assert (everything["total_tasks"], everything["done_tasks"]) == (4, 3)
+        assert everything["completion_rate"] == 75.0
+
+    def test_archived_ids_are_not_reused(self, client, db_session, user_with_tasks):
+        user_id, _ = user_with_tasks()
+        cutoff = datetime.utcnow() - timedelta(days=30)
+        task_crud = get_task_crud(db_session)
+        ids = []
+        # Archiving the newest task twice over must not clash in archived_tasks
+        for title in ("First", "Second"):
+            response = client.post(f"/api/v1/users/{user_id}/tasks/", json={"title": title})
+            task_id = response.json()["id"]
+            client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": "DONE"})
+            _age_tasks(db_session, [task_id], days=90)
+            assert task_crud.archive_done(cutoff) == 1
+            ids.append(task_id)
+
+        assert ids[1] > ids[0]
+        response = client.get(f"/api/v1/users/{user_id}/tasks/?include_archived=true")
+        assert [task["id"] for task in response.json()] == ids
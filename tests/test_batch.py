@@ -0,0 +1,109 @@
+"""
+Tests for the batch endpoint.
+"""
+import asyncio
+
+from fastapi import status
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from app.core.events import broker
+
+
+class TestBatch:
+    """Test cases for POST /batch."""
+
+    def test_mixed_operations_with_one_commit(
+        self, client, db_session, sample_user_data, user_with_tasks
+    ):
+        user_id, _ = user_with_tasks()
+        commits = []
+
+        def count_commit(session):
+            if not session.in_nested_transaction():
+                commits.append(session)
+
+        event.listen(db_session, "after_commit", count_commit)
+        try:
+            response = client.post(
+                "/api/v1/batch",
+                json={
+                    "operations": [
+                        {"op": "task.create", "user_id": user_id, "data": {"title": "One"}},
+                        {"op": "task.create", "user_id": user_id, "data": {"title": "Two"}},
+                        {"op": "task.delete", "task_id": 999999},
+                        {"op": "user.create", "data": sample_user_data},
+                        {"op": "task.create", "user_id": user_id, "data": {}},
+                        {"op": "task.update_status", "data": {"status": "DONE"}},
+                    ]
+                },
+            )
+        finally:
+            event.remove(db_session, "after_commit", count_commit)
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["results"]
+        assert [result["status"] for result in results] == [201, 201, 404, 409, 422, 422]
+        assert results[1]["body"]["title"] == "Two"
+        assert len(commits) == 1
+        tasks = client.get(f"/api/v1/users/{user_id}/tasks/").json()
+        assert [task["title"] for task in tasks] == ["One", "Two"]
+
+    def test_atomic_batch_rolls_back_on_failure(self, client, user_with_tasks):
+        user_id, _ = user_with_tasks()
+        response = client.post(
+            "/api/v1/batch",
+            json={
+                "atomic": True,
+                "operations": [
+                    {"op": "task.create", "user_id": user_id, "data": {"title": "One"}},
+                    {"op": "task.update", "task_id": 999999, "data": {"title": "x"}},
+                    {"op": "task.create", "user_id": user_id, "data": {"title": "Two"}},
+                ],
+            },
+        )
+
+        assert [result["status"] for result in response.json()["results"]] == [424, 404, 424]
+        assert client.get(f"/api/v1/users/{user_id}/tasks/").json() == []
+
+    def test_failed_operation_publishes_no_event(self, client, db_session, user_with_tasks):
+        user_id, task_ids = user_with_tasks(["One", "Two"])
+        failed = []
+
+        def fail_first_update(conn, cursor, statement, parameters, context, executemany):
+            # Fails at flush, after the event for the first operation was queued
+            if statement.startswith("UPDATE tasks") and not failed:
+                failed.append(statement)
+                raise IntegrityError(statement, parameters, Exception("NOT NULL"))
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", fail_first_update)
+
+        async def scenario():
+            subscription = broker.subscribe(user_id, 10)
+            try:
+                response = await asyncio.to_thread(
+                    client.post,
+                    "/api/v1/batch",
+                    json={
+                        "operations": [
+                            {"op": "task.update", "task_id": task_ids[0], "data": {"title": "1"}},
+                            {
+                                "op": "task.update_status",
+                                "task_id": task_ids[1],
+                                "data": {"status": "DONE"},
+                            },
+                        ]
+                    },
+                )
+                assert [r["status"] for r in response.json()["results"]] == [409, 200]
+                published = await asyncio.wait_for(subscription.get(), 1)
+                assert published.data["id"] == task_ids[1]
+                assert subscription.queue.empty()
+            finally:
+                broker.unsubscribe(subscription)
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            event.remove(engine, "before_cursor_execute", fail_first_update)
@@ -0,0 +1,123 @@
+"""
+Tests for keeping worker caches coherent through the cache_invalidations log.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from app.core.cache import process_origin, task_cache, task_list_cache
+from app.core.cache_sync import CacheSync
+from app.core.config import Settings
+from app.core.events import CATCH_UP, broker
+from app.models import CacheInvalidation
+from app.tools import serve
+from app.tools.serve import available_cpus
+from tests.conftest import TestingSessionLocal
+
+
+def _log(db_session, *entries, origin="other-host:1"):
+    db_session.execute(
+        insert(CacheInvalidation),
+        [{"cache": cache, "key": key, "origin": origin} for cache, key in entries],
+    )
+    db_session.commit()
+
+
+class TestCacheSync:
+    """Test cases for logging and applying cache invalidations."""
+
+    def test_writes_are_logged(self, client, db_session, user_with_tasks):
+        user_id, [task_id] = user_with_tasks(["T"])
+        client.put(f"/api/v1/tasks/{task_id}", json={"title": "Renamed"})
+
+        logged = db_session.execute(
+            select(CacheInvalidation.cache, CacheInvalidation.key, CacheInvalidation.origin)
+            .order_by(CacheInvalidation.id.desc())
+            .limit(2)
+        ).all()
+        assert sorted(logged) == [
+            ("task", task_id, process_origin()),
+            ("task_list", user_id, process_origin()),
+        ]
+
+    def test_applies_invalidations_of_other_processes(self, db_session):
+        sync = CacheSync([TestingSessionLocal])
+        sync.skip_to_head()
+        task_cache.set_many({-1: "cached", -2: "own"}, task_cache.stamp())
+        generation = task_list_cache.generation(-1)
+
+        _log(db_session, ("task", -1), ("task_list", -1))
+        _log(db_session, ("task", -2), origin=process_origin())
+
+        assert sync.run_once() == 2
+        assert task_cache.get_many([-1, -2]) == {-2: "own"}
+        assert task_list_cache.generation(-1) != generation
+        assert sync.run_once() == 0
+
+    def test_clears_caches_after_missing_pruned_rows(self, db_session):
+        sync = CacheSync([TestingSessionLocal], retention_seconds=60)
+        sync.skip_to_head()
+        _log(db_session, ("task", -3), ("task", -4))
+        db_session.query(CacheInvalidation).update(
+            {"created_at": datetime.utcnow() - timedelta(minutes=5)}
+        )
+        db_session.commit()
+        task_cache.set_many({-5: "cached"}, task_cache.stamp())
+
+        # The newest row survives pruning
+        assert sync.prune() >= 1
+        sync.run_once()
+
+        assert task_cache.get_many([-5]) == {}
+
+    def test_tells_streams_to_catch_up(self, db_session):
+        sync = CacheSync([TestingSessionLocal])
+        sync.skip_to_head()
+
+        async def scenario():
+            changed, own = broker.subscribe(-6, 10), broker.subscribe(-7, 10)
+            try:
+                _log(db_session, ("task_list", -6), ("task", -7), ("task_list", -6))
+                _log(db_session, ("task_list", -7), origin=process_origin())
+                await asyncio.to_thread(sync.run_once)
+                await asyncio.to_thread(sync.run_once)
+                await asyncio.sleep(0)
+                # Notices coalesce until the stream takes one
+                assert changed.queue.qsize() == 1
+                assert await changed.get() is CATCH_UP
+                assert own.queue.empty()
+            finally:
+                broker.unsubscribe(changed)
+                broker.unsubscribe(own)
+
+        asyncio.run(scenario())
+
+
+class TestWorkers:
+    """Test cases for the worker count and the cache sync it implies."""
+
+    def test_single_worker_skips_the_log(self):
+        assert Settings(WORKERS=1).CACHE_SYNC_INTERVAL_SECONDS == 0
+        assert Settings(WORKERS=0).CACHE_SYNC_INTERVAL_SECONDS > 0
+        assert (
+            Settings(WORKERS=1, CACHE_SYNC_INTERVAL_SECONDS=0.5).CACHE_SYNC_INTERVAL_SECONDS == 0.5
+        )
+
+    def test_serve_resolves_the_worker_count(self, monkeypatch):
+        monkeypatch.setenv("WORKERS", "0")
+        runs = []
+        monkeypatch.setattr(serve.uvicorn, "run", lambda app, **kwargs: runs.append(kwargs))
+
+        monkeypatch.setattr(serve, "settings", Settings())
+        serve.main(["--workers", "3"])
+        assert os.environ["WORKERS"] == "3" and serve.settings.CACHE_SYNC_INTERVAL_SECONDS > 0
+        monkeypatch.setattr(serve, "settings", Settings())
+        serve.main(["--workers", "1"])
+        assert os.environ["WORKERS"] == "1" and serve.settings.CACHE_SYNC_INTERVAL_SECONDS == 0
+        assert [run["workers"] for run in runs] == [3, 1]
+
+
+def test_available_cpus():
+    assert available_cpus() >= 1
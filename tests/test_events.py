@@ -0,0 +1,149 @@
+"""
+Tests for live task event streams.
+"""
+import asyncio
+import json
+
+from fastapi import status
+
+from app.api.sse import task_event_stream
+from app.api.v1 import tasks as tasks_api
+from app.core.events import RESYNC, TASK_CREATED, TASK_DELETED, TASK_UPDATED, TaskEvent, broker
+from app.crud import get_task_crud
+from app.schemas.task import TaskCreate
+from tests.conftest import TestingSessionLocal
+
+
+def _event(user_id, seq):
+    return TaskEvent(user_id, TASK_UPDATED, seq, f"token-{seq}", {"id": seq})
+
+
+class TestTaskEventBroker:
+    """Test cases for the in-process task event broker."""
+
+    def test_publish_after_commit_only(self, client, db_session, sample_user_data):
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        task_crud = get_task_crud(db_session)
+
+        async def scenario():
+            subscription = broker.subscribe(user_id, 10)
+            try:
+                task = await asyncio.to_thread(task_crud.create, TaskCreate(title="Live"), user_id)
+                created = await asyncio.wait_for(subscription.get(), 1)
+                assert (created.type, created.data["title"]) == (TASK_CREATED, "Live")
+
+                def rolled_back():
+                    task_crud.set_status(task.id, "DONE")
+                    db_session.rollback()
+
+                await asyncio.to_thread(rolled_back)
+                await asyncio.to_thread(task_crud.delete, task.id)
+                deleted = await asyncio.wait_for(subscription.get(), 1)
+                assert (deleted.type, deleted.data["id"]) == (TASK_DELETED, task.id)
+                assert deleted.seq > created.seq
+            finally:
+                broker.unsubscribe(subscription)
+
+        asyncio.run(scenario())
+        assert not broker.has_subscribers(user_id)
+
+    def test_slow_subscriber_gets_resync(self):
+        async def scenario():
+            subscription = broker.subscribe(-1, 2)
+            try:
+                for seq in range(3):
+                    broker.publish(_event(-1, seq))
+                await asyncio.sleep(0)
+                assert await subscription.get() is RESYNC
+                assert subscription.queue.empty()
+            finally:
+                broker.unsubscribe(subscription)
+
+        asyncio.run(scenario())
+
+
+class TestTaskEventStream:
+    """Test cases for GET /users/{user_id}/tasks/events."""
+
+    def test_stream_frames(self):
+        async def scenario():
+            subscription = broker.subscribe(-2, 10)
+            replay = {"changed": [], "deleted": [], "next_token": "token-5", "has_more": False}
+            stream = task_event_stream(subscription, 0.01, replay, replayed_through=5)
+            frames = [await stream.__anext__(), await stream.__anext__()]
+            broker.publish(_event(-2, 5))  # already covered by the replay
+            broker.publish(_event(-2, 6))
+            frames += [await stream.__anext__(), await stream.__anext__()]
+            await stream.aclose()
+            return frames
+
+        connected, changes, live, heartbeat = asyncio.run(scenario())
+        assert connected.startswith(":")
+        assert changes.startswith("id: token-5\nevent: changes\n")
+        assert live == 'id: token-6\nevent: task.updated\ndata: {"id":6}\n\n'
+        assert heartbeat == ": heartbeat\n\n"
+        assert not broker.has_subscribers(-2)
+
+    def test_stream_catches_up_on_other_processes_changes(self):
+        positions = []
+
+        async def catch_up(token):
+            positions.append(token)
+            seq = 7 + len(positions)
+            changes = {"changed": [{"id": seq}], "deleted": [], "reset": False}
+            return {**changes, "next_token": f"token-{seq}", "has_more": seq < 9}, seq
+
+        async def scenario():
+            subscription = broker.subscribe(-3, 10)
+            stream = task_event_stream(subscription, 1, position="token-7", catch_up=catch_up)
+            frames = [await stream.__anext__()]
+            broker.notify([-3])
+            frames += [await stream.__anext__(), await stream.__anext__()]
+            broker.publish(_event(-3, 9))  # already sent by the catch-up
+            broker.publish(_event(-3, 10))
+            frames.append(await stream.__anext__())
+            await stream.aclose()
+            return frames
+
+        _, first, second, live = asyncio.run(scenario())
+        assert positions == ["token-7", "token-8"]
+        assert first.startswith("id: token-8\nevent: changes\n")
+        assert second.startswith("id: token-9\nevent: changes\n")
+        assert live.startswith("id: token-10\n")
+        assert not broker.has_subscribers(-3)
+
+    def test_invalid_last_event_id(self, client, sample_user_data):
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        response = client.get(
+            f"/api/v1/users/{user_id}/tasks/events", headers={"Last-Event-ID": "garbage"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not broker.has_subscribers(user_id)
+
+    def test_reconnect_replays_missed_changes(self, client, sample_user_data, monkeypatch):
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        token = client.get(f"/api/v1/users/{user_id}/tasks/sync").json()["next_token"]
+        tasks_url = f"/api/v1/users/{user_id}/tasks/"
+        task_id = client.post(tasks_url, json={"title": "Missed"}).json()["id"]
+        sessions = []
+
+        def replay_session():
+            sessions.append(TestingSessionLocal())
+            return sessions[-1]
+
+        monkeypatch.setattr(tasks_api, "SessionLocal", replay_session)
+
+        async def scenario():
+            response = await tasks_api.stream_user_task_events(user_id, last_event_id=token)
+            # The replay's session is closed before the first frame is sent
+            assert len(sessions) == 1 and not sessions[0].in_transaction()
+            stream = response.body_iterator
+            frames = [await stream.__anext__(), await stream.__anext__()]
+            await stream.aclose()
+            return frames
+
+        _, changes = asyncio.run(scenario())
+        assert changes.startswith("id: ")
+        payload = json.loads(changes.split("data: ", 1)[1])
+        assert [task["id"] for task in payload["changed"]] == [task_id]
+        assert not broker.has_subscribers(user_id)
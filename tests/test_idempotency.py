@@ -0,0 +1,142 @@
+"""
+Tests for Idempotency-Key handling on POST endpoints.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from app.api.idempotency import REPLAYED_HEADER, run_idempotent
+from app.crud.idempotency import IdempotencyCRUD
+from app.models.idempotency import IdempotencyKey
+from app.schemas import User
+from tests.conftest import TestingSessionLocal
+
+
+class TestIdempotency:
+    """Test cases for Idempotency-Key support."""
+
+    def test_task_creation_is_replayed(self, client, sample_user_data, sample_task_data):
+        """A retried task creation returns the original task instead of a duplicate."""
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+
+        first = client.post(
+            f"/api/v1/users/{user_id}/tasks/", json=sample_task_data, headers=headers
+        )
+        second = client.post(
+            f"/api/v1/users/{user_id}/tasks/", json=sample_task_data, headers=headers
+        )
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert second.status_code == status.HTTP_201_CREATED
+        assert second.headers[REPLAYED_HEADER] == "true"
+        assert second.json() == first.json()
+        assert len(client.get(f"/api/v1/users/{user_id}/tasks/").json()) == 1
+
+    def test_key_reused_with_different_payload(self, client, sample_user_data):
+        """Reusing a key for a different request is rejected."""
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+
+        client.post(f"/api/v1/users/{user_id}/tasks/", json={"title": "First"}, headers=headers)
+        response = client.post(
+            f"/api/v1/users/{user_id}/tasks/", json={"title": "Second"}, headers=headers
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_failed_request_is_not_stored(self, client, sample_task_data):
+        """Errors release the key so a corrected retry can succeed."""
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        response = client.post(
+            "/api/v1/users/999999/tasks/", json=sample_task_data, headers=headers
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        retry = client.post("/api/v1/users/999999/tasks/", json=sample_task_data, headers=headers)
+        assert retry.status_code == status.HTTP_404_NOT_FOUND
+        assert REPLAYED_HEADER not in retry.headers
+
+    def test_failure_after_the_write_keeps_nothing(self, client, sample_user_data, monkeypatch):
+        """A request dying after its CRUD call leaves neither the task nor the key behind."""
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        url = f"/api/v1/users/{user_id}/tasks/"
+
+        def fail(*args):
+            raise RuntimeError("crashed before storing the response")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(IdempotencyCRUD, "complete", fail)
+            with pytest.raises(RuntimeError):
+                client.post(url, json={"title": "Once"}, headers=headers)
+        assert client.get(url).json() == []
+
+        retry = client.post(url, json={"title": "Once"}, headers=headers)
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert REPLAYED_HEADER not in retry.headers
+        assert [task["title"] for task in client.get(url).json()] == ["Once"]
+
+    def test_abandoned_pending_key_is_taken_over(self, client, db_session, sample_user_data):
+        """A pending key committed by a request that never finished does not block retries."""
+        key = uuid.uuid4().hex
+        now = datetime.utcnow()
+        db_session.add(
+            IdempotencyKey(
+                key=key, fingerprint="stale", created_at=now, expires_at=now + timedelta(days=1)
+            )
+        )
+        db_session.commit()
+
+        response = client.post(
+            "/api/v1/users/", json=sample_user_data, headers={"Idempotency-Key": key}
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_user_creation_is_replayed(self, client, sample_user_data):
+        """A retried user creation does not fail with a duplicate email."""
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        first = client.post("/api/v1/users/", json=sample_user_data, headers=headers)
+        second = client.post("/api/v1/users/", json=sample_user_data, headers=headers)
+
+        assert second.status_code == status.HTTP_201_CREATED
+        assert second.json()["id"] == first.json()["id"]
+
+    def test_concurrent_duplicates_run_once(self):
+        """Concurrent requests with the same key execute the call only once."""
+        key = uuid.uuid4().hex
+        calls = []
+        results = []
+
+        def create():
+            calls.append(1)
+            time.sleep(0.05)
+            return {
+                "id": 1,
+                "name": "Jane",
+                "email": "jane@example.com",
+                "created_at": "2024-01-01T00:00:00",
+            }
+
+        def worker():
+            db = TestingSessionLocal()
+            try:
+                results.append(
+                    run_idempotent(db, key, "fp", create, response_model=User, status_code=201)
+                )
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert len(results) == 5
@@ -0,0 +1,144 @@
+"""
+Tests for multi-get endpoints, owner embedding and the read cache.
+"""
+import uuid
+
+from fastapi import status
+from sqlalchemy import event
+
+from app.api.loaders import DataLoader
+from app.api.multi_get import MISSING_IDS_HEADER
+from app.core.cache import ReadCache, user_cache
+from app.crud import get_task_crud
+
+
+class TestMultiGet:
+    """Test cases for GET /tasks/?ids= and GET /users/?ids=."""
+
+    def test_get_tasks_in_request_order(self, client, user_with_tasks):
+        _, ids = user_with_tasks(3)
+        missing = max(ids) + 1000
+
+        response = client.get(
+            "/api/v1/tasks/", params={"ids": f"{ids[2]},{missing},{ids[0]},{ids[2]}"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [task["id"] for task in response.json()] == [ids[2], ids[0]]
+        assert response.headers[MISSING_IDS_HEADER] == str(missing)
+
+    def test_cached_task_is_invalidated_by_update(self, client, user_with_tasks):
+        _, [task_id] = user_with_tasks(1)
+        client.get("/api/v1/tasks/", params={"ids": task_id})
+
+        client.put(f"/api/v1/tasks/{task_id}", json={"title": "Renamed"})
+        response = client.get("/api/v1/tasks/", params={"ids": task_id})
+        assert response.json()[0]["title"] == "Renamed"
+
+        client.delete(f"/api/v1/tasks/{task_id}")
+        response = client.get("/api/v1/tasks/", params={"ids": task_id})
+        assert response.json() == []
+        assert response.headers[MISSING_IDS_HEADER] == str(task_id)
+
+    def test_get_users_by_ids(self, client, sample_user_data):
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+
+        response = client.get("/api/v1/users/", params={"ids": f"{user_id}"})
+
+        assert [user["id"] for user in response.json()] == [user_id]
+        assert MISSING_IDS_HEADER not in response.headers
+
+    def test_invalid_ids(self, client):
+        assert client.get("/api/v1/tasks/", params={"ids": "1,x"}).status_code == 400
+        assert client.get("/api/v1/tasks/").status_code == 400
+
+    def test_get_many_is_chunked(self, client, db_session, user_with_tasks):
+        _, ids = user_with_tasks(2)
+        requested = list(range(max(ids) + 1, max(ids) + 1200)) + [ids[1], ids[0]]
+
+        tasks = get_task_crud(db_session).get_many(requested)
+
+        assert [task.id for task in tasks] == [ids[1], ids[0]]
+
+
+class TestOwnerEmbedding:
+    """Test cases for include=owner."""
+
+    def test_owners_are_loaded_in_one_query(self, client, db_session, sample_user_data):
+        owners, ids = [], []
+        for _ in range(3):
+            user = client.post(
+                "/api/v1/users/",
+                json={**sample_user_data, "email": f"{uuid.uuid4().hex[:8]}@example.com"},
+            ).json()
+            owners.append(user)
+            for i in range(2):
+                url = f"/api/v1/users/{user['id']}/tasks/"
+                ids.append(client.post(url, json={"title": f"Task {i}"}).json()["id"])
+        user_cache.clear()
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if "FROM users" in statement:
+                statements.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            response = client.get(
+                "/api/v1/tasks/", params={"ids": ",".join(map(str, ids)), "include": "owner"}
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [task["owner"] for task in response.json()] == [
+            owner for owner in owners for _ in range(2)
+        ]
+        assert len(statements) == 1
+
+    def test_single_task_with_owner(self, client, sample_user_data):
+        user = client.post("/api/v1/users/", json=sample_user_data).json()
+        task_id = client.post(f"/api/v1/users/{user['id']}/tasks/", json={"title": "Task"}).json()[
+            "id"
+        ]
+
+        response = client.get(f"/api/v1/tasks/{task_id}", params={"include": "owner"})
+
+        assert response.json()["owner"] == user
+        assert "owner" not in client.get(f"/api/v1/tasks/{task_id}").json()
+        assert client.get(f"/api/v1/tasks/{task_id}", params={"include": "x"}).status_code == 400
+
+    def test_loader_remembers_results(self):
+        calls = []
+
+        def load(ids):
+            calls.append(ids)
+            return {id: f"user {id}" for id in ids if id != 3}
+
+        loader = DataLoader(load)
+
+        assert loader.load_many([1, 2, 1, 3]) == {1: "user 1", 2: "user 2"}
+        assert loader.load_many([2, 3, 4]) == {2: "user 2", 4: "user 4"}
+        assert loader.load(3) is None
+        assert calls == [[1, 2, 3], [4]]
+
+
+class TestReadCache:
+    """Test cases for the read cache."""
+
+    def test_lru_eviction(self):
+        cache = ReadCache("test", max_entries=2, ttl_seconds=60)
+        cache.set_many({1: "a", 2: "b"}, cache.stamp())
+        cache.get_many([1])
+        cache.set_many({3: "c"}, cache.stamp())
+
+        assert cache.get_many([1, 2, 3]) == {1: "a", 3: "c"}
+
+    def test_stale_load_is_not_stored(self):
+        cache = ReadCache("test", max_entries=10, ttl_seconds=60)
+        stamp = cache.stamp()
+        cache.invalidate([1])
+        cache.set_many({1: "stale", 2: "fresh"}, stamp)
+
+        assert cache.get_many([1, 2]) == {2: "fresh"}
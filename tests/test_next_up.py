@@ -0,0 +1,106 @@
+"""
+Tests for task due dates, priorities and the next-up queue.
+"""
+from datetime import datetime
+
+from fastapi import status
+from sqlalchemy import event
+
+from app.crud import get_task_crud
+
+QUEUE = [
+    {"title": "someday", "priority": 3, "due_at": None},
+    {"title": "later", "priority": 3, "due_at": "2026-03-01T00:00:00"},
+    {"title": "urgent", "priority": 1, "due_at": None},
+    {"title": "sooner", "priority": 3, "due_at": "2026-02-01T12:00:00+02:00"},
+    {"title": "low", "priority": 5, "due_at": "2026-01-01T00:00:00"},
+    {"title": "finished", "priority": 1, "due_at": "2026-01-01T00:00:00", "status": "DONE"},
+]
+
+
+class TestNextUp:
+    """Test cases for GET /users/{user_id}/tasks/next and /overdue."""
+
+    def test_open_tasks_by_priority_then_due_date(self, user_with_tasks, task_titles):
+        user_id, _ = user_with_tasks(QUEUE)
+
+        assert task_titles(user_id, "next") == ["urgent", "sooner", "later", "someday", "low"]
+        assert task_titles(user_id, "next", n=2) == ["urgent", "sooner"]
+
+    def test_queue_follows_updates(self, client, user_with_tasks, task_titles):
+        user_id, task_ids = user_with_tasks(QUEUE)
+        assert task_titles(user_id, "next", n=1) == ["urgent"]
+
+        response = client.put(f"/api/v1/tasks/{task_ids[4]}", json={"priority": 1})
+
+        assert response.json()["priority"] == 1
+        assert task_titles(user_id, "next", n=2) == ["low", "urgent"]
+
+    def test_due_dates_are_stored_in_utc(self, client, user_with_tasks):
+        user_id, _ = user_with_tasks(QUEUE)
+
+        sooner = client.get(f"/api/v1/users/{user_id}/tasks/next", params={"n": 2}).json()[1]
+
+        assert sooner["due_at"] == "2026-02-01T10:00:00"
+        assert sooner["priority"] == 3
+
+    def test_priority_is_validated(self, client, sample_user_data):
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+
+        for priority in (0, 6):
+            response = client.post(
+                f"/api/v1/users/{user_id}/tasks/", json={"title": "T", "priority": priority}
+            )
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert client.get(f"/api/v1/users/{user_id}/tasks/next", params={"n": 0}).status_code == 422
+
+    def test_priority_cannot_be_cleared(self, client, user_with_tasks):
+        _, [task_id] = user_with_tasks(["T"])
+
+        for field in ("priority", "title", "status"):
+            response = client.put(f"/api/v1/tasks/{task_id}", json={field: None})
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY, field
+        response = client.put(f"/api/v1/tasks/{task_id}", json={"due_at": None, "priority": 2})
+        assert (response.json()["due_at"], response.json()["priority"]) == (None, 2)
+
+    def test_overdue_count(self, client, user_with_tasks):
+        user_id, _ = user_with_tasks(QUEUE)
+
+        def overdue(as_of):
+            response = client.get(f"/api/v1/users/{user_id}/tasks/overdue", params={"as_of": as_of})
+            assert response.status_code == status.HTTP_200_OK, response.text
+            return response.json()["overdue_tasks"]
+
+        # The DONE task is not overdue, nor are undated ones
+        assert overdue("2026-01-15T00:00:00") == 1
+        assert overdue("2026-02-01T10:00:00") == 1
+        assert overdue("2026-02-01T12:00:00+01:00") == 2
+        assert overdue("2027-01-01T00:00:00") == 3
+
+
+def test_next_up_queries_read_the_index_in_order(db_session):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM tasks" in statement:
+            statements.append((statement, parameters))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        task_crud = get_task_crud(db_session)
+        task_crud.next_up(1, 10)
+        task_crud.count_overdue(1, datetime(2026, 1, 1))
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert len(statements) == 2
+    for statement, parameters in statements:
+        details = [
+            row[-1]
+            for row in db_session.connection().exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+        ]
+        assert details == [details[0]]
+        assert "USING INDEX ix_tasks_next_up " in details[0]
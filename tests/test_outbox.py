@@ -0,0 +1,136 @@
+"""
+Tests for the transactional outbox.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.core.outbox import MemorySink, OutboxDispatcher, OutboxSink, delivered_total
+from app.crud import get_outbox_crud, get_user_crud
+from app.models.outbox import OutboxMessage
+from app.schemas.user import UserCreate
+from app.utils.exceptions import DuplicateError
+from tests.conftest import TestingSessionLocal
+
+
+class FailingSink(OutboxSink):
+    def deliver(self, messages):
+        raise ConnectionError("downstream unavailable")
+
+
+@pytest.fixture()
+def outbox(monkeypatch, db_session):
+    monkeypatch.setattr(settings, "OUTBOX_SINK", "memory")
+    db_session.query(OutboxMessage).delete()
+    db_session.commit()
+    yield
+    db_session.query(OutboxMessage).delete()
+    db_session.commit()
+
+
+class TestOutbox:
+    """Test cases for writing and dispatching outbox messages."""
+
+    def test_mutations_are_delivered_in_order(self, client, db_session, outbox, user_with_tasks):
+        user_id, [task_id] = user_with_tasks(["Ship"])
+        client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": "DONE"})
+        client.delete(f"/api/v1/tasks/{task_id}")
+
+        sink = MemorySink()
+        dispatcher = OutboxDispatcher([TestingSessionLocal], sink, concurrency=2)
+        before = delivered_total.value()
+        try:
+            assert dispatcher.run_once() == 4
+        finally:
+            dispatcher.stop()
+
+        assert [message["type"] for message in sink.messages] == [
+            "user.created",
+            "task.created",
+            "task.updated",
+            "task.deleted",
+        ]
+        assert sink.messages[1]["payload"]["title"] == "Ship"
+        assert sink.messages[2]["payload"]["status"] == "DONE"
+        assert db_session.query(OutboxMessage).count() == 0
+        assert delivered_total.value() == before + 4
+
+    def test_rolled_back_change_writes_no_message(self, db_session, outbox, sample_user_data):
+        user_crud = get_user_crud(db_session)
+        user_crud.create(UserCreate(**sample_user_data))
+        with pytest.raises(DuplicateError):
+            user_crud.create(UserCreate(**sample_user_data))
+
+        assert db_session.query(OutboxMessage).count() == 1
+
+    def test_failed_delivery_backs_off_then_gives_up(
+        self, client, db_session, outbox, sample_user_data
+    ):
+        client.post("/api/v1/users/", json=sample_user_data)
+        dispatcher = OutboxDispatcher(
+            [TestingSessionLocal], FailingSink(), max_attempts=2, retry_base_seconds=60
+        )
+        try:
+            assert dispatcher.run_once() == 0
+            message = db_session.query(OutboxMessage).one()
+            assert (message.attempts, message.dead_at) == (1, None)
+            assert "downstream unavailable" in message.last_error
+
+            # Not due again until the backoff has passed
+            assert dispatcher.run_once() == 0
+            db_session.refresh(message)
+            assert message.attempts == 1
+
+            message.available_at = message.created_at
+            db_session.commit()
+            dispatcher.run_once()
+            db_session.refresh(message)
+            assert message.attempts == 2 and message.dead_at is not None
+        finally:
+            dispatcher.stop()
+
+    def test_aggregate_messages_are_claimed_in_order(
+        self, client, db_session, outbox, sample_user_data, user_with_tasks
+    ):
+        user_id, [task_id] = user_with_tasks(["T"])
+        client.put(f"/api/v1/tasks/{task_id}", json={"title": "U"})
+        other = {**sample_user_data, "email": "other." + sample_user_data["email"]}
+        client.post("/api/v1/users/", json=other)
+        outbox_crud = get_outbox_crud(db_session)
+
+        def claim(limit):
+            return [message.event_type for message in outbox_crud.claim(limit, 60)]
+
+        # A second dispatcher skips task.updated while task.created is in flight
+        assert claim(2) == ["user.created", "task.created"]
+        assert claim(10) == ["user.created"]
+        # ... and while task.created is backing off after a failed delivery
+        created = db_session.query(OutboxMessage).filter_by(event_type="task.created").one()
+        outbox_crud.fail([(created.id, "error", datetime.utcnow() + timedelta(minutes=1))])
+        assert claim(10) == []
+        # Giving up on it lets the later message through
+        outbox_crud.fail([(created.id, "error", None)])
+        assert claim(10) == ["task.updated"]
+
+    def test_dead_messages_are_pruned(self, client, db_session, outbox, sample_user_data):
+        client.post("/api/v1/users/", json=sample_user_data)
+        message = db_session.query(OutboxMessage).one()
+        message.dead_at = datetime.utcnow() - timedelta(days=8)
+        db_session.commit()
+        dispatcher = OutboxDispatcher(
+            [TestingSessionLocal], MemorySink(), dead_retention_seconds=7 * 24 * 60 * 60
+        )
+        try:
+            dispatcher.run_once()
+        finally:
+            dispatcher.stop()
+
+        assert db_session.query(OutboxMessage).count() == 0
+
+    def test_metrics_endpoint(self, client):
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert "# TYPE outbox_lag_seconds gauge" in response.text
+        assert "# TYPE outbox_delivered_total counter" in response.text
@@ -0,0 +1,122 @@
+"""
+Tests for on-demand request profiling.
+"""
+import pstats
+import threading
+import time
+
+import anyio
+import pytest
+from fastapi import status
+
+from app.core.profiling import (
+    PROFILE_ID_HEADER,
+    PROFILE_TOKEN_HEADER,
+    PROFILE_TOKEN_PARAM,
+    ProfileStore,
+    StackSampler,
+    request_profiler,
+    sign_token,
+    verify_token,
+)
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def profiler(monkeypatch, tmp_path):
+    monkeypatch.setattr(request_profiler, "secret", SECRET)
+    monkeypatch.setattr(request_profiler, "store", ProfileStore(str(tmp_path), max_profiles=2))
+    return request_profiler
+
+
+def _token(ttl_seconds=60):
+    return sign_token(SECRET, int(time.time()) + ttl_seconds)
+
+
+class TestRequestProfiling:
+    """Test cases for profiling requests and serving the profiles."""
+
+    def test_tokens(self):
+        token = _token()
+        assert verify_token(SECRET, token)
+        assert not verify_token("other-secret", token)
+        assert not verify_token(SECRET, _token(-1))
+        assert not verify_token(SECRET, token[:-1] + ("1" if token.endswith("0") else "0"))
+        assert not verify_token(SECRET, "garbage")
+        assert not verify_token(None, token)
+
+    def test_profiles_requests_with_a_token(self, client, profiler):
+        plain = client.get("/api/v1/users/")
+        bad = client.get("/api/v1/users/", headers={PROFILE_TOKEN_HEADER: _token(-1)})
+        by_header = client.get("/api/v1/users/", headers={PROFILE_TOKEN_HEADER: _token()})
+        by_param = client.get("/api/v1/users/", params={PROFILE_TOKEN_PARAM: _token()})
+
+        assert PROFILE_ID_HEADER not in plain.headers
+        assert PROFILE_ID_HEADER not in bad.headers
+        assert by_header.status_code == status.HTTP_200_OK
+        profile_ids = [by_param.headers[PROFILE_ID_HEADER], by_header.headers[PROFILE_ID_HEADER]]
+
+        headers = {PROFILE_TOKEN_HEADER: _token()}
+        listed = client.get("/api/v1/admin/profiles", headers=headers).json()
+        assert [profile["id"] for profile in listed] == profile_ids
+        assert listed[0]["path"] == "/api/v1/users/"
+        assert listed[0]["status_code"] == 200
+
+        collapsed = client.get(
+            f"/api/v1/admin/profiles/{profile_ids[0]}/collapsed", headers=headers
+        )
+        assert collapsed.status_code == status.HTTP_200_OK
+        assert collapsed.headers["content-type"].startswith("text/plain")
+
+    def test_admin_endpoints_require_a_token(self, client, profiler):
+        assert client.get("/api/v1/admin/profiles").status_code == status.HTTP_403_FORBIDDEN
+        missing = client.get(
+            "/api/v1/admin/profiles/20260101T000000000000-1-abcdef/pstats",
+            headers={PROFILE_TOKEN_HEADER: _token()},
+        )
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_admin_endpoints_are_closed_without_a_secret(self, client, monkeypatch):
+        monkeypatch.setattr(request_profiler, "secret", None)
+
+        response = client.get("/api/v1/admin/profiles")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_store_keeps_newest_profiles(self, client, profiler):
+        headers = {PROFILE_TOKEN_HEADER: _token()}
+        profile_ids = [
+            client.get("/health", headers=headers).headers[PROFILE_ID_HEADER] for _ in range(3)
+        ]
+        stored = [profile["id"] for profile in profiler.store.list()]
+        assert stored == [profile_ids[2], profile_ids[1]]
+
+
+def test_sampler_records_only_its_own_work(tmp_path):
+    def spin(work):
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            work()
+
+    async def concurrent_requests():
+        sampler = StackSampler(threading.get_ident(), interval_seconds=0.001)
+        async with anyio.create_task_group() as tasks:
+            # Another request's job, started before the sampler
+            tasks.start_soon(anyio.to_thread.run_sync, spin, ProfileStore(str(tmp_path)).prune)
+            sampler.start()
+            try:
+                await anyio.to_thread.run_sync(spin, lambda: verify_token(SECRET, _token()))
+            finally:
+                sampler.stop()
+        return sampler
+
+    sampler = anyio.run(concurrent_requests)
+
+    assert sampler.samples > 0
+    assert "verify_token (app/core/profiling.py:" in sampler.collapsed()
+    assert "prune" not in sampler.collapsed()
+
+    store = ProfileStore(str(tmp_path))
+    profile_id = store.save(sampler, {"method": "GET", "path": "/", "status_code": 200})
+    stats = pstats.Stats(store.path(profile_id, "pstats"))
+    assert any(name == "verify_token" for _, _, name in stats.stats)
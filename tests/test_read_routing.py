@@ -0,0 +1,93 @@
+"""
+Tests for read replica routing and read-your-writes pinning.
+"""
+import shutil
+
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.database import (
+    LAST_WRITE_COOKIE,
+    LAST_WRITE_HEADER,
+    Base,
+    RoutingSession,
+    create_database_engine,
+    pin_primary,
+    primary_pinned,
+)
+from app.crud import get_user_crud
+from app.schemas import UserCreate
+
+
+@pytest.fixture()
+def stale_replica(tmp_path):
+    """A primary with two users and a file-copy replica that only has the first."""
+    primary_path = tmp_path / "primary.sqlite"
+    replica_path = tmp_path / "replica.sqlite"
+    primary = create_engine(f"sqlite:///{primary_path}")
+    Base.metadata.create_all(bind=primary)
+
+    with RoutingSession(bind=primary) as db:
+        get_user_crud(db).create(UserCreate(name="Before", email="before@example.com"))
+    shutil.copy(primary_path, replica_path)
+    with RoutingSession(bind=primary) as db:
+        get_user_crud(db).create(UserCreate(name="After", email="after@example.com"))
+
+    replica = create_engine(f"sqlite:///{replica_path}")
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+class TestReadRouting:
+    """Test cases for RoutingSession."""
+
+    def test_reads_go_to_replica(self, stale_replica):
+        primary, replica = stale_replica
+        with RoutingSession(bind=primary, read_binds=[replica]) as db:
+            assert get_user_crud(db).count() == 1
+
+    def test_pinned_session_reads_primary(self, stale_replica):
+        primary, replica = stale_replica
+        with RoutingSession(bind=primary, read_binds=[replica]) as db:
+            pin_primary(db)
+            assert get_user_crud(db).count() == 2
+
+    def test_reads_after_write_use_primary(self, stale_replica):
+        primary, replica = stale_replica
+        with RoutingSession(bind=primary, read_binds=[replica]) as db:
+            user_crud = get_user_crud(db)
+            user_crud.create(UserCreate(name="New", email="new@example.com"))
+            assert user_crud.count() == 3
+
+    def test_read_your_writes_window(self, stale_replica):
+        primary, replica = stale_replica
+        token = primary_pinned.set(True)
+        try:
+            with RoutingSession(bind=primary, read_binds=[replica]) as db:
+                assert get_user_crud(db).count() == 2
+        finally:
+            primary_pinned.reset(token)
+
+    def test_writes_set_last_write_marker(self, client, monkeypatch, sample_user_data):
+        monkeypatch.setattr(settings, "DATABASE_READ_URLS", ["sqlite://"])
+
+        response = client.post("/api/v1/users/", json=sample_user_data)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert LAST_WRITE_HEADER in response.headers
+        assert LAST_WRITE_COOKIE in response.cookies
+
+        read = client.get(f"/api/v1/users/{response.json()['id']}")
+        assert LAST_WRITE_HEADER not in read.headers
+
+
+def test_replica_engines_use_journal_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SQLITE_JOURNAL_MODE", "WAL")
+    replica = create_database_engine(f"sqlite:///{tmp_path / 'replica.sqlite'}")
+    try:
+        with replica.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    finally:
+        replica.dispose()
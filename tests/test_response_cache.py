@@ -0,0 +1,101 @@
+"""
+Tests for the per-user response cache of task listings and stats.
+"""
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from app.api.response_cache import CACHE_HEADER
+from app.core.cache import ResponseCache
+from app.crud import get_task_crud
+
+
+class TestCachedListings:
+    """Test cases for serving GET /users/{id}/tasks/ and /stats from the cache."""
+
+    def test_repeated_reads_hit(self, client, user_with_tasks):
+        user_id, _ = user_with_tasks(["Task"])
+        url = f"/api/v1/users/{user_id}/tasks/"
+
+        first = client.get(url, params={"limit": 10, "skip": 0})
+        # Same parameters in another order
+        second = client.get(f"{url}?skip=0&limit=10")
+        other = client.get(url, params={"limit": 5})
+
+        assert first.status_code == status.HTTP_200_OK
+        assert first.headers[CACHE_HEADER] == "miss"
+        assert second.headers[CACHE_HEADER] == "hit"
+        assert second.json() == first.json()
+        assert other.headers[CACHE_HEADER] == "miss"
+
+    def test_task_writes_invalidate(self, client, user_with_tasks):
+        user_id, _ = user_with_tasks()
+        url = f"/api/v1/users/{user_id}/tasks/"
+        stats_url = f"{url}stats"
+        assert client.get(url).json() == []
+        assert client.get(stats_url).json()["total_tasks"] == 0
+
+        task_id = client.post(url, json={"title": "Task"}).json()["id"]
+        assert [task["title"] for task in client.get(url).json()] == ["Task"]
+        assert client.get(stats_url).json()["total_tasks"] == 1
+
+        client.put(f"/api/v1/tasks/{task_id}", json={"title": "Renamed"})
+        assert client.get(url).json()[0]["title"] == "Renamed"
+
+        client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": "DONE"})
+        assert client.get(stats_url).json()["done_tasks"] == 1
+
+        client.delete(f"/api/v1/tasks/{task_id}")
+        assert client.get(url).json() == []
+        assert client.get(stats_url).json()["total_tasks"] == 0
+
+    def test_archival_invalidates(self, client, db_session, user_with_tasks):
+        user_id, _ = user_with_tasks([{"title": "Old", "status": "DONE"}])
+        url = f"/api/v1/users/{user_id}/tasks/"
+        assert len(client.get(url).json()) == 1
+
+        get_task_crud(db_session).archive_done(datetime.utcnow() + timedelta(days=1))
+
+        assert client.get(url).json() == []
+        assert len(client.get(url, params={"include_archived": True}).json()) == 1
+
+    def test_errors_are_not_cached(self, client):
+        response = client.get("/api/v1/users/1/tasks/", params={"sort": "nope"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert CACHE_HEADER not in response.headers
+
+
+class TestResponseCache:
+    """Test cases for the response cache itself."""
+
+    def test_bounded_by_bytes(self):
+        cache = ResponseCache("test", max_bytes=3 * (100 + ResponseCache.ENTRY_OVERHEAD))
+        for key in range(4):
+            cache.set(1, cache.generation(1), key, b"x" * 100)
+
+        assert cache.get(1, cache.generation(1), 0) is None
+        assert cache.get(1, cache.generation(1), 3) == b"x" * 100
+        assert cache.size <= cache.max_bytes
+        assert cache.hit_ratio() == 0.5
+
+    def test_body_rendered_before_a_write_is_not_served(self):
+        cache = ResponseCache("test", max_bytes=1 << 20)
+        generation = cache.generation(1)
+        cache.invalidate([1])
+        cache.set(1, generation, "page", b"stale")
+
+        assert cache.get(1, cache.generation(1), "page") is None
+        assert cache.get(1, generation, "page") is None
+
+    def test_forgotten_owners_move_to_a_new_generation(self):
+        cache = ResponseCache("test", max_bytes=1 << 20)
+        cache.MAX_OWNERS = 1
+        before = cache.generation(1)
+        cache.set(1, before, "page", b"body")
+
+        cache.invalidate([2])
+        cache.invalidate([3])
+
+        assert cache.generation(1) != before
+        assert cache.get(1, cache.generation(1), "page") is None
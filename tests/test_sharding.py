@@ -0,0 +1,243 @@
+"""
+Tests for sharding tasks by user_id.
+"""
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from app.core.database import Base, attached_sessions
+from app.core.sharding import MIGRATIONS_DIR, HashRing, ShardRouter
+from app.crud import get_user_crud
+from app.crud.analytics import TaskAnalyticsCRUD
+from app.crud.task import TaskCRUD
+from app.crud.task_filter import TaskFilter
+from app.models.analytics import TaskDailyStats
+from app.models.shard import TaskLocation
+from app.models.tag import Tag, TaskTag
+from app.models.task import Task, TaskStatus
+from app.schemas import TaskCreate, TaskStatusUpdate, UserCreate
+from app.tools.rebalance_shards import move_user, plan_rebalance
+
+
+@pytest.fixture()
+def sharded(tmp_path):
+    """A primary database plus two task shards, all SQLite files."""
+    engines = {
+        name: create_engine(f"sqlite:///{tmp_path / name}.sqlite")
+        for name in ("primary", "shard-a", "shard-b")
+    }
+    for engine in engines.values():
+        Base.metadata.create_all(bind=engine)
+    router = ShardRouter({name: engines[name] for name in ("shard-a", "shard-b")})
+    db = sessionmaker(bind=engines["primary"])()
+    yield db, router
+    for attached in attached_sessions(db).values():
+        attached.close()
+    db.close()
+    for engine in engines.values():
+        engine.dispose()
+
+
+def _users(db, count):
+    user_crud = get_user_crud(db)
+    return [
+        user_crud.create(UserCreate(name=f"U{i}", email=f"u{i}@example.com")).id
+        for i in range(count)
+    ]
+
+
+class TestHashRing:
+    """Test cases for the consistent hash ring."""
+
+    def test_adding_node_moves_few_keys(self):
+        ring = HashRing(["a", "b", "c"])
+        before = {key: ring.get(str(key)) for key in range(2000)}
+        ring.add("d")
+        moved = [key for key in before if ring.get(str(key)) != before[key]]
+
+        assert all(ring.get(str(key)) == "d" for key in moved)
+        assert len(moved) < 2000 * 0.4
+
+
+class TestShardedTaskCRUD:
+    """Test cases for TaskCRUD routed across shards."""
+
+    def test_tasks_are_routed_by_user(self, sharded):
+        db, router = sharded
+        task_crud = TaskCRUD(db, shards=router)
+        ids = {}
+        for user_id in _users(db, 6):
+            ids[user_id] = task_crud.create(TaskCreate(title="T"), user_id).id
+
+        assert len(set(ids.values())) == len(ids)
+        for user_id, task_id in ids.items():
+            shard = router.ring_shard(user_id)
+            assert router.session(db, shard).get(Task, task_id) is not None
+            assert task_crud.get_by_id(task_id).user_id == user_id
+            assert task_crud.count_by_user(user_id) == 1
+
+    def test_failed_shard_insert_frees_the_task_id(self, sharded):
+        db, router = sharded
+        task_crud = TaskCRUD(db, shards=router)
+        user_id = _users(db, 1)[0]
+        engine = router.engines[router.ring_shard(user_id)]
+
+        def fail_task_insert(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO tasks "):
+                raise RuntimeError("shard unavailable")
+
+        event.listen(engine, "before_cursor_execute", fail_task_insert)
+        try:
+            with pytest.raises(RuntimeError):
+                task_crud.create(TaskCreate(title="T"), user_id)
+        finally:
+            event.remove(engine, "before_cursor_execute", fail_task_insert)
+        router.session(db, router.ring_shard(user_id)).rollback()
+
+        assert db.query(TaskLocation).count() == 0
+        task = task_crud.create(TaskCreate(title="T"), user_id)
+        db.rollback()
+        assert db.get(TaskLocation, task.id).user_id == user_id
+
+    def test_get_all_merges_shards(self, sharded):
+        db, router = sharded
+        task_crud = TaskCRUD(db, shards=router)
+        for user_id in _users(db, 4):
+            for i in range(3):
+                task_crud.create(TaskCreate(title=f"T{i}"), user_id)
+
+        all_ids = [task.id for task in task_crud.get_all(limit=100)]
+        assert all_ids == sorted(all_ids) and len(all_ids) == 12
+        assert [task.id for task in task_crud.get_all(skip=5, limit=4)] == all_ids[5:9]
+
+    def test_get_many_across_shards(self, sharded):
+        db, router = sharded
+        task_crud = TaskCRUD(db, shards=router)
+        ids = [task_crud.create(TaskCreate(title="T"), user_id).id for user_id in _users(db, 6)]
+
+        requested = [ids[5], ids[0], max(ids) + 1, ids[3]]
+        assert [task.id for task in task_crud.get_many(requested)] == [ids[5], ids[0], ids[3]]
+
+    def test_updates_and_deletes_reach_the_right_shard(self, sharded):
+        db, router = sharded
+        task_crud = TaskCRUD(db, shards=router)
+        user_id = _users(db, 1)[0]
+        task = task_crud.create(TaskCreate(title="T"), user_id)
+
+        task_crud.update_status(task.id, TaskStatusUpdate(status=TaskStatus.DONE))
+        assert task_crud.count_by_status(user_id, TaskStatus.DONE) == 1
+
+        task_crud.delete(task.id)
+        assert task_crud.get_by_id(task.id) is None
+
+    def test_move_user_between_shards(self, sharded):
+        db, router = sharded
+        task_crud = TaskCRUD(db, shards=router)
+        user_id = _users(db, 1)[0]
+        task_ids = [task_crud.create(TaskCreate(title=f"T{i}"), user_id).id for i in range(3)]
+        source = router.ring_shard(user_id)
+        target = next(name for name in router.engines if name != source)
+
+        assert move_user(db, router, user_id, target) == 3
+        assert plan_rebalance(db, router) == [(user_id, target, source)]
+        assert router.session(db, source).query(Task).count() == 0
+        assert [task_crud.get_by_id(task_id).id for task_id in task_ids] == task_ids
+        assert task_crud.count_by_user(user_id) == 3
+
+    def test_move_user_keeps_tags(self, sharded):
+        db, router = sharded
+        task_crud = TaskCRUD(db, shards=router)
+        user_id = _users(db, 1)[0]
+        task_ids = [task_crud.create(TaskCreate(title=f"T{i}"), user_id).id for i in range(3)]
+        task_crud.tag_tasks(user_id, task_ids[:2], ["urgent"])
+        task_crud.tag_tasks(user_id, task_ids[1:], ["client"])
+        source = router.ring_shard(user_id)
+        target = next(name for name in router.engines if name != source)
+        # A tag of the target's own, so the moved tags cannot keep their ids
+        router.session(db, target).add(Tag(user_id=user_id + 1, name="other", task_count=0))
+        router.session(db, target).commit()
+
+        move_user(db, router, user_id, target)
+
+        urgent = task_crud.list_by_user(user_id, TaskFilter(tags=("urgent",)))
+        assert [task.id for task in urgent] == task_ids[:2]
+        both = task_crud.list_by_user(user_id, TaskFilter(tags=("urgent", "client")))
+        assert [task.id for task in both] == task_ids[1:2]
+        assert [(tag.name, tag.task_count) for tag in task_crud.get_tags(user_id)] == [
+            ("client", 2),
+            ("urgent", 2),
+        ]
+        src = router.session(db, source)
+        assert src.query(Tag).count() == 0
+        assert src.query(TaskTag).count() == 0
+
+    def test_move_user_rebuilds_rollups(self, sharded):
+        db, router = sharded
+        analytics = TaskAnalyticsCRUD(db, shards=router)
+        user_id = _users(db, 1)[0]
+        for i in range(2):
+            task = analytics.create(TaskCreate(title=f"T{i}"), user_id)
+            analytics.update_status(task.id, TaskStatusUpdate(status=TaskStatus.DONE))
+        analytics.roll_up()
+        today = datetime.utcnow().date()
+        before = analytics.get_daily_stats(user_id, today, today)
+        source = router.ring_shard(user_id)
+        target = next(name for name in router.engines if name != source)
+
+        move_user(db, router, user_id, target)
+        assert router.session(db, source).query(TaskDailyStats).count() == 0
+        assert analytics.roll_up() == 4
+        assert analytics.get_daily_stats(user_id, today, today) == before
+        assert before[0].completed == 2
+
+
+def _revision(engine):
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+class TestShardMigrations:
+    """Test cases for creating and migrating shard schemas."""
+
+    def test_new_shards_are_created_at_head(self, tmp_path):
+        script = ScriptDirectory(MIGRATIONS_DIR)
+        engines = {name: create_engine(f"sqlite:///{tmp_path / name}.sqlite") for name in "ab"}
+        # Already under migration, so left to alembic upgrade
+        with engines["b"].begin() as connection:
+            MigrationContext.configure(connection).stamp(script, script.get_base())
+
+        ShardRouter(engines).create_databases()
+
+        assert _revision(engines["a"]) == script.get_current_head()
+        assert inspect(engines["a"]).has_table("tasks")
+        assert not inspect(engines["b"]).has_table("tasks")
+        for engine in engines.values():
+            engine.dispose()
+
+    def test_alembic_migrates_every_shard(self, tmp_path):
+        urls = {name: f"sqlite:///{tmp_path / name}.sqlite" for name in ("primary", "a", "b")}
+        primary = urls.pop("primary")
+        env = {**os.environ, "DATABASE_URL": primary, "TASK_SHARDS": json.dumps(urls)}
+        root = os.path.dirname(MIGRATIONS_DIR)
+
+        subprocess.run(
+            [sys.executable, "-m", "alembic", "upgrade", "head"],
+            cwd=root,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+
+        head = ScriptDirectory(MIGRATIONS_DIR).get_current_head()
+        for url in (primary, *urls.values()):
+            engine = create_engine(url)
+            assert _revision(engine) == head
+            engine.dispose()
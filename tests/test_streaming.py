@@ -0,0 +1,73 @@
+"""
+Tests for page size limits and streamed large pages.
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import status
+
+from app.api.response_cache import CACHE_HEADER
+from app.api.streaming import json_array_chunks
+from app.core.config import settings
+from app.schemas.task import task_serializer
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_PAGE_SIZE", 50)
+    monkeypatch.setattr(settings, "STREAM_PAGE_SIZE", 2)
+
+
+class TestLargePages:
+    """Test cases for MAX_PAGE_SIZE and streaming pages above STREAM_PAGE_SIZE."""
+
+    def test_limit_above_max_is_rejected(self, client, small_pages):
+        assert client.get("/api/v1/users/", params={"limit": 51}).status_code == 400
+        response = client.get("/api/v1/users/1/tasks/", params={"limit": 51})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "at most 50" in response.json()["detail"]
+        assert client.get("/api/v1/users/", params={"limit": -1}).status_code == 422
+
+    def test_streamed_tasks_match_buffered(self, client, monkeypatch, user_with_tasks):
+        user_id, _ = user_with_tasks(5)
+        url = f"/api/v1/users/{user_id}/tasks/"
+        params = {"limit": 4, "skip": 1, "sort": "-id", "fields": "id,title"}
+        buffered = client.get(url, params=params)
+
+        monkeypatch.setattr(settings, "STREAM_PAGE_SIZE", 3)
+        streamed = client.get(url, params=params)
+
+        assert streamed.status_code == status.HTTP_200_OK
+        assert CACHE_HEADER not in streamed.headers
+        assert streamed.content == buffered.content
+        assert [task["title"] for task in streamed.json()] == [
+            "Task 3",
+            "Task 2",
+            "Task 1",
+            "Task 0",
+        ]
+
+    def test_streamed_users_match_buffered(self, client, monkeypatch, sample_user_data):
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        # Users of earlier tests come first
+        params = {"skip": user_id - 1, "limit": 10}
+        buffered = client.get("/api/v1/users/", params=params)
+
+        monkeypatch.setattr(settings, "STREAM_PAGE_SIZE", 2)
+        streamed = client.get("/api/v1/users/", params=params)
+
+        assert streamed.content == buffered.content
+        assert [user["id"] for user in streamed.json()] == [user_id]
+
+    def test_empty_streamed_page(self, client, small_pages, user_with_tasks):
+        user_id, _ = user_with_tasks()
+        response = client.get(f"/api/v1/users/{user_id}/tasks/", params={"limit": 10})
+        assert response.json() == []
+
+
+def test_json_array_chunks():
+    serialize = task_serializer(("id",)).dump_json
+    rows = [SimpleNamespace(id=i) for i in range(5)]
+    chunks = list(json_array_chunks(rows, serialize, 2))
+    assert chunks == [b'[{"id":0},{"id":1}', b',{"id":2},{"id":3}', b',{"id":4}', b"]"]
+    assert list(json_array_chunks([], serialize, 2)) == [b"[]"]
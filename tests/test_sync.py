@@ -0,0 +1,63 @@
+"""
+Tests for the task change feed.
+"""
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from app.crud import get_task_crud
+
+
+class TestTaskSync:
+    """Test cases for GET /users/{user_id}/tasks/sync."""
+
+    def test_full_sync_then_delta(self, client, user_with_tasks):
+        user_id, ids = user_with_tasks(3)
+
+        full = client.get(f"/api/v1/users/{user_id}/tasks/sync").json()
+        assert full["reset"] is True
+        assert [task["id"] for task in full["changed"]] == ids
+
+        client.patch(f"/api/v1/tasks/{ids[1]}/status", json={"status": "DONE"})
+        client.delete(f"/api/v1/tasks/{ids[2]}")
+        delta = client.get(
+            f"/api/v1/users/{user_id}/tasks/sync", params={"since": full["next_token"]}
+        ).json()
+
+        assert delta["reset"] is False
+        assert [(task["id"], task["status"]) for task in delta["changed"]] == [(ids[1], "DONE")]
+        assert delta["deleted"] == [ids[2]]
+
+        again = client.get(
+            f"/api/v1/users/{user_id}/tasks/sync", params={"since": delta["next_token"]}
+        ).json()
+        assert again["changed"] == [] and again["deleted"] == []
+        assert again["next_token"] == delta["next_token"]
+
+    def test_paging_through_changes(self, client, user_with_tasks):
+        user_id, ids = user_with_tasks(5)
+
+        seen, token, has_more = [], None, True
+        while has_more:
+            params = {"limit": 2, **({"since": token} if token else {})}
+            page = client.get(f"/api/v1/users/{user_id}/tasks/sync", params=params).json()
+            seen += [task["id"] for task in page["changed"]]
+            token, has_more = page["next_token"], page["has_more"]
+
+        assert seen == ids
+
+    def test_purged_tombstones_force_reset(self, client, db_session, user_with_tasks):
+        user_id, ids = user_with_tasks(2)
+        token = client.get(f"/api/v1/users/{user_id}/tasks/sync").json()["next_token"]
+        client.delete(f"/api/v1/tasks/{ids[0]}")
+
+        get_task_crud(db_session).purge_tombstones(datetime.utcnow() + timedelta(seconds=1))
+        response = client.get(f"/api/v1/users/{user_id}/tasks/sync", params={"since": token})
+
+        assert response.json()["reset"] is True
+        assert [task["id"] for task in response.json()["changed"]] == ids[1:]
+
+    def test_invalid_token(self, client, user_with_tasks):
+        user_id, _ = user_with_tasks(1)
+        response = client.get(f"/api/v1/users/{user_id}/tasks/sync", params={"since": "garbage"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,191 @@
+"""
+Tests for task tags, their maintained counts and tag filters of task listings.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy import event, update
+
+from app.crud import get_task_crud
+from app.crud import task_filter as task_filter_module
+from app.crud.task_filter import TaskFilter
+from app.models import Task
+
+# Tags of the tasks created by the TestTags.tagged fixture, by title
+TAGGED = {
+    "alpha": ["red", "blue"],
+    "beta": ["red"],
+    "gamma": ["blue", "green"],
+    "delta": ["red", "blue", "green"],
+    "epsilon": [],
+}
+
+
+class TestTags:
+    """Test cases for tag assignment, the tag cloud and tag filters."""
+
+    @pytest.fixture()
+    def tagged(self, client, user_with_tasks):
+        """The sample user with a task per TAGGED title, tagged as listed there."""
+        user_id, task_ids = user_with_tasks(list(TAGGED))
+        ids = dict(zip(TAGGED, task_ids))
+        for tag in ("red", "blue", "green"):
+            matching = [ids[title] for title, tags in TAGGED.items() if tag in tags]
+            response = client.post(
+                f"/api/v1/users/{user_id}/tags/assign", json={"task_ids": matching, "tags": [tag]}
+            )
+            assert response.status_code == status.HTTP_200_OK, response.text
+        return user_id, ids
+
+    def _cloud(self, client, user_id):
+        return {
+            tag["name"]: tag["task_count"]
+            for tag in client.get(f"/api/v1/users/{user_id}/tags").json()
+        }
+
+    def test_counts_follow_assignments(self, client, tagged):
+        user_id, ids = tagged
+        assert self._cloud(client, user_id) == {"red": 3, "blue": 3, "green": 2}
+
+        # Pairs already there are not added twice
+        response = client.post(
+            f"/api/v1/users/{user_id}/tags/assign",
+            json={"task_ids": [ids["alpha"], ids["epsilon"]], "tags": ["green", " red "]},
+        )
+
+        assert response.json()["changed"] == 3
+        assert [(tag["name"], tag["task_count"]) for tag in response.json()["tags"]] == [
+            ("green", 4),
+            ("red", 4),
+        ]
+        response = client.post(
+            f"/api/v1/users/{user_id}/tags/unassign",
+            json={"task_ids": [ids["alpha"], ids["beta"]], "tags": ["red", "unknown"]},
+        )
+        assert response.json()["changed"] == 2
+        client.delete(f"/api/v1/tasks/{ids['delta']}")
+        assert self._cloud(client, user_id) == {"green": 3, "blue": 2, "red": 1}
+
+    @pytest.mark.parametrize("probe_cost", [0, 10**9])
+    @pytest.mark.parametrize("sort", ["id", "-title"])
+    def test_filters_by_tags(self, task_titles, tagged, monkeypatch, probe_cost, sort):
+        # Probing each task, or merging the posting lists, must give the same listings
+        monkeypatch.setattr(task_filter_module, "TAG_PROBE_COST", probe_cost)
+        user_id, _ = tagged
+
+        def titles(**params):
+            return task_titles(user_id, sort=sort, **params)
+
+        def expected(matches):
+            titles = [title for title, tags in TAGGED.items() if matches(set(tags))]
+            return sorted(titles, reverse=True) if sort == "-title" else titles
+
+        assert titles(tags="red") == expected(lambda tags: "red" in tags)
+        assert titles(tags="red,blue") == expected(lambda tags: {"red", "blue"} <= tags)
+        assert titles(tags="red,blue,green") == ["delta"]
+        assert titles(tags="red,green", tag_match="any") == expected(
+            lambda tags: bool({"red", "green"} & tags)
+        )
+        assert titles(tags="red,unknown") == []
+        assert titles(tags="green,unknown", tag_match="any") == expected(
+            lambda tags: "green" in tags
+        )
+        assert (
+            titles(tags="red,blue", limit=1, skip=1)
+            == expected(lambda tags: {"red", "blue"} <= tags)[1:2]
+        )
+
+    def test_assignments_refresh_cached_listings(self, client, task_titles, tagged):
+        user_id, ids = tagged
+        assert task_titles(user_id, tags="green") == ["gamma", "delta"]
+
+        client.post(
+            f"/api/v1/users/{user_id}/tags/assign",
+            json={"task_ids": [ids["epsilon"]], "tags": ["green"]},
+        )
+
+        assert task_titles(user_id, tags="green") == ["gamma", "delta", "epsilon"]
+
+    def test_archived_tasks_keep_their_tags(self, client, task_titles, db_session, tagged):
+        user_id, ids = tagged
+        client.patch(f"/api/v1/tasks/{ids['alpha']}/status", json={"status": "DONE"})
+        db_session.execute(
+            update(Task)
+            .where(Task.id == ids["alpha"])
+            .values(updated_at=datetime.utcnow() - timedelta(days=90))
+        )
+        db_session.commit()
+        get_task_crud(db_session).archive_done(datetime.utcnow() - timedelta(days=30))
+
+        assert task_titles(user_id, tags="red,blue") == ["delta"]
+        assert task_titles(user_id, tags="red,blue", include_archived=True) == [
+            "alpha",
+            "delta",
+        ]
+
+    def test_assignment_errors(self, client, tagged, sample_user_data):
+        user_id, ids = tagged
+        other = {**sample_user_data, "email": "other." + sample_user_data["email"]}
+        other_id = client.post("/api/v1/users/", json=other).json()["id"]
+
+        response = client.post(
+            f"/api/v1/users/{other_id}/tags/assign",
+            json={"task_ids": [ids["alpha"]], "tags": ["red"]},
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert self._cloud(client, other_id) == {}
+        for tags in (["a,b"], [" "], []):
+            response = client.post(
+                f"/api/v1/users/{user_id}/tags/assign",
+                json={"task_ids": [ids["alpha"]], "tags": tags},
+            )
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        many = ",".join(f"t{i}" for i in range(50))
+        response = client.get(f"/api/v1/users/{user_id}/tasks/", params={"tags": many})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_with_tags_picks_the_cheaper_match():
+    rare = TaskFilter(tags=("a", "b")).with_tags([(1, 10), (2, 5000)], 100000, 20)
+    common = TaskFilter(tags=("a", "b")).with_tags([(1, 50000), (2, 30000)], 100000, 20)
+
+    # Rarest tag first
+    assert rare.tag_ids == (1, 2) and rare.merge_tags
+    assert common.tag_ids == (2, 1) and not common.merge_tags
+    assert TaskFilter(tags=("a", "b")).with_tags([(1, 10)], 100000, 20) is None
+    any_tag = TaskFilter(tags=("a", "b"), any_tag=True).with_tags([(1, 10)], 100000, 20)
+    assert any_tag.tag_ids == (1,)
+
+
+@pytest.mark.parametrize("sort", ["id", "title"])
+def test_merged_posting_lists_plan(client, db_session, user_with_tasks, monkeypatch, sort):
+    monkeypatch.setattr(task_filter_module, "TAG_PROBE_COST", 10**9)
+    user_id, [task_id] = user_with_tasks(["T"])
+    client.post(
+        f"/api/v1/users/{user_id}/tags/assign", json={"task_ids": [task_id], "tags": ["x", "y"]}
+    )
+    task_filter = TaskFilter(tags=("x", "y"), sort=sort)
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT tasks."):
+            statements.append((statement, parameters))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        get_task_crud(db_session).list_by_user(user_id, task_filter)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = statements[-1]
+    details = [
+        row[-1]
+        for row in db_session.connection().exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        )
+    ]
+    assert "USING INDEX ix_tasks_user_id (user_id=? AND rowid=?)" in details[0]
+    assert "MERGE (INTERSECT)" in details
+    assert any("TEMP B-TREE" in detail for detail in details) == (sort != "id")
@@ -0,0 +1,134 @@
+"""
+Tests for filtering and sorting task listings.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.crud import get_task_crud
+from app.crud.task_filter import TaskFilter
+from app.models import Task
+
+
+class TestTaskFilters:
+    """Test cases for GET /users/{user_id}/tasks/ filters."""
+
+    @pytest.fixture()
+    def listed(self, db_session, user_with_tasks):
+        """Four tasks of the sample user, created and updated a day apart."""
+        user_id, ids = user_with_tasks(
+            [
+                {"title": "beta", "status": "TODO"},
+                {"title": "alpha", "status": "DONE"},
+                {"title": "alpine", "status": "IN_PROGRESS"},
+                {"title": "gamma", "status": "DONE"},
+            ]
+        )
+        for day, task_id in enumerate(ids):
+            stamp = datetime(2026, 1, 1 + day)
+            db_session.query(Task).filter(Task.id == task_id).update(
+                {"created_at": stamp, "updated_at": stamp + timedelta(days=10 - 2 * day)}
+            )
+        db_session.commit()
+        return user_id
+
+    def test_several_statuses_are_paginated(self, listed, task_titles):
+        user_id = listed
+
+        assert task_titles(user_id, status_filter="DONE,TODO") == [
+            "beta",
+            "alpha",
+            "gamma",
+        ]
+        assert task_titles(user_id, status_filter="DONE,TODO", skip=1, limit=1) == ["alpha"]
+
+    def test_sort_and_title_prefix(self, listed, task_titles):
+        user_id = listed
+
+        assert task_titles(user_id, sort="-title") == ["gamma", "beta", "alpine", "alpha"]
+        assert task_titles(user_id, sort="updated_at") == [
+            "gamma",
+            "alpine",
+            "alpha",
+            "beta",
+        ]
+        assert task_titles(user_id, title_prefix="alp", sort="title") == [
+            "alpha",
+            "alpine",
+        ]
+        assert task_titles(user_id, title_prefix="Alp") == []
+
+    def test_time_ranges(self, listed, task_titles):
+        user_id = listed
+
+        assert task_titles(
+            user_id,
+            created_after="2026-01-02T00:00:00",
+            created_before="2026-01-04T00:00:00",
+        ) == ["alpha", "alpine"]
+        assert task_titles(user_id, updated_before="2026-01-10T00:00:00", sort="-created_at") == [
+            "gamma",
+            "alpine",
+        ]
+
+    def test_invalid_filters(self, client, sample_user_data):
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        url = f"/api/v1/users/{user_id}/tasks/"
+
+        assert client.get(url, params={"sort": "description"}).status_code == 400
+        assert client.get(url, params={"status_filter": "TODO,LATER"}).status_code == 400
+
+    def test_unindexed_sort_of_many_rows_is_rejected(self, client, listed, monkeypatch):
+        user_id = listed
+        monkeypatch.setattr(settings, "TASK_LIST_MAX_SORT_ROWS", 2)
+        url = f"/api/v1/users/{user_id}/tasks/"
+
+        # Served in order by (user_id, title): fine however many rows match
+        assert client.get(url, params={"sort": "title"}).status_code == 200
+        # Narrowed by (user_id, updated_at), then 3 rows would have to be sorted
+        rejected = client.get(url, params={"sort": "title", "updated_after": "2026-01-01T00:00:00"})
+        assert rejected.status_code == status.HTTP_400_BAD_REQUEST
+        assert (
+            client.get(url, params={"sort": "title", "include_archived": True}).status_code == 400
+        )
+        assert client.get(url, params={"include_archived": True}).status_code == 200
+
+
+@pytest.mark.parametrize(
+    "task_filter",
+    [
+        TaskFilter(),
+        TaskFilter(statuses=("TODO", "DONE"), sort="created_at", descending=True),
+        TaskFilter(updated_after=datetime(2026, 1, 1), sort="updated_at"),
+        TaskFilter(title_prefix="al", sort="title"),
+        TaskFilter(title_prefix="al"),
+        TaskFilter(created_before=datetime(2026, 1, 1), sort="title"),
+    ],
+)
+def test_plan_matches_sqlite(db_session, task_filter):
+    plan = task_filter.plan()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM tasks" in statement:
+            statements.append((statement, parameters))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        get_task_crud(db_session).list_by_user(1, task_filter)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = statements[-1]
+    details = [
+        row[-1]
+        for row in db_session.connection().exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        )
+    ]
+    assert f"USING INDEX {plan.index} " in details[0]
+    assert any("TEMP B-TREE" in detail for detail in details) == (not plan.ordered)
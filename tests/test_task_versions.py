@@ -0,0 +1,158 @@
+"""
+Tests for task versions and compare-and-set updates.
+"""
+import pytest
+from fastapi import status
+from sqlalchemy import event, select
+
+from app.core.config import settings
+from app.crud import get_task_crud
+from app.crud import task as task_module
+from app.crud.task import shutdown_status_batchers
+from app.models import TaskStatusEvent, UserTaskCounts
+from app.models.task import TaskStatus
+from app.schemas import TaskStatusUpdate, TaskUpdate
+from app.utils.exceptions import ConflictError
+from tests.conftest import TestingSessionLocal
+
+
+class TestTaskVersions:
+    """Test cases for expected_version on PUT /tasks/{task_id} and PATCH .../status."""
+
+    def test_every_update_bumps_the_version(self, client, user_with_tasks):
+        _, [task_id] = user_with_tasks(["T"])
+        assert client.get(f"/api/v1/tasks/{task_id}").json()["version"] == 1
+
+        updated = client.put(f"/api/v1/tasks/{task_id}", json={"title": "U"}).json()
+        assert updated["version"] == 2
+        updated = client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": "DONE"})
+        assert updated.json()["version"] == 3
+        assert client.get(f"/api/v1/tasks/{task_id}").json()["version"] == 3
+
+    @pytest.mark.parametrize("batching", [False, True])
+    def test_stale_expected_version_conflicts(self, client, user_with_tasks, monkeypatch, batching):
+        monkeypatch.setattr(settings, "STATUS_WRITE_BATCHING", batching)
+        _, [task_id] = user_with_tasks(["T"])
+        url = f"/api/v1/tasks/{task_id}"
+        try:
+            # Two editors read version 1; the first to write wins
+            first = client.put(url, json={"title": "First", "expected_version": 1})
+            second = client.put(url, json={"title": "Second", "expected_version": 1})
+            status_update = client.patch(
+                f"{url}/status", json={"status": "DONE", "expected_version": 1}
+            )
+        finally:
+            shutdown_status_batchers()
+
+        assert first.status_code == status.HTTP_200_OK
+        assert second.status_code == status.HTTP_409_CONFLICT
+        assert second.json()["detail"] == f"Task {task_id} is at version 2, not 1"
+        assert status_update.status_code == status.HTTP_409_CONFLICT
+        current = client.get(url).json()
+        assert (current["title"], current["status"], current["version"]) == ("First", "TODO", 2)
+
+        response = client.patch(f"{url}/status", json={"status": "DONE", "expected_version": 2})
+        assert response.json()["version"] == 3
+
+    def test_batch_operation_conflicts(self, client, user_with_tasks):
+        _, [task_id] = user_with_tasks(["T"])
+
+        response = client.post(
+            "/api/v1/batch",
+            json={
+                "operations": [
+                    {
+                        "op": "task.update",
+                        "task_id": task_id,
+                        "data": {"title": "U", "expected_version": 1},
+                    },
+                    {
+                        "op": "task.update",
+                        "task_id": task_id,
+                        "data": {"title": "V", "expected_version": 1},
+                    },
+                ]
+            },
+        )
+
+        assert [result["status"] for result in response.json()["results"]] == [200, 409]
+
+
+class TestCompareAndSet:
+    """Test cases for a write committed just before the update takes the write lock."""
+
+    @pytest.fixture()
+    def race(self, db_session, user_with_tasks, monkeypatch):
+        """A task, and a writer that sets its status to IN_PROGRESS during the next update."""
+        user_id, [task_id] = user_with_tasks(["T"])
+        next_change_seq = task_module.next_change_seq
+
+        def racing_next_change_seq(db):
+            monkeypatch.setattr(task_module, "next_change_seq", next_change_seq)
+            with TestingSessionLocal() as other:
+                get_task_crud(other).update_status(
+                    task_id, TaskStatusUpdate(status=TaskStatus.IN_PROGRESS)
+                )
+            return next_change_seq(db)
+
+        monkeypatch.setattr(task_module, "next_change_seq", racing_next_change_seq)
+        return user_id, task_id
+
+    def test_last_writer_wins_without_expected_version(self, db_session, race):
+        user_id, task_id = race
+
+        task = get_task_crud(db_session).update_status(
+            task_id, TaskStatusUpdate(status=TaskStatus.DONE)
+        )
+
+        assert (task.status, task.version) == (TaskStatus.DONE, 3)
+        # The transition is recorded from the status the other writer set
+        transitions = db_session.execute(
+            select(TaskStatusEvent.from_status, TaskStatusEvent.to_status)
+            .where(TaskStatusEvent.task_id == task_id)
+            .order_by(TaskStatusEvent.id)
+        ).all()
+        assert transitions == [
+            (None, TaskStatus.TODO),
+            (TaskStatus.TODO, TaskStatus.IN_PROGRESS),
+            (TaskStatus.IN_PROGRESS, TaskStatus.DONE),
+        ]
+        counts = db_session.get(UserTaskCounts, user_id)
+        assert (counts.open_tasks, counts.in_progress_tasks, counts.done_tasks) == (0, 0, 1)
+
+    def test_expected_version_conflicts(self, db_session, race):
+        _, task_id = race
+
+        with pytest.raises(ConflictError):
+            get_task_crud(db_session).update(task_id, TaskUpdate(title="U", expected_version=1))
+        db_session.rollback()
+
+        task = get_task_crud(db_session).get_by_id(task_id)
+        assert (task.title, task.status, task.version) == ("T", TaskStatus.IN_PROGRESS, 2)
+
+
+def test_update_is_one_statement(db_session, user_with_tasks):
+    _, [task_id] = user_with_tasks(["T"])
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        get_task_crud(db_session).update(task_id, TaskUpdate(priority=1, expected_version=1))
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    task_writes = [statement for statement in statements if statement.startswith("UPDATE tasks ")]
+    assert len(task_writes) == 1
+    assert "WHERE tasks.id = ? AND tasks.version = ? RETURNING" in task_writes[0]
+    # The version is compared by the UPDATE alone
+    assert not any(statement.startswith("SELECT tasks.version") for statement in statements)
+
+
+def test_expected_version_of_missing_task(client):
+    response = client.put("/api/v1/tasks/999999", json={"title": "U", "expected_version": 1})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
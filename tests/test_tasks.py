@@ -2,6 +2,13 @@
 Tests for task API endpoints.
 """
 from fastapi import status
+from sqlalchemy import event
+
+from app.core.database import compiled_cache_total
+from app.crud import get_task_crud
+from app.crud.task import COUNT_BY_STATUS, SET_TASK_STATUS, TASK_BY_ID, TASK_LIST_BY_USER
+from app.models import TaskStatus
+from app.schemas import TaskStatusUpdate
 
 
 class TestTaskAPI:
@@ -114,7 +121,7 @@ class TestTaskAPI:
         user_id = user_response.json()["id"]
 
         # Create tasks
-        task1_response = client.post(f"/api/v1/users/{user_id}/tasks/", json={"title": "Task 1"})
+        client.post(f"/api/v1/users/{user_id}/tasks/", json={"title": "Task 1"})
         task2_response = client.post(f"/api/v1/users/{user_id}/tasks/", json={"title": "Task 2"})
 
         # Update one task status
@@ -199,3 +206,62 @@ class TestTaskAPI:
         assert data["description"] == sample_task_data["description"]
         assert data["id"] == task_id
         assert data["user_id"] == user_id
+
+    def test_get_user_tasks_sparse_fields(self, client, sample_user_data, sample_task_data):
+        """Test selecting a subset of task fields."""
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        task_id = client.post(f"/api/v1/users/{user_id}/tasks/", json=sample_task_data).json()["id"]
+
+        response = client.get(
+            f"/api/v1/users/{user_id}/tasks/", params={"fields": "status,id, title"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [
+            {"id": task_id, "title": sample_task_data["title"], "status": "TODO"}
+        ]
+
+        response = client.get(
+            f"/api/v1/users/{user_id}/tasks/",
+            params={"fields": "title", "status_filter": "TODO", "include_archived": True},
+        )
+        assert response.json() == [{"title": sample_task_data["title"]}]
+
+    def test_get_user_tasks_unknown_field(self, client, sample_user_data):
+        """Test that unknown fields are rejected."""
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        response = client.get(f"/api/v1/users/{user_id}/tasks/", params={"fields": "id,secret"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_hot_paths_reuse_compiled_statements(
+        self, client, db_session, sample_user_data, sample_task_data
+    ):
+        """Test that repeated lookups hit the compiled SQL cache."""
+        user_id = client.post("/api/v1/users/", json=sample_user_data).json()["id"]
+        task_id = client.post(f"/api/v1/users/{user_id}/tasks/", json=sample_task_data).json()["id"]
+        task_crud = get_task_crud(db_session)
+        task_crud.get_by_id(task_id)
+        task_crud.count_by_status(user_id, TaskStatus.TODO)
+        task_crud.list_by_user(user_id)
+        task_crud.update_status(task_id, TaskStatusUpdate(status=TaskStatus.IN_PROGRESS))
+        hits = compiled_cache_total.value(result="cache_hit")
+        misses = compiled_cache_total.value(result="cache_miss")
+        executed = []
+
+        def capture(orm_execute_state):
+            executed.append(orm_execute_state.statement)
+
+        event.listen(db_session, "do_orm_execute", capture)
+        try:
+            assert task_crud.get_by_id(task_id).id == task_id
+            assert task_crud.count_by_status(user_id, TaskStatus.TODO) == 0
+            assert task_crud.count_by_status(user_id, TaskStatus.IN_PROGRESS) == 1
+            assert [task.id for task in task_crud.list_by_user(user_id, limit=10)] == [task_id]
+            task_crud.update_status(task_id, TaskStatusUpdate(status=TaskStatus.DONE))
+        finally:
+            event.remove(db_session, "do_orm_execute", capture)
+
+        assert compiled_cache_total.value(result="cache_hit") > hits + 4
+        assert compiled_cache_total.value(result="cache_miss") == misses
+        # The default listing and status updates run the statements built at import
+        for statement in (TASK_BY_ID, COUNT_BY_STATUS, TASK_LIST_BY_USER, SET_TASK_STATUS):
+            assert any(executed_statement is statement for executed_statement in executed)
@@ -0,0 +1,67 @@
+"""
+Tests for the unvalidated serialization of rows read from the database.
+"""
+from typing import Any, List, Tuple
+
+from pydantic import ConfigDict, TypeAdapter, create_model
+from sqlalchemy import select
+
+from app.models import Task as TaskModel
+from app.models import User as UserModel
+from app.schemas.task import TASK_FIELDS, Task, task_serializer
+from app.schemas.user import User, user_serializer
+
+
+def _task_projection(fields: Tuple[str, ...]) -> "TypeAdapter[List[Any]]":
+    """Validating adapter of rows with only ``fields`` of the Task schema, as the reference."""
+    model = create_model(  # type: ignore[call-overload]
+        "TaskFields_" + "_".join(fields),
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (Task.model_fields[name].annotation, ...) for name in fields},
+    )
+    return TypeAdapter(List[model])  # type: ignore[valid-type]
+
+
+class TestTrustedSerializer:
+    """Test cases for TrustedSerializer against the validating schemas."""
+
+    def test_orm_objects_match_validated(self, db_session, user_with_tasks):
+        _, [task_id] = user_with_tasks([{"title": "Task", "description": "ünïcode"}])
+        tasks = list(db_session.scalars(select(TaskModel).where(TaskModel.id == task_id)))
+        users = list(db_session.scalars(select(UserModel).where(UserModel.id == tasks[0].user_id)))
+
+        adapter = _task_projection(TASK_FIELDS)
+        assert task_serializer(TASK_FIELDS).dump_json(tasks) == adapter.dump_json(
+            adapter.validate_python(tasks, from_attributes=True)
+        )
+        # Expired attributes are loaded again
+        db_session.expire(tasks[0])
+        assert task_serializer(TASK_FIELDS).dump_json(tasks) == adapter.dump_json(
+            adapter.validate_python(tasks, from_attributes=True)
+        )
+        assert (
+            user_serializer.dump_json(users)
+            == b"[" + User.model_validate(users[0]).model_dump_json().encode() + b"]"
+        )
+
+    def test_rows_in_any_column_order(self, db_session, user_with_tasks):
+        _, [task_id] = user_with_tasks([{"title": "Task", "description": "ünïcode"}])
+        fields = ("title", "id", "status")
+        adapter = _task_projection(fields)
+        expected = adapter.dump_json(
+            adapter.validate_python(
+                list(db_session.scalars(select(TaskModel).where(TaskModel.id == task_id))),
+                from_attributes=True,
+            )
+        )
+
+        for columns in (fields, ("status", "title", "id", "created_at")):
+            rows = list(
+                db_session.execute(
+                    select(*[getattr(TaskModel, column) for column in columns]).where(
+                        TaskModel.id == task_id
+                    )
+                )
+            )
+            assert task_serializer(fields).dump_json(rows) == expected
+        assert task_serializer(("id",)).dump_json([]) == b"[]"
@@ -5,6 +5,10 @@ Tests for user API endpoints.
 import uuid
 
 from fastapi import status
+from sqlalchemy import event
+
+from app.crud import get_user_crud
+from app.schemas import UserCreate
 
 
 class TestUserAPI:
@@ -86,3 +90,85 @@ class TestUserAPI:
         assert data["id"] == user_id
         assert "tasks" in data
         assert isinstance(data["tasks"], list)
+
+    def test_emails_are_case_insensitive(self, client):
+        email = f"Case.{uuid.uuid4().hex[:8]}@Example.com"
+        client.post("/api/v1/users/", json={"name": "Case", "email": email})
+        response = client.post("/api/v1/users/", json={"name": "Case", "email": email.lower()})
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+
+class TestBulkUpsert:
+    """Test cases for POST /users/bulk."""
+
+    def test_creates_updates_and_skips(self, client, db_session):
+        tag = uuid.uuid4().hex[:8]
+        existing = client.post(
+            "/api/v1/users/", json={"name": "Ann", "email": f"ann.{tag}@example.com"}
+        ).json()
+        client.post("/api/v1/users/", json={"name": "Bob", "email": f"bob.{tag}@example.com"})
+
+        response = client.post(
+            "/api/v1/users/bulk",
+            json={
+                "users": [
+                    # Renamed, matched regardless of case
+                    {"name": "Ann Smith", "email": f"ANN.{tag}@example.com"},
+                    {"name": "Bob", "email": f"bob.{tag}@example.com"},
+                    {"name": "Cy", "email": f"cy.{tag}@example.com"},
+                    # The last entry of an email wins
+                    {"name": "Di", "email": f"di.{tag}@example.com"},
+                    {"name": "Dina", "email": f"Di.{tag}@example.com"},
+                ]
+            },
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"created": 2, "updated": 1, "unchanged": 1}
+        ann = client.get(f"/api/v1/users/{existing['id']}").json()
+        assert ann["name"] == "Ann Smith"
+        assert ann["email"] == f"ANN.{tag}@example.com"
+        dina = get_user_crud(db_session).get_by_email(f"DI.{tag}@EXAMPLE.COM")
+        assert (dina.name, dina.email) == ("Dina", f"Di.{tag}@example.com")
+
+        again = client.post(
+            "/api/v1/users/bulk", json={"users": [{"name": "Cy", "email": f"cy.{tag}@example.com"}]}
+        )
+        assert again.json() == {"created": 0, "updated": 0, "unchanged": 1}
+
+    def test_updates_refresh_cached_users(self, client):
+        tag = uuid.uuid4().hex[:8]
+        user = client.post(
+            "/api/v1/users/", json={"name": "Old", "email": f"old.{tag}@example.com"}
+        ).json()
+        # Fills the multi-get cache
+        assert client.get("/api/v1/users/", params={"ids": user["id"]}).json()[0]["name"] == "Old"
+
+        client.post(
+            "/api/v1/users/bulk",
+            json={"users": [{"name": "New", "email": f"old.{tag}@example.com"}]},
+        )
+
+        assert client.get("/api/v1/users/", params={"ids": user["id"]}).json()[0]["name"] == "New"
+
+    def test_takes_the_write_lock_before_reading_ids(self, db_session):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            get_user_crud(db_session).bulk_upsert(
+                [UserCreate(name="Ed", email=f"ed.{uuid.uuid4().hex[:8]}@example.com")]
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        assert statements[0] == "BEGIN IMMEDIATE"
+        assert "max(users.id)" in statements[1]
+
+    def test_empty_batch_is_rejected(self, client):
+        response = client.post("/api/v1/users/bulk", json={"users": []})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,84 @@
+"""
+Tests for group-committed task status updates.
+"""
+import threading
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.write_batcher import WriteBatcher
+from app.crud import get_task_crud, get_user_crud
+from app.crud.task import _apply_status, shutdown_status_batchers
+from app.models.task import TaskStatus
+from app.schemas import TaskCreate, UserCreate
+from app.utils.exceptions import NotFoundError
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture()
+def status_batching(monkeypatch):
+    monkeypatch.setattr(settings, "STATUS_WRITE_BATCHING", True)
+    monkeypatch.setattr(settings, "STATUS_BATCH_MAX_DELAY_MS", 20.0)
+    yield
+    shutdown_status_batchers()
+
+
+class TestStatusWriteBatching:
+    """Test cases for the status update write batcher."""
+
+    def test_patch_status_with_batching(self, client, status_batching, user_with_tasks):
+        """Batched status updates return the committed task."""
+        _, [task_id] = user_with_tasks(["Batched"])
+
+        response = client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": "DONE"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "DONE"
+        assert client.get(f"/api/v1/tasks/{task_id}").json()["status"] == "DONE"
+
+    def test_patch_missing_task_with_batching(self, client, status_batching):
+        """A missing task fails only its own caller."""
+        response = client.patch("/api/v1/tasks/999999/status", json={"status": "DONE"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_concurrent_updates_share_commits(self, db_session, sample_user_data):
+        """Concurrent updates are flushed in fewer commits than callers."""
+        user = get_user_crud(db_session).create(UserCreate(**sample_user_data))
+        task_ids = [
+            get_task_crud(db_session).create(TaskCreate(title=f"Task {i}"), user.id).id
+            for i in range(8)
+        ]
+        commits = []
+        batcher = WriteBatcher(
+            TestingSessionLocal, _apply_status, max_batch_size=8, max_delay_ms=200
+        )
+        listener = lambda session: commits.append(session)  # noqa: E731
+        event.listen(TestingSessionLocal, "after_commit", listener)
+        try:
+            threads = [
+                threading.Thread(target=batcher.submit, args=(task_id, TaskStatus.IN_PROGRESS))
+                for task_id in task_ids
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            event.remove(TestingSessionLocal, "after_commit", listener)
+            batcher.stop()
+
+        assert len(commits) < len(task_ids)
+        db_session.expire_all()
+        crud = get_task_crud(db_session)
+        assert all(crud.get_by_id(task_id).status == TaskStatus.IN_PROGRESS for task_id in task_ids)
+
+    def test_batcher_reports_missing_task(self):
+        """Domain errors are raised to the submitting caller."""
+        batcher = WriteBatcher(TestingSessionLocal, _apply_status, max_batch_size=4, max_delay_ms=1)
+        try:
+            with pytest.raises(NotFoundError):
+                batcher.submit(999999, TaskStatus.DONE)
+        finally:
+            batcher.stop()